@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "testbed.settings.production")
 
 application = get_asgi_application()
+
+# Optional periodic purge of expired OAuth tokens (settings.LOLA_TOKEN_PURGE_INTERVAL)
+from testbed.core.oauth.token_purge import start_token_purge_scheduler  # noqa: E402
+
+start_token_purge_scheduler()
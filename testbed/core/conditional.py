@@ -0,0 +1,116 @@
+"""
+Conditional GET (RFC 9110 section 13) for the actor, outbox and collection views.
+
+Federation peers poll actors and collections. Every response now carries a strong ETag and
+a Last-Modified date, and a request whose If-None-Match (or, without it, If-Modified-Since)
+still matches is answered 304 Not Modified before any JSON-LD is built.
+
+The validators come from a cheap version of the underlying rows instead of the rendered body:
+- actor: Actor.updated_at (the row is already loaded by actor_required)
+- outbox: COUNT and MAX(timestamp) of the visible OutboxEntry rows, one indexed aggregate
+- collections: COUNT and MAX(changed_field) over the collection's rows, including inactive
+  relationships, so follows, unfollows and deletions all change the version (see changes.py)
+The owner's Actor.updated_at is part of every version, so an edited actor also refreshes its
+collections. Outbox and collection versions also hold the actor's response cache generation (see
+response_cache.py). Every write to the actor's rows or to the objects its responses embed bumps it,
+so an edited Note, or a delete plus an insert that keeps the count and newest time, still changes
+the ETag. An evicted generation restarts from the clock, which costs one full response.
+
+The ETag also hashes everything else the body depends on: the full request path (page cursor,
+filters), the rendering options, the negotiated format, the portability scope and the base URL.
+Scoped and public variants therefore never share an ETag, and responses carry
+`Vary: Authorization` (see decorators.activitypub_content).
+
+Last-Modified is the newest change time of the rows, which edits without a change time (Notes
+have no updated_at), hard deletes and embedded objects do not move: it is a weak validator. Clients
+should prefer If-None-Match, which takes precedence when both are sent.
+"""
+
+import hashlib
+from typing import NamedTuple
+
+from django.db.models import Count, Max
+from django.http import HttpResponseNotModified
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .json_ld_utils import get_id_factory
+
+
+class Validators(NamedTuple):
+    etag: str             # quoted, strong
+    last_modified: object  # datetime, or None when nothing has changed yet (e.g. an empty collection)
+
+
+class RowsVersion(NamedTuple):
+    count: int
+    last: object     # newest change time, or None for no rows
+    last_pk: int     # highest primary key (the effective snapshot bound, see response_cache.py), or None
+
+
+def rows_version(queryset, changed_field):
+    """RowsVersion of a queryset, read with one aggregate query."""
+    version = queryset.aggregate(count=Count("pk"), last=Max(changed_field), last_pk=Max("pk"))
+    return RowsVersion(version["count"], version["last"], version["last_pk"])
+
+
+def response_variant(request, auth_context):
+    """
+    Everything besides the data that a response body depends on: the full request path (page
+    cursor, filters), the negotiated renderer, the portability scope, the rendering options and
+    the base URL. Also part of the response cache key (see response_cache.py).
+    """
+    renderer = getattr(request, "accepted_renderer", None)
+    return (
+        request.get_full_path(),
+        getattr(renderer, "media_type", None),
+        bool(auth_context.get("has_portability_scope")),
+        # Also selectable by header (Prefer: return=minimal) or by route default
+        auth_context.get("representation"),
+        auth_context.get("compact"),
+        get_id_factory(request).base_url,
+    )
+
+
+def build_validators(request, auth_context, version, last_modified):
+    """
+    Validators of a response variant.
+
+    Args:
+        request: the DRF request (see response_variant)
+        auth_context: see decorators.build_auth_context
+        version: tuple of plain values (datetimes, counts) that changes whenever the body's data does
+        last_modified: newest change time of that data, or None
+    """
+    variant = response_variant(request, auth_context)
+    digest = hashlib.sha256(repr((variant, version)).encode("utf-8")).hexdigest()[:32]
+    return Validators(quote_etag(digest), last_modified)
+
+
+def latest(*times):
+    """The newest of some datetimes, ignoring None."""
+    times = [time for time in times if time is not None]
+    return max(times) if times else None
+
+
+def conditional_response(request, validators, build_response):
+    """
+    Answer 304 Not Modified (or 412 for a failed If-Match) when the client's copy is current;
+    otherwise call `build_response()` and stamp the ETag and Last-Modified on its 200 response.
+    """
+    last_modified = int(validators.last_modified.timestamp()) if validators.last_modified else None
+    conditional = get_conditional_response(request, etag=validators.etag, last_modified=last_modified)
+    if conditional is not None:
+        if isinstance(conditional, HttpResponseNotModified):
+            # A 304 must carry the validators the 200 would have carried
+            conditional["ETag"] = validators.etag
+            if last_modified is not None:
+                conditional["Last-Modified"] = http_date(last_modified)
+        return conditional
+
+    response = build_response()
+    if response.status_code == 200:
+        response["ETag"] = validators.etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+    return response
@@ -0,0 +1,250 @@
+"""
+Background migration export jobs.
+
+Exporting a very large account can outlast any request budget and would tie up one of the
+gunicorn request threads for the whole download. An export job renders the same migration
+bundle as GET .../migration/bundle/ (views.api.migration_bundle_members), but on a local worker
+pool into a zip file on disk, which the client downloads once the job completes.
+
+- enqueue_export_job(job) hands the job to the pool once the creating transaction commits.
+  The pool is an in-process ThreadPoolExecutor (settings.LOLA_EXPORT_WORKERS threads): no broker
+  is needed, but jobs live and die with the process that accepted them. With 0 workers jobs run
+  inline, which is what the tests use.
+- run_export_job(job_id) reads every collection inside one read_snapshot() transaction. That
+  transaction cannot record progress, so progress is published in the cache (get_export_progress)
+  while the job runs and persisted on the ExportJob row when it ends.
+- Files are written to settings.LOLA_EXPORT_DIR under a temporary name and renamed when complete.
+- Jobs have no request, so their ids are built from settings.BASE_URL.
+
+Lifecycle:
+- get_or_create_export_job(actor) returns the actor's pending or running job, or its complete job
+  whose file is still on this instance, before creating a new one, so repeated POSTs don't pile up
+  jobs and files.
+- A job still pending or running settings.LOLA_EXPORT_JOB_TIMEOUT seconds after it was created or
+  started lost its process (jobs live and die with it) and is marked failed (fail_stale_export_jobs).
+- Complete and failed jobs are deleted, with their files, settings.LOLA_EXPORT_TTL seconds after
+  they ended (purge_expired_export_jobs, run by the purge_expired_tokens command and its scheduler).
+  Files only exist on the instance that wrote them: a complete job whose file is missing here
+  answers 410 Gone (see views.api.migration_export_download).
+"""
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .json_ld_utils import REPRESENTATION_FULL
+from .models import ExportJob
+from .oauth.token_purge import PurgeResult
+from .streaming import iter_zip, read_snapshot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXPORT_WORKERS = 2
+DEFAULT_EXPORT_JOB_TIMEOUT = 60 * 60
+DEFAULT_EXPORT_TTL = 24 * 60 * 60
+
+# Progress is published to the cache every this many items
+PROGRESS_INTERVAL = 500
+PROGRESS_TIMEOUT = 24 * 60 * 60
+
+_executor = None
+_executor_lock = Lock()
+
+
+def get_export_dir():
+    """Directory export files are written to (settings.LOLA_EXPORT_DIR), created on demand."""
+    export_dir = str(settings.LOLA_EXPORT_DIR)
+    os.makedirs(export_dir, exist_ok=True)
+    return export_dir
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "LOLA_EXPORT_WORKERS", DEFAULT_EXPORT_WORKERS),
+                thread_name_prefix="lola-export",
+            )
+        return _executor
+
+
+def export_file_path(job):
+    return os.path.join(str(settings.LOLA_EXPORT_DIR), job.filename)
+
+
+def _remove_files(job):
+    # Only this instance's copy can be removed; another instance's files age out with it
+    for path in filter(None, {job.file_path, export_file_path(job), f"{export_file_path(job)}.part"}):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def fail_stale_export_jobs():
+    """Mark failed the jobs whose process stopped before they ended. Returns how many were failed."""
+    cutoff = timezone.now() - timedelta(
+        seconds=getattr(settings, "LOLA_EXPORT_JOB_TIMEOUT", DEFAULT_EXPORT_JOB_TIMEOUT)
+    )
+    stale = ExportJob.objects.filter(
+        Q(status=ExportJob.STATUS_PENDING, created_at__lt=cutoff)
+        | Q(status=ExportJob.STATUS_RUNNING, started_at__lt=cutoff)
+    )
+    failed = 0
+    for job in stale:
+        # Conditional on the status read above, so a job finishing meanwhile is left alone
+        if ExportJob.objects.filter(pk=job.pk, status=job.status).update(
+            status=ExportJob.STATUS_FAILED,
+            error="The export did not finish: the process running it stopped",
+            completed_at=timezone.now(),
+        ):
+            _remove_files(job)
+            failed += 1
+    if failed:
+        logger.warning("Marked %s stale export jobs failed", failed)
+    return failed
+
+
+def get_or_create_export_job(actor):
+    """
+    The actor's export job in progress, or its complete job whose file is on this instance,
+    else a new pending job.
+
+    Returns:
+        (job, created)
+    """
+    fail_stale_export_jobs()
+    jobs = ExportJob.objects.filter(actor=actor).order_by("-created_at", "-pk")
+    active = jobs.filter(status__in=(ExportJob.STATUS_PENDING, ExportJob.STATUS_RUNNING)).first()
+    if active is not None:
+        return active, False
+    complete = jobs.filter(status=ExportJob.STATUS_COMPLETE).first()
+    if complete is not None and os.path.exists(complete.file_path):
+        return complete, False
+    return ExportJob.objects.create(actor=actor), True
+
+
+def purge_expired_export_jobs(dry_run=False):
+    """
+    Delete the jobs that ended more than settings.LOLA_EXPORT_TTL seconds ago, and their files,
+    after failing stale jobs.
+
+    Returns:
+        A PurgeResult (see oauth/token_purge.py). A dry run counts the jobs without deleting anything.
+    """
+    started = time.monotonic()
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, "LOLA_EXPORT_TTL", DEFAULT_EXPORT_TTL))
+    expired = ExportJob.objects.filter(
+        status__in=(ExportJob.STATUS_COMPLETE, ExportJob.STATUS_FAILED), completed_at__lt=cutoff
+    )
+    if dry_run:
+        return PurgeResult("expired export jobs", expired.count(), 0, time.monotonic() - started)
+
+    fail_stale_export_jobs()
+    rows = 0
+    for job in expired:
+        _remove_files(job)
+        job.delete()
+        rows += 1
+    result = PurgeResult("expired export jobs", rows, 1 if rows else 0, time.monotonic() - started)
+    logger.info("Purged %s expired export jobs", rows)
+    return result
+
+
+def enqueue_export_job(job):
+    """Run `job` on the worker pool (or inline without workers) once the current transaction commits."""
+    if getattr(settings, "LOLA_EXPORT_WORKERS", DEFAULT_EXPORT_WORKERS) > 0:
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_worker, job.pk))
+    else:
+        transaction.on_commit(lambda: run_export_job(job.pk))
+
+
+def _run_in_worker(job_id):
+    # Worker threads get their own database connection; release it when the job is done
+    try:
+        run_export_job(job_id)
+    finally:
+        connection.close()
+
+
+def _progress_key(job_id):
+    return f"lola:export-progress:{job_id}"
+
+
+def get_export_progress(job):
+    """(items_written, total_items) of a job: live from the cache while it runs, else from the row."""
+    if job.status == ExportJob.STATUS_RUNNING:
+        progress = cache.get(_progress_key(job.pk))
+        if progress is not None:
+            return progress
+    return job.items_written, job.total_items
+
+
+def run_export_job(job_id):
+    """
+    Render the migration bundle of a pending job to disk and record the outcome on the job.
+
+    Failures are recorded on the job (status "failed" with the error) rather than raised.
+    """
+    # Imported here: the views import this module to enqueue jobs
+    from .views.api import migration_bundle_members, migration_bundle_total_items
+
+    updated = ExportJob.objects.filter(pk=job_id, status=ExportJob.STATUS_PENDING).update(
+        status=ExportJob.STATUS_RUNNING, started_at=timezone.now()
+    )
+    if not updated:
+        return
+    job = ExportJob.objects.select_related("actor").get(pk=job_id)
+
+    auth_context = {
+        "is_authenticated": True,
+        "has_portability_scope": True,
+        "request": None,
+        "actor_json_ld": {},
+        "representation": REPRESENTATION_FULL,
+        "compact": False,
+    }
+    path = partial_path = None
+    progress = {"written": 0, "total": None}
+
+    def on_item():
+        progress["written"] += 1
+        if progress["written"] % PROGRESS_INTERVAL == 0:
+            cache.set(_progress_key(job_id), (progress["written"], progress["total"]), PROGRESS_TIMEOUT)
+
+    try:
+        path = os.path.join(get_export_dir(), job.filename)
+        partial_path = f"{path}.part"
+        with read_snapshot():
+            progress["total"] = migration_bundle_total_items(job.actor, auth_context)
+            cache.set(_progress_key(job_id), (0, progress["total"]), PROGRESS_TIMEOUT)
+            with open(partial_path, "wb") as file:
+                for block in iter_zip(migration_bundle_members(None, job.actor, auth_context, on_item)):
+                    file.write(block)
+        os.replace(partial_path, path)
+    except Exception as e:
+        logger.exception("Export job %s failed", job_id)
+        if partial_path and os.path.exists(partial_path):
+            os.remove(partial_path)
+        job.status = ExportJob.STATUS_FAILED
+        job.error = str(e)
+    else:
+        job.status = ExportJob.STATUS_COMPLETE
+        job.file_path = path
+        job.file_size = os.path.getsize(path)
+        logger.info("Export job %s complete: %s items, %s bytes", job_id, progress["written"], job.file_size)
+
+    job.items_written = progress["written"]
+    job.total_items = progress["total"]
+    job.completed_at = timezone.now()
+    job.save()
+    cache.delete(_progress_key(job_id))
@@ -1,5 +1,6 @@
 import factory
 from factory.django import DjangoModelFactory
+from django.conf import settings
 from django.contrib.auth.models import User
 from datetime import datetime, timezone, timedelta
 from oauth2_provider.models import Application, AccessToken
@@ -253,6 +254,7 @@ class TokenActorBindingFactory(DjangoModelFactory):
 
     class Meta:
         model = TokenActorBinding
+        skip_postgeneration_save = True
 
     token = factory.SubFactory(AccessTokenFactory, lola_scope=True)
 
@@ -263,3 +265,10 @@ class TokenActorBindingFactory(DjangoModelFactory):
     actor = factory.LazyAttribute(
         lambda o: o.token.user.actors.get(role=Actor.ROLE_SOURCE)
     )
+
+    @factory.post_generation
+    def signed_token(self, create, extracted, **kwargs):
+        # Mirror ActivityPubOAuth2Validator, which re-issues bound tokens in the signed format
+        if create and settings.LOLA_SIGNED_ACCESS_TOKENS:
+            from testbed.core.oauth.signed_tokens import issue_signed_token
+            issue_signed_token(self.token, self)
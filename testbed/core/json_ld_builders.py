@@ -1,11 +1,92 @@
-from .json_ld_utils import (build_basic_context,
+from urllib.parse import urlencode
+
+from .changes import SINCE_PARAM
+from .json_ld_cache import actor_json_ld_key, cache_actor_json_ld, get_cached_actor_json_ld
+from .json_ld_utils import (REPRESENTATION_FULL,
+                            REPRESENTATION_IRI,
+                            build_basic_context,
                             build_actor_context,
-                            build_actor_id,
-                            build_activity_id,
-                            build_note_id,
-                            build_outbox_id)
-from .oauth.utils import build_oauth_endpoint_url
-from .models import CreateActivity, LikeActivity, FollowActivity
+                            get_id_factory)
+from .models import CreateActivity, LikeActivity, FollowActivity, OutboxEntry
+from .pagination import (FIRST_PAGE,
+                         build_page_links,
+                         encode_cursor,
+                         encode_key,
+                         get_page_size,
+                         page_url)
+from .streaming import get_export_chunk_size
+
+def _id_factory(auth_context):
+    # Ids are built from the request when there is one; the factory is memoized per request
+    return get_id_factory(auth_context.get('request') if auth_context else None)
+
+
+def _is_compact(auth_context):
+    # Compact rendering: only the top-level document carries @context
+    return bool(auth_context and auth_context.get('compact'))
+
+
+def _context_entry(auth_context, context):
+    # The @context entry of an object that may be embedded: omitted in compact mode
+    return {} if _is_compact(auth_context) else {"@context": context}
+
+
+def build_document_context(auth_context=None):
+    """
+    @context of a top-level collection or page.
+
+    In compact mode embedded objects drop their own @context, so the top-level context must
+    define every term they use: the extended actor context (LOLA, blocked) is used instead.
+    """
+    return build_actor_context() if _is_compact(auth_context) else build_basic_context()
+
+
+def _rendering_params(auth_context):
+    # Non-default rendering options, carried on page links so every page is rendered like the
+    # first (links point at the canonical collection URL, not e.g. a migration route)
+    params = {}
+    if _representation(auth_context) != REPRESENTATION_FULL:
+        params["representation"] = _representation(auth_context)
+    if _is_compact(auth_context):
+        params["compact"] = "true"
+    return params
+
+
+def _snapshot(auth_context):
+    # Migration snapshot bounding the collection reads of a portability token (see snapshots.py)
+    return auth_context.get('snapshot') if auth_context else None
+
+
+def _embedded_remote_object(data, object_url, auth_context):
+    # Stored remote data may carry its own @context; compact mode drops it with ours
+    if _is_compact(auth_context):
+        data = {key: value for key, value in (data or {}).items() if key != "@context"}
+    return {
+        **_context_entry(auth_context, build_basic_context()),
+        **(data or {}),
+        "id": object_url,
+    }
+
+
+def _representation(auth_context):
+    # How embedded actors are rendered: full documents unless the request asked for references
+    return auth_context.get('representation', REPRESENTATION_FULL) if auth_context else REPRESENTATION_FULL
+
+
+def build_actor_reference(actor_iri, preferred_username=None, auth_context=None, actor_type="Person"):
+    """
+    Build a reference to an actor for the stub / IRI representations.
+
+    Returns the bare IRI (REPRESENTATION_IRI) or a minimal {id, type, preferredUsername} stub.
+    Takes plain values so callers can feed it from a values() projection without loading Actors.
+    """
+    if _representation(auth_context) == REPRESENTATION_IRI:
+        return actor_iri
+    stub = {"id": actor_iri, "type": actor_type}
+    if preferred_username:
+        stub["preferredUsername"] = preferred_username
+    return stub
+
 
 # Build JSON-LD Actor with LOLA compliance.
 def build_actor_json_ld(actor, auth_context=None):
@@ -25,20 +106,50 @@ def build_actor_json_ld(actor, auth_context=None):
             - is_authenticated: boolean
             - has_portability_scope: boolean  
             - request: HTTP request object
+            - actor_json_ld: optional request-scoped memo (actor id -> rendered Actor)
+            - compact: optional, omit @context (the actor is embedded in a compact document)
     
     Returns:
         Dict containing ActivityPub Actor with conditional LOLA fields
+
+    The result is memoized for the request when the context carries `actor_json_ld`, and cached
+    across requests per (actor, portability scope, base URL), see json_ld_cache.
+    Callers must treat the returned dict as read-only, since it may be shared.
     """
 
-    # Extract request for dynamic URL generation
-    request = auth_context.get('request') if auth_context else None
-    
+    # The memo lives in the auth context, so the scope and base URL are fixed for its lifetime
+    memo = auth_context.get('actor_json_ld') if auth_context else None
+    if memo is not None and actor.id in memo:
+        return memo[actor.id]
+
+    # Per-request id factory for dynamic URL generation
+    ids = _id_factory(auth_context)
+    has_portability_scope = bool(auth_context and auth_context.get('has_portability_scope'))
+
+    cache_key = actor_json_ld_key(actor.id, has_portability_scope, ids.base_url)
+    actor_data = get_cached_actor_json_ld(cache_key)
+    if actor_data is None:
+        actor_data = _render_actor_json_ld(actor, ids, has_portability_scope)
+        cache_actor_json_ld(cache_key, actor_data)
+
+    if _is_compact(auth_context):
+        # Embedded actor: the enclosing document's context covers it
+        actor_data = {key: value for key, value in actor_data.items() if key != "@context"}
+
+    if memo is not None:
+        memo[actor.id] = actor_data
+    return actor_data
+
+
+def _render_actor_json_ld(actor, ids, has_portability_scope):
+    # Render the Actor document itself; build_actor_json_ld adds the memo and cache around it
+
     # Build actor URL
-    actor_id = build_actor_id(actor.id, request)
+    actor_id = ids.actor(actor.id)
     
     # The migration OAuth endpoint and the general OAuth authorization endpoint are the same URL,
-    # so both `endpoints.*` fields resolve to it. Computed once and reused.
-    oauth_authorize_url = build_oauth_endpoint_url(request)
+    # so both `endpoints.*` fields resolve to it.
+    oauth_authorize_url = ids.oauth_authorize_url
 
     # Base ActivityPub Actor (always included)
     actor_data = {
@@ -56,7 +167,7 @@ def build_actor_json_ld(actor, auth_context=None):
     }
 
     # Privacy-sensitive fields ONLY with portability scope
-    if auth_context and auth_context.get('has_portability_scope'):
+    if has_portability_scope:
         actor_data["outbox"] = f"{actor_id}/outbox"
         actor_data["following"] = f"{actor_id}/following"
         actor_data["followers"] = f"{actor_id}/followers"
@@ -75,13 +186,13 @@ def build_actor_json_ld(actor, auth_context=None):
 
 def build_note_json_ld(note, auth_context=None):
     """Build Note JSON-LD with dynamic URL generation"""
-    request = auth_context.get('request') if auth_context else None
+    ids = _id_factory(auth_context)
     
     return {
-        "@context": build_basic_context(),
+        **_context_entry(auth_context, build_basic_context()),
         "type": "Note",
-        "id": build_note_id(note.id, request),
-        "actor": build_actor_id(note.actor.id, request),
+        "id": ids.note(note.id),
+        "actor": ids.actor(note.actor_id),
         "content": note.content,
         "published": note.published.isoformat(),
         "visibility": note.visibility,
@@ -90,13 +201,13 @@ def build_note_json_ld(note, auth_context=None):
 
 def build_create_activity_json_ld(activity, auth_context=None):
     # Build Create Activity JSON-LD with dynamic URL generation
-    request = auth_context.get('request') if auth_context else None
+    ids = _id_factory(auth_context)
     
     json_ld = {
-        "@context": build_basic_context(),
+        **_context_entry(auth_context, build_basic_context()),
         "type": "Create",
-        "id": build_activity_id(activity.id, request),
-        "actor": build_actor_id(activity.actor.id, request),
+        "id": ids.activity(activity.id),
+        "actor": ids.actor(activity.actor_id),
         "published": activity.timestamp.isoformat(),
         "visibility": activity.visibility,
     }
@@ -111,13 +222,13 @@ def build_create_activity_json_ld(activity, auth_context=None):
 
 def build_like_activity_json_ld(activity, auth_context=None):
     # Build Like Activity JSON-LD with dynamic URL generation
-    request = auth_context.get('request') if auth_context else None
+    ids = _id_factory(auth_context)
     
     base = {
-        "@context": build_basic_context(),
+        **_context_entry(auth_context, build_basic_context()),
         "type": "Like",
-        "id": build_activity_id(activity.id, request),
-        "actor": build_actor_id(activity.actor.id, request),
+        "id": ids.activity(activity.id),
+        "actor": ids.actor(activity.actor_id),
         "published": activity.timestamp.isoformat(),
         "visibility": activity.visibility,
     }
@@ -127,89 +238,395 @@ def build_like_activity_json_ld(activity, auth_context=None):
         base["object"] = build_note_json_ld(activity.note, auth_context)
     else:
         # For remote objects, use the stored data
-        base["object"] = {
-            "@context": build_basic_context(),
-            **activity.object_data,
-            "id": activity.object_url,
-        }
+        base["object"] = _embedded_remote_object(activity.object_data, activity.object_url, auth_context)
 
     return base
 
 
 def build_follow_activity_json_ld(activity, auth_context=None):
     # Build Follow Activity JSON-LD with dynamic URL generation
-    request = auth_context.get('request') if auth_context else None
+    ids = _id_factory(auth_context)
     
     base = {
-        "@context": build_basic_context(),
+        **_context_entry(auth_context, build_basic_context()),
         "type": "Follow",
-        "id": build_activity_id(activity.id, request),
-        "actor": build_actor_id(activity.actor.id, request),
+        "id": ids.activity(activity.id),
+        "actor": ids.actor(activity.actor_id),
         "published": activity.timestamp.isoformat(),
         "visibility": activity.visibility,
     }
 
-    if activity.target_actor:
+    if _representation(auth_context) != REPRESENTATION_FULL:
+        base["object"] = _build_follow_target_reference(activity, ids, auth_context)
+    elif activity.target_actor_id:
         base["object"] = build_actor_json_ld(activity.target_actor, auth_context)
     else:
-        base["object"] = {
-            "@context": build_basic_context(),
-            **activity.target_actor_data,
-            "id": activity.target_actor_url
-        }
+        base["object"] = _embedded_remote_object(
+            activity.target_actor_data, activity.target_actor_url, auth_context
+        )
 
     return base
 
 
-def build_outbox_json_ld(outbox, auth_context=None):
+def _build_follow_target_reference(activity, ids, auth_context):
+    # Outbox pages project the target's username (target_actor_username) rather than loading the Actor
+    if activity.target_actor_id:
+        username = getattr(activity, "target_actor_username", None)
+        if username is None:
+            username = activity.target_actor.username
+        return build_actor_reference(ids.actor(activity.target_actor_id), username, auth_context)
+
+    remote_data = activity.target_actor_data or {}
+    return build_actor_reference(
+        activity.target_actor_url,
+        remote_data.get("preferredUsername"),
+        auth_context,
+        remote_data.get("type", "Person"),
+    )
+
+
+def build_liked_object_json_ld(like, auth_context=None):
     """
-    Build outbox JSON-LD with authentication-based content filtering.
-    
+    Build the liked-collection item for a LikeActivity: the liked object with the migration
+    metadata required by LOLA, projected to a small payload.
+    """
+    ids = _id_factory(auth_context)
+
+    if like.note:
+        # Local Note object - extract required metadata
+        return {
+            "id": ids.note(like.note.id),
+            "type": "Note",
+            "attributedTo": ids.actor(like.note.actor_id),
+            "published": like.note.published.isoformat(),
+            "summary": getattr(like.note, "summary", ""),
+            "content": like.note.content[:280]
+            if len(like.note.content) > 280
+            else like.note.content,  # Small content only
+            "inReplyTo": None,  # TODO: Add reply chain support when implemented
+            "audience": {"public": like.note.visibility == "public"},
+            "attachment": [],  # TODO: Add when attachment support is implemented
+            "canonicalUrl": ids.note(like.note.id),
+            # Optional objectHash for integrity verification
+            "objectHash": None,  # TODO: Implement content hashing if needed
+        }
+
+    # Remote object - use cached object_data with field projection
+    remote_data = like.object_data or {}
+    return {
+        "id": like.object_url,
+        "type": remote_data.get("type", "Object"),
+        "attributedTo": remote_data.get("attributedTo", ""),
+        "published": remote_data.get("published", like.timestamp.isoformat()),
+        "summary": remote_data.get("summary", ""),
+        "content": remote_data.get("content", "")[:280]
+        if remote_data.get("content")
+        else "",  # Small content only
+        "inReplyTo": remote_data.get("inReplyTo"),
+        "audience": {
+            "public": True
+        },  # Assume remote objects in likes are public
+        "attachment": remote_data.get("attachment", [])[:3]
+        if remote_data.get("attachment")
+        else [],  # Limit attachments
+        "canonicalUrl": like.object_url,
+        "objectHash": remote_data.get("objectHash"),
+    }
+
+
+def build_activity_json_ld(activity, auth_context=None):
+    # Dispatch to the builder for the activity's concrete type
+    if isinstance(activity, CreateActivity):
+        return build_create_activity_json_ld(activity, auth_context)
+    elif isinstance(activity, LikeActivity):
+        return build_like_activity_json_ld(activity, auth_context)
+    elif isinstance(activity, FollowActivity):
+        return build_follow_activity_json_ld(activity, auth_context)
+
+
+def build_outbox_json_ld(outbox, auth_context=None, activity_types=None, since=None):
+    """
+    Build the outbox OrderedCollection with authentication-based content filtering.
+
+    The collection itself carries only `totalItems` and a link to the `first` page;
+    items are served by build_outbox_page_json_ld so no request materializes the whole outbox.
+
     Args:
         outbox: The PortabilityOutbox model instance
         auth_context: Optional authentication context dict with keys:
             - is_authenticated: boolean
             - has_portability_scope: boolean  
             - request: HTTP request object
+        activity_types: Optional list of activity type names (e.g. ["Create"]) to restrict the outbox to
+        since: Optional datetime; only activities after it are included (see changes.py)
     
     Returns:
-        Dict containing ActivityPub OrderedCollection with filtered activities
+        Dict containing ActivityPub OrderedCollection with filtered activity count
     """
-    create_activities = list(outbox.activities_create.all())
-    like_activities = list(outbox.activities_like.all())
-    follow_activities = list(outbox.activities_follow.all())
-
-    all_activities = create_activities + like_activities + follow_activities
-    
-    # Filter content based on authentication and scope
-    if not auth_context or not auth_context.get('has_portability_scope'):
-        # Public only for unauthenticated requests or requests without portability scope
-        all_activities = [activity for activity in all_activities if activity.visibility == 'public']
+    # Public only for unauthenticated requests or requests without portability scope.
     # LOLA authenticated requests with portability scope get ALL activities (public + private)
-    
-    all_activities.sort(key=lambda x: x.timestamp, reverse=True)
+    public_only = not (auth_context and auth_context.get('has_portability_scope'))
 
-    # Extract request for dynamic URL generation
-    request = auth_context.get('request') if auth_context else None
-    
-    def build_activity_json_ld(activity):
-        if isinstance(activity, CreateActivity):
-            return build_create_activity_json_ld(activity, auth_context)
-        elif isinstance(activity, LikeActivity):
-            return build_like_activity_json_ld(activity, auth_context)
-        elif isinstance(activity, FollowActivity):
-            return build_follow_activity_json_ld(activity, auth_context)
+    return build_ordered_collection_json_ld(
+        _id_factory(auth_context).outbox(outbox.actor_id),
+        outbox.activity_count(
+            public_only=public_only, activity_types=activity_types, snapshot=_snapshot(auth_context), since=since
+        ),
+        auth_context,
+        params=_outbox_params(activity_types, since),
+    )
+
+
+def build_outbox_page_json_ld(outbox, auth_context=None, cursor=None, page_size=None, activity_types=None,
+                              since=None):
+    """
+    Build one OrderedCollectionPage of the outbox, newest activities first.
+
+    Args:
+        outbox: The PortabilityOutbox model instance
+        auth_context: Optional authentication context dict (see build_outbox_json_ld)
+        cursor: pagination.Cursor decoded from the `page` parameter, or None for the first page
+        page_size: Optional page size override (defaults to settings.LOLA_COLLECTION_PAGE_SIZE)
+        activity_types: Optional list of activity type names to restrict the page to
+        since: Optional datetime; only activities after it are included
+
+    Returns:
+        Dict containing ActivityPub OrderedCollectionPage with `next`/`prev` links
+    """
+    public_only = not (auth_context and auth_context.get('has_portability_scope'))
+
+    entries, activities, has_more = outbox.activity_page(
+        public_only=public_only,
+        cursor=cursor,
+        limit=page_size or get_page_size(),
+        activity_types=activity_types,
+        actor_references=_representation(auth_context) != REPRESENTATION_FULL,
+        snapshot=_snapshot(auth_context),
+        since=since,
+    )
+
+    def entry_key(entry):
+        return encode_key([getattr(entry, field) for field in OutboxEntry.ORDERING_KEY])
+
+    return build_collection_page_json_ld(
+        _id_factory(auth_context).outbox(outbox.actor_id),
+        [build_activity_json_ld(activity, auth_context) for activity in activities],
+        cursor=cursor,
+        first_key=entry_key(entries[0]) if entries else None,
+        last_key=entry_key(entries[-1]) if entries else None,
+        has_more=has_more,
+        auth_context=auth_context,
+        params=_outbox_params(activity_types, since),
+    )
+
+
+def build_outbox_export_json_ld(outbox, auth_context=None, activity_types=None, since=None):
+    """
+    Build the whole outbox as one OrderedCollection for a streamed full export (`?export=full`).
+
+    `orderedItems` is a generator (see iter_outbox_activities_json_ld) consumed while the
+    document is encoded (see streaming.iter_json), so it must be consumed within the request.
 
+    Args:
+        outbox: The PortabilityOutbox model instance
+        auth_context: Optional authentication context dict (see build_outbox_json_ld)
+        activity_types: Optional list of activity type names to restrict the export to
+        since: Optional datetime; only activities after it are included
+
+    Returns:
+        Dict containing ActivityPub OrderedCollection with lazy `orderedItems`
+    """
+    public_only = not (auth_context and auth_context.get('has_portability_scope'))
+
+    return build_collection_export_json_ld(
+        _id_factory(auth_context).outbox(outbox.actor_id),
+        outbox.activity_count(
+            public_only=public_only, activity_types=activity_types, snapshot=_snapshot(auth_context), since=since
+        ),
+        iter_outbox_activities_json_ld(outbox, auth_context, activity_types, since),
+        auth_context,
+        params=_outbox_params(activity_types, since),
+    )
+
+
+def iter_outbox_activities_json_ld(outbox, auth_context=None, activity_types=None, since=None):
+    """
+    Render every outbox activity visible to the caller, newest first, reading and rendering
+    settings.LOLA_EXPORT_CHUNK_SIZE activities at a time. Used by the full export and NDJSON.
+
+    Args:
+        outbox: The PortabilityOutbox model instance
+        auth_context: Optional authentication context dict (see build_outbox_json_ld)
+        activity_types: Optional list of activity type names to restrict the activities to
+        since: Optional datetime; only activities after it are included
+
+    Yields:
+        Activity JSON-LD dicts
+    """
+    public_only = not (auth_context and auth_context.get('has_portability_scope'))
+    chunks = outbox.iter_activity_chunks(
+        public_only=public_only,
+        activity_types=activity_types,
+        actor_references=_representation(auth_context) != REPRESENTATION_FULL,
+        chunk_size=get_export_chunk_size(),
+        snapshot=_snapshot(auth_context),
+        since=since,
+    )
+    for activities in chunks:
+        for activity in activities:
+            yield build_activity_json_ld(activity, auth_context)
+        # Keep the actor memo bounded by the chunk, not the outbox
+        if auth_context is not None:
+            auth_context.get('actor_json_ld', {}).clear()
+
+
+def _outbox_params(activity_types, since=None):
+    # Query parameters that shape the outbox and must be carried on its links
+    params = {"type": ",".join(activity_types)} if activity_types else {}
+    params.update(since_params(since))
+    return params
+
+
+def since_params(since):
+    """The `since` query parameter of an incremental read (see changes.py), as carried on its links."""
+    return {SINCE_PARAM: since.isoformat()} if since else {}
+
+
+def _collection_id(collection_id, params):
+    # A filtered collection (e.g. ?type=Create on the outbox) is its own collection, identified by its filter
+    return f"{collection_id}/?{urlencode(params)}" if params else collection_id
+
+
+def build_ordered_collection_json_ld(collection_id, total_items, auth_context=None, params=None):
+    """
+    Build a paginated ActivityPub OrderedCollection: `totalItems` plus a link to the `first` page.
+
+    Args:
+        collection_id: The full URL/ID for the collection
+        total_items: Item count (from a separate COUNT query, never from materializing items)
+        auth_context: Optional authentication context dict; selects compact rendering and the
+            rendering options carried on page links
+        params: Optional query parameters that shape the collection (e.g. a type filter)
+
+    Returns:
+        Dict containing ActivityPub OrderedCollection
+    """
+    params = params or {}
     return {
-        "@context": build_basic_context(),
+        "@context": build_document_context(auth_context),
         "type": "OrderedCollection",
-        "id": build_outbox_id(outbox.actor.id, request),
-        "totalItems": len(all_activities),
-        "items": [build_activity_json_ld(activity) for activity in all_activities],
+        "id": _collection_id(collection_id, params),
+        "totalItems": total_items,
+        "first": page_url(collection_id, params={**params, **_rendering_params(auth_context)}),
     }
 
 
-def build_collection_json_ld(collection_id, items, total_items=None):
+def build_collection_page_json_ld(collection_id, items, cursor, first_key, last_key, has_more,
+                                  auth_context=None, params=None):
+    """
+    Build one OrderedCollectionPage of a keyset-paginated collection.
+
+    Args:
+        collection_id: The full URL/ID of the parent collection
+        items: The page's rendered items, in display order
+        cursor: pagination.Cursor the page was requested with (None for the first page)
+        first_key / last_key / has_more: see pagination.build_page_links
+        auth_context: Optional authentication context dict (see build_ordered_collection_json_ld)
+        params: Optional query parameters that shape the collection
+
+    Returns:
+        Dict containing ActivityPub OrderedCollectionPage with `next`/`prev` links
+    """
+    params = params or {}
+    link_params = {**params, **_rendering_params(auth_context)}
+    page = {
+        "@context": build_document_context(auth_context),
+        "type": "OrderedCollectionPage",
+        "id": page_url(collection_id, encode_cursor(*cursor) if cursor else FIRST_PAGE, link_params),
+        "partOf": _collection_id(collection_id, params),
+        "orderedItems": items,
+    }
+    page.update(build_page_links(
+        collection_id,
+        first_key=first_key,
+        last_key=last_key,
+        cursor=cursor,
+        has_more=has_more,
+        params=link_params,
+    ))
+    return page
+
+
+def build_collection_export_json_ld(collection_id, total_items, items, auth_context=None, params=None):
+    """
+    Build a complete OrderedCollection whose `orderedItems` may be a lazy iterator, for a
+    streamed full export (see streaming.streaming_json_ld_response).
+
+    Args:
+        collection_id: The full URL/ID for the collection
+        total_items: Item count (from a separate COUNT query)
+        items: Iterable of rendered items, in display order; generators are streamed
+        auth_context: Optional authentication context dict; selects compact rendering
+        params: Optional query parameters that shape the collection (e.g. a type filter)
+
+    Returns:
+        Dict containing ActivityPub OrderedCollection
+    """
+    return {
+        "@context": build_document_context(auth_context),
+        "type": "OrderedCollection",
+        "id": _collection_id(collection_id, params or {}),
+        "totalItems": total_items,
+        "orderedItems": items,
+    }
+
+
+def build_change_json_ld(change_type, item, target, changed_at):
+    """
+    One entry of the changes feed (see changes.py): an `Add` of `item` to the collection
+    `target`, or a `Remove` of it, at `changed_at`.
+    """
+    return {
+        "type": change_type,
+        "object": item,
+        "target": target,
+        "published": changed_at.isoformat(),
+    }
+
+
+def build_changes_page_json_ld(feed_id, items, page_token, next_token, auth_context=None, params=None):
+    """
+    Build one OrderedCollectionPage of the changes feed, oldest change first.
+
+    The feed is read forwards only, so a page links to the `next` page while more changes follow
+    and has no `prev` link.
+
+    Args:
+        feed_id: The full URL/ID of the changes feed
+        items: The page's change entries (see build_change_json_ld), in feed order
+        page_token: the `page` value this page was requested with
+        next_token: cursor token of the following page, or None on the last page
+        auth_context: Optional authentication context dict (see build_ordered_collection_json_ld)
+        params: Optional query parameters that shape the feed (e.g. `since`)
+
+    Returns:
+        Dict containing ActivityPub OrderedCollectionPage
+    """
+    params = params or {}
+    link_params = {**params, **_rendering_params(auth_context)}
+    page = {
+        "@context": build_document_context(auth_context),
+        "type": "OrderedCollectionPage",
+        "id": page_url(feed_id, page_token, link_params),
+        "partOf": _collection_id(feed_id, params),
+        "orderedItems": items,
+    }
+    if next_token is not None:
+        page["next"] = page_url(feed_id, next_token, link_params)
+    return page
+
+
+def build_collection_json_ld(collection_id, items, total_items=None, auth_context=None):
     """
     Build ActivityPub OrderedCollection JSON-LD.
     
@@ -217,12 +634,13 @@ def build_collection_json_ld(collection_id, items, total_items=None):
         collection_id: The full URL/ID for the collection
         items: List of collection items (actors, activities, etc.)
         total_items: Optional total count override (defaults to len(items))
+        auth_context: Optional authentication context; selects the compact top-level context
     
     Returns:
         Dict containing ActivityPub OrderedCollection
     """
     return {
-        "@context": "https://www.w3.org/ns/activitystreams",
+        "@context": build_document_context(auth_context),
         "type": "OrderedCollection",
         "id": collection_id,
         "totalItems": total_items if total_items is not None else len(items),
@@ -244,8 +662,14 @@ def build_relationship_items(relationships, local_actor_field, remote_url_field,
         auth_context: Authentication context for JSON-LD building
     
     Returns:
-        List of actor JSON-LD objects ready for collection
+        List of actor JSON-LD objects ready for collection (actor references in the stub / IRI
+        representations)
     """
+    if _representation(auth_context) != REPRESENTATION_FULL:
+        return _build_relationship_references(
+            relationships, local_actor_field, remote_url_field, remote_data_field, auth_context
+        )
+
     items = []
     for relationship in relationships:
         # Try to get local actor using dynamic field access
@@ -260,7 +684,37 @@ def build_relationship_items(relationships, local_actor_field, remote_url_field,
             remote_data = getattr(relationship, remote_data_field, None)
             
             actor_data = remote_data.copy() if remote_data else {}
+            if _is_compact(auth_context):
+                # As for other embedded remote objects (_embedded_remote_object)
+                actor_data.pop('@context', None)
             actor_data['id'] = remote_url
             items.append(actor_data)
     
     return items
+
+
+def _build_relationship_references(relationships, local_actor_field, remote_url_field, remote_data_field, auth_context):
+    # values() projection: only the columns a reference needs, no Actor instances
+    ids = _id_factory(auth_context)
+    with_stub_fields = _representation(auth_context) != REPRESENTATION_IRI
+    fields = [f"{local_actor_field}_id", remote_url_field]
+    if with_stub_fields:
+        fields += [f"{local_actor_field}__username", remote_data_field]
+
+    items = []
+    for row in relationships.values(*fields):
+        if row[f"{local_actor_field}_id"]:
+            items.append(build_actor_reference(
+                ids.actor(row[f"{local_actor_field}_id"]),
+                row.get(f"{local_actor_field}__username"),
+                auth_context,
+            ))
+        else:
+            remote_data = row.get(remote_data_field) or {}
+            items.append(build_actor_reference(
+                row[remote_url_field],
+                remote_data.get("preferredUsername"),
+                auth_context,
+                remote_data.get("type", "Person"),
+            ))
+    return items
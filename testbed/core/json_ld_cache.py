@@ -0,0 +1,50 @@
+"""
+Cross-request cache of rendered Actor JSON-LD.
+
+An Actor document depends only on the actor row, whether the caller holds a portability-scoped
+token (which adds the LOLA discovery fields) and the base URL its ids are built from. Each variant
+is stored under its own key in Django's cache framework, tagged with the actor's generation (see
+response_cache.py): `lola:actor-json-ld:<id>:<generation>:<variant digest>`. Storing a variant
+never reads or rewrites another one, and the key is taken before rendering, so a render that
+races with an invalidation is stored under the old generation and never read.
+
+Invalidation is a generation bump, one cache operation whatever the number of hosts or scopes the
+actor was rendered for: the Actor post_save and post_delete signals bump it (see signals.py), and
+entries of old generations age out after settings.LOLA_ACTOR_CACHE_TIMEOUT seconds. Bulk
+QuerySet.update() calls bypass the signals and must call invalidate_actor_json_ld.
+
+The generation is only shared by the processes sharing the cache: see response_cache.py for why
+multi-instance deployments need a shared CACHE_URL.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .response_cache import bump_actor_generation, get_actor_generation
+
+DEFAULT_ACTOR_CACHE_TIMEOUT = 300
+
+
+def actor_json_ld_key(actor_id, has_portability_scope, base_url):
+    """Cache key of one variant of an actor's document at its current generation."""
+    # Hashed: base URLs may hold characters some cache backends reject in keys
+    variant = hashlib.sha256(f"{int(bool(has_portability_scope))}|{base_url}".encode("utf-8")).hexdigest()
+    return f"lola:actor-json-ld:{actor_id}:{get_actor_generation(actor_id)}:{variant}"
+
+
+def get_cached_actor_json_ld(key):
+    """Return the cached Actor document under `key` (see actor_json_ld_key), or None on a miss."""
+    return cache.get(key)
+
+
+def cache_actor_json_ld(key, data):
+    """Store a rendered Actor document under `key`, taken before rendering it."""
+    timeout = getattr(settings, "LOLA_ACTOR_CACHE_TIMEOUT", DEFAULT_ACTOR_CACHE_TIMEOUT)
+    cache.set(key, data, timeout)
+
+
+def invalidate_actor_json_ld(actor_id):
+    """Make every cached rendering of an actor unreachable."""
+    bump_actor_generation(actor_id)
@@ -1,7 +1,18 @@
+from functools import lru_cache
+
+from django.conf import settings
+
 ACTIVITY_STREAM_CONTEXT = "https://www.w3.org/ns/activitystreams"
 LOLA_CONTEXT = "https://swicg.github.io/activitypub-data-portability/lola"
 BLOCKED_CONTEXT = "https://purl.archive.org/socialweb/blocked"
 
+# How embedded actors (collection items, Follow objects) are rendered, selected per request
+# by the actor_representation view decorator
+REPRESENTATION_FULL = "full"  # complete Actor document
+REPRESENTATION_STUB = "stub"  # {id, type, preferredUsername}
+REPRESENTATION_IRI = "iri"    # bare actor IRI
+REPRESENTATIONS = (REPRESENTATION_FULL, REPRESENTATION_STUB, REPRESENTATION_IRI)
+
 # Basic context used in most responses
 def build_basic_context():
     return ACTIVITY_STREAM_CONTEXT
@@ -15,27 +26,86 @@ def build_actor_context():
         LOLA_CONTEXT
     ]
 
+class IdFactory:
+    """
+    Builds object ids (URLs) from a base URL computed once.
+
+    Reading `request.scheme` / `request.get_host()` runs ALLOWED_HOSTS validation, so doing it
+    for every id of every nested object is what made large collections slow to render.
+    Obtain a factory with get_id_factory(request) and reuse it for the whole response.
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.api_url = f"{self.base_url}/api"
+        self.oauth_authorize_url = f"{self.base_url}/oauth/authorize/"
+
+    def id_url(self, type_name, obj_id):
+        return f"{self.api_url}/{type_name}/{obj_id}"
+
+    def actor(self, actor_id):
+        return f"{self.api_url}/actors/{actor_id}"
+
+    def activity(self, activity_id):
+        return f"{self.api_url}/activities/{activity_id}"
+
+    def note(self, note_id):
+        return f"{self.api_url}/notes/{note_id}"
+
+    def actor_collection(self, actor_id, name):
+        # e.g. actor_collection(1, "following") -> .../api/actors/1/following
+        return f"{self.api_url}/actors/{actor_id}/{name}"
+
+    def outbox(self, actor_id):
+        return self.actor_collection(actor_id, "outbox")
+
+
+@lru_cache(maxsize=8)
+def _base_url_id_factory(base_url):
+    # One factory per process (per configured BASE_URL)
+    return IdFactory(base_url)
+
+
+def get_id_factory(request=None):
+    """
+    Return the IdFactory for a request.
+
+    - With settings.LOLA_IDS_FROM_BASE_URL, ids are built from settings.BASE_URL and the
+      factory is shared by the whole process.
+    - Otherwise ids follow the request's scheme and host (so they work in development,
+      production and any deployment environment); the factory is built on first use and
+      memoized on the request, so the host is validated once per request.
+    - Without a request (background tasks, tests) settings.BASE_URL is used.
+    """
+    if request is None or getattr(settings, "LOLA_IDS_FROM_BASE_URL", False):
+        return _base_url_id_factory(settings.BASE_URL)
+
+    # Memoize on the underlying HttpRequest so DRF's Request wrapper and the plain
+    # Django request share one factory.
+    http_request = getattr(request, "_request", request)
+    factory = getattr(http_request, "_lola_id_factory", None)
+    if factory is None:
+        factory = IdFactory(f"{request.scheme}://{request.get_host()}")
+        http_request._lola_id_factory = factory
+    return factory
+
+
 def build_id_url(type_name, obj_id, request):
     """
     Build dynamic URLs based on the current request.
     This ensures URLs work in development, production, and any deployment environment.
     """
-    base_url = f"{request.scheme}://{request.get_host()}"
-    return f"{base_url}/api/{type_name}/{obj_id}"
+    return get_id_factory(request).id_url(type_name, obj_id)
 
 def build_actor_id(actor_id, request):
-    base_url = f"{request.scheme}://{request.get_host()}"
-    return f"{base_url}/api/actors/{actor_id}"
+    return get_id_factory(request).actor(actor_id)
 
 def build_activity_id(activity_id, request):
-    base_url = f"{request.scheme}://{request.get_host()}"
-    return f"{base_url}/api/activities/{activity_id}"
+    return get_id_factory(request).activity(activity_id)
 
 def build_note_id(note_id, request):
-    base_url = f"{request.scheme}://{request.get_host()}"
-    return f"{base_url}/api/notes/{note_id}"
+    return get_id_factory(request).note(note_id)
 
 def build_outbox_id(actor_id, request):
     # Build outbox URL with dynamic base URL.
-    base_url = f"{request.scheme}://{request.get_host()}"
-    return f"{base_url}/api/actors/{actor_id}/outbox"
+    return get_id_factory(request).outbox(actor_id)
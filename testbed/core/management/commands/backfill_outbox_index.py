@@ -0,0 +1,94 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from testbed.core.models import OutboxEntry, PortabilityOutbox
+
+
+class Command(BaseCommand):
+    help = "Backfill the OutboxEntry index from the PortabilityOutbox activity tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of index rows written per INSERT (default: 1000)",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help=(
+                "Delete index rows whose activity left the outbox and refresh the timestamp and "
+                "visibility of the others. Kept rows keep their ids, which migration snapshots bound"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        self.rebuild = options["rebuild"]
+
+        if self.rebuild:
+            deleted = 0
+            for activity_type, field_name, model in PortabilityOutbox.ACTIVITY_SOURCES:
+                through = getattr(PortabilityOutbox, field_name).through
+                in_outbox = through.objects.filter(
+                    portabilityoutbox_id=OuterRef("outbox_id"),
+                    **{f"{model._meta.model_name}_id": OuterRef("activity_id")},
+                )
+                stale, _ = (
+                    OutboxEntry.objects.filter(activity_type=activity_type)
+                    .exclude(Exists(in_outbox))
+                    .delete()
+                )
+                deleted += stale
+            self.stdout.write(f"Deleted {deleted} stale outbox index rows")
+
+        processed = 0
+        for activity_type, field_name, model in PortabilityOutbox.ACTIVITY_SOURCES:
+            # Walk the M2M through table directly so activities are read in batches
+            through = getattr(PortabilityOutbox, field_name).through
+            activity_field = model._meta.model_name
+            rows = (
+                through.objects
+                .values_list(
+                    "portabilityoutbox_id",
+                    f"{activity_field}_id",
+                    f"{activity_field}__timestamp",
+                    f"{activity_field}__visibility",
+                )
+                .order_by("pk")
+                .iterator(chunk_size=batch_size)
+            )
+
+            batch = []
+            for outbox_id, activity_id, timestamp, visibility in rows:
+                batch.append(OutboxEntry(
+                    outbox_id=outbox_id,
+                    activity_type=activity_type,
+                    activity_id=activity_id,
+                    timestamp=timestamp,
+                    visibility=visibility,
+                ))
+                if len(batch) >= batch_size:
+                    processed += self._write(batch)
+                    batch = []
+            if batch:
+                processed += self._write(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Outbox index backfilled: {processed} rows processed")
+        )
+
+    def _write(self, batch):
+        # Existing rows keep their ids (refreshed on --rebuild), so the command is safe to re-run
+        with transaction.atomic():
+            if self.rebuild:
+                OutboxEntry.objects.bulk_create(
+                    batch,
+                    update_conflicts=True,
+                    unique_fields=["outbox", "activity_type", "activity_id"],
+                    update_fields=["timestamp", "visibility"],
+                )
+            else:
+                OutboxEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        return len(batch)
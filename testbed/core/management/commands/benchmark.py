@@ -0,0 +1,299 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+from testbed.core.json_ld_builders import build_outbox_page_json_ld
+from testbed.core.middleware.rate_limiting import BasicRateLimitingMiddleware
+from testbed.core.models import (
+    Actor,
+    Blocked,
+    FollowActivity,
+    Followers,
+    Following,
+    LikeActivity,
+    Note,
+)
+from testbed.core.pagination import DIRECTION_NEXT, Cursor, encode_key, keyset_queryset
+from testbed.core.views.api import CONTENT_ORDERING, LIKED_ORDERING, RELATIONSHIP_ORDERING
+
+# Indexes added for the collection access paths (migration 0011), dropped by the
+# "collections" scenario to time the same queries without them
+COLLECTION_INDEXES = (
+    "following_active_idx",
+    "followers_active_idx",
+    "blocked_active_idx",
+    "note_actor_visible_idx",
+    "note_actor_all_idx",
+    "like_actor_visible_idx",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a rendering benchmark against seeded data. "
+        "Seeding runs in a transaction that is rolled back, so the database is left untouched."
+    )
+
+    # scenario name -> method
+    SCENARIOS = {
+        "popular-actor": "bench_popular_actor",
+        "collections": "bench_collections",
+        "rate-limit-flood": "bench_rate_limit_flood",
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument("scenario", choices=sorted(self.SCENARIOS))
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=1000,
+            help="Number of seeded items (default: 1000)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Timed runs per variant; the median is reported (default: 5)",
+        )
+        parser.add_argument(
+            "--plans",
+            action="store_true",
+            help="Print the query plans of the benchmarked queries",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.show_plans = options["plans"]
+            getattr(self, self.SCENARIOS[options["scenario"]])(options["size"], options["repeat"])
+            transaction.set_rollback(True)
+
+    def seed_actor(self, username):
+        # Actors are created under one bare user: the User post_save signal would otherwise
+        # seed a random outbox for every actor and skew the timings.
+        user, _ = User.objects.get_or_create(username="benchmark_user")
+        return Actor.objects.create(user=user, username=username, role=Actor.ROLE_SOURCE)
+
+    def time_runs(self, label, func, repeat):
+        """Run func `repeat` times and print the median wall and CPU time."""
+        wall, cpu = [], []
+        for _ in range(repeat):
+            cache.clear()
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            func()
+            wall.append(time.perf_counter() - wall_start)
+            cpu.append(time.process_time() - cpu_start)
+        self.stdout.write(
+            f"{label:<32} wall {statistics.median(wall) * 1000:9.1f} ms"
+            f"   cpu {statistics.median(cpu) * 1000:9.1f} ms"
+        )
+        return statistics.median(cpu)
+
+    def bench_popular_actor(self, size, repeat):
+        """
+        An outbox holding `size` Follow activities toward one popular local actor, rendered as
+        a single page with and without the request-scoped actor memo (auth_context["actor_json_ld"]).
+        The cross-request actor cache (json_ld_cache) is disabled for both runs: it would otherwise
+        serve every actor after the first render and hide what the memo saves.
+        """
+        owner = self.seed_actor("benchmark_owner")
+        popular = self.seed_actor("benchmark_popular")
+        outbox = owner.portability_outbox
+        follows = FollowActivity.objects.bulk_create(
+            FollowActivity(actor=owner, target_actor=popular, visibility="public")
+            for _ in range(size)
+        )
+        for follow in follows:
+            outbox.add_activity(follow)
+
+        self.stdout.write(f"Rendering {size} Follow activities toward one actor ({repeat} runs)")
+
+        def render(memo):
+            auth_context = {"is_authenticated": True, "has_portability_scope": True, "request": None}
+            if memo:
+                auth_context["actor_json_ld"] = {}
+            build_outbox_page_json_ld(outbox, auth_context, page_size=size + 1)
+
+        # A timeout of 0 stores nothing
+        with override_settings(LOLA_ACTOR_CACHE_TIMEOUT=0):
+            without_memo = self.time_runs("without actor memo", lambda: render(memo=False), repeat)
+            with_memo = self.time_runs("with actor memo", lambda: render(memo=True), repeat)
+        if without_memo:
+            saved = (1 - with_memo / without_memo) * 100
+            self.stdout.write(self.style.SUCCESS(f"Actor memo saves {saved:.0f}% CPU"))
+
+    def bench_collections(self, size, repeat):
+        """
+        `size` rows in each LOLA collection of one actor (and as many for a second actor, so
+        the actor filter is selective), read the way the collection views read them: COUNT for
+        the collection root, the keyset query of the first page and of a page deep in the
+        collection. Timed with the collection indexes, then again after dropping them.
+        """
+        owner = self.seed_actor("benchmark_owner")
+        other = self.seed_actor("benchmark_other")
+        for actor in (owner, other):
+            self.seed_collections(actor, size)
+
+        queries = {
+            "following": (
+                Following.objects.filter(actor=owner, status=Following.STATUS_ACTIVE),
+                RELATIONSHIP_ORDERING,
+            ),
+            "followers": (
+                Followers.objects.filter(actor=owner, status=Followers.STATUS_ACTIVE),
+                RELATIONSHIP_ORDERING,
+            ),
+            "blocked": (
+                Blocked.objects.filter(actor=owner, status=Blocked.STATUS_ACTIVE),
+                RELATIONSHIP_ORDERING,
+            ),
+            "content (public)": (Note.objects.filter(actor=owner, visibility="public"), CONTENT_ORDERING),
+            "content (all)": (Note.objects.filter(actor=owner), CONTENT_ORDERING),
+            "liked": (LikeActivity.objects.filter(actor=owner, visibility="public"), LIKED_ORDERING),
+        }
+
+        self.stdout.write(
+            f"Reading {len(queries)} collection shapes of {size} rows each "
+            f"on {connection.vendor} ({repeat} runs)"
+        )
+        with_indexes = self.time_collections(queries, repeat, "with indexes")
+
+        if connection.vendor not in ("sqlite", "postgresql"):
+            self.stdout.write(f"Dropping indexes is not supported on {connection.vendor}; skipping the baseline")
+            return
+        with connection.cursor() as cursor:
+            for name in COLLECTION_INDEXES:
+                cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+        without_indexes = self.time_collections(queries, repeat, "without indexes")
+
+        for label in queries:
+            if with_indexes[label]:
+                speedup = without_indexes[label] / with_indexes[label]
+                self.stdout.write(self.style.SUCCESS(f"{label}: indexes are {speedup:.1f}x faster"))
+
+    def bench_rate_limit_flood(self, size, repeat):
+        """
+        `size` distinct client IPs, each sending one request, through the rate limiter's check.
+        The per-request cost of each tenth of the flood is reported; it stays flat as the number
+        of tracked clients grows, and the key table stops growing at LOLA_RATE_LIMIT_MAX_KEYS.
+        """
+        factory = RequestFactory()
+        requests = [factory.get(path) for path in ("/api/actors/1/outbox/", "/oauth/token/", "/")]
+        ips = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(size)]
+        slices = 10
+        slice_size = max(size // slices, 1)
+
+        self.stdout.write(f"Flooding the rate limiter with {size} distinct clients ({repeat} runs)")
+        timings = [[] for _ in range(slices)]
+        for _ in range(repeat):
+            middleware = BasicRateLimitingMiddleware(lambda request: None)
+            now = time.time()
+            for index in range(slices):
+                start = time.perf_counter()
+                for i in range(index * slice_size, min((index + 1) * slice_size, size)):
+                    middleware.check_rate_limit(requests[i % len(requests)], ips[i], now)
+                timings[index].append((time.perf_counter() - start) / slice_size)
+
+        for index, timing in enumerate(timings):
+            self.stdout.write(
+                f"clients {index * slice_size:>8}-{(index + 1) * slice_size:<8}"
+                f" {statistics.median(timing) * 1e9:9.0f} ns/request"
+            )
+        first, last = statistics.median(timings[0]), statistics.median(timings[-1])
+        self.stdout.write(self.style.SUCCESS(
+            f"Tracked keys: {len(middleware.request_counts)} "
+            f"(limit {middleware.request_counts.max_keys}); "
+            f"last/first tenth cost ratio {last / first if first else 0:.2f}"
+        ))
+
+    def seed_collections(self, actor, size):
+        """Bulk-seed `size` rows into each collection of `actor`, a tenth of them filtered out."""
+        def remote(kind, i):
+            url = f"https://remote.example/users/{actor.username}-{kind}-{i}"
+            return url, {"id": url, "type": "Person", "preferredUsername": f"{kind}{i}"}
+
+        def status(i):
+            return Following.STATUS_INACTIVE if i % 10 == 0 else Following.STATUS_ACTIVE
+
+        def visibility(i):
+            return "private" if i % 10 == 0 else "public"
+
+        following, followers, blocked = [], [], []
+        for i in range(size):
+            url, data = remote("following", i)
+            following.append(Following(
+                actor=actor, target_actor_url=url, target_actor_data=data, status=status(i)
+            ))
+            url, data = remote("follower", i)
+            followers.append(Followers(
+                actor=actor, follower_actor_url=url, follower_actor_data=data, status=status(i)
+            ))
+            url, data = remote("blocked", i)
+            blocked.append(Blocked(
+                actor=actor, blocked_actor_url=url, blocked_actor_data=data, status=status(i)
+            ))
+        Following.objects.bulk_create(following, batch_size=1000)
+        Followers.objects.bulk_create(followers, batch_size=1000)
+        Blocked.objects.bulk_create(blocked, batch_size=1000)
+        Note.objects.bulk_create(
+            (Note(actor=actor, content=f"Note {i}", visibility=visibility(i)) for i in range(size)),
+            batch_size=1000,
+        )
+        LikeActivity.objects.bulk_create(
+            (
+                LikeActivity(
+                    actor=actor,
+                    object_url=f"https://remote.example/notes/{i}",
+                    object_data={"type": "Note", "content": f"Remote note {i}"},
+                    visibility=visibility(i),
+                )
+                for i in range(size)
+            ),
+            batch_size=1000,
+        )
+
+    def time_collections(self, queries, repeat, variant):
+        """Time COUNT + first page + deep page for each collection; returns label -> median CPU."""
+        self.stdout.write(f"-- {variant}")
+        results = {}
+        for label, (queryset, ordering) in queries.items():
+            keys = queryset.values_list(*ordering, "pk")
+            # A cursor halfway through the collection, as a client walking `next` links sends
+            middle = keys.order_by(*(f"-{field}" for field in ordering))[keys.count() // 2]
+            deep_cursor = Cursor(DIRECTION_NEXT, encode_key(middle[:-1]))
+            first_page = keyset_queryset(keys, ordering)
+            deep_page = keyset_queryset(keys, ordering, deep_cursor)
+
+            def read():
+                queryset.count()
+                list(first_page.all())
+                list(deep_page.all())
+
+            results[label] = self.time_runs(f"{label}", read, repeat)
+            if self.show_plans:
+                plans = (
+                    ("count", self.explain(queryset.values("pk"), variant, count=True)),
+                    ("first page", self.explain(first_page, variant)),
+                    ("deep page", self.explain(deep_page, variant)),
+                )
+                for name, plan in plans:
+                    self.stdout.write(f"   {name}: {' / '.join(plan)}")
+        return results
+
+    def explain(self, queryset, variant, count=False):
+        """
+        Query plan of a queryset (or of its COUNT, which QuerySet.explain() cannot show), as lines.
+
+        The statement is tagged with the variant: SQLite's driver caches prepared EXPLAIN
+        statements by SQL text and would otherwise report the plan from before the indexes
+        were dropped.
+        """
+        sql, params = queryset.query.sql_with_params()
+        if count:
+            sql = f"SELECT COUNT(*) FROM ({sql}) subquery"
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql} /* {variant} */", params)
+            return [str(row[-1]) for row in cursor.fetchall()]
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from testbed.core.export_jobs import purge_expired_export_jobs
+from testbed.core.oauth.token_purge import DEFAULT_PURGE_BATCH_SIZE, purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired OAuth access/refresh/ID tokens, grants and their actor bindings in batches, "
+        "and expired migration export jobs with their files"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_PURGE_BATCH_SIZE,
+            help=f"Number of rows deleted per transaction (default: {DEFAULT_PURGE_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="Seconds to sleep between batches, to leave room for other writers (default: 0)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help=(
+                "Count the rows that would be deleted without deleting them. Each kind of row is "
+                "counted on its own, so rows that only become purgeable once others are deleted in "
+                "the same run (e.g. access tokens whose refresh token goes first) are not counted"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        results = purge_expired_tokens(
+            batch_size=options["batch_size"], dry_run=dry_run, pause=options["pause"]
+        )
+        results.append(purge_expired_export_jobs(dry_run=dry_run))
+
+        for result in results:
+            if dry_run:
+                self.stdout.write(f"{result.label}: {result.rows} rows would be deleted")
+            else:
+                self.stdout.write(
+                    f"{result.label}: {result.rows} rows deleted in {result.batches} batches "
+                    f"({result.seconds:.2f}s, {result.rows_per_second:.0f} rows/s)"
+                )
+
+        total = sum(result.rows for result in results)
+        seconds = sum(result.seconds for result in results)
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS(f"Dry run: {total} rows would be deleted"))
+        else:
+            rate = total / seconds if seconds else 0.0
+            self.stdout.write(
+                self.style.SUCCESS(f"Purged {total} rows in {seconds:.2f}s ({rate:.0f} rows/s)")
+            )
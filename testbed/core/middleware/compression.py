@@ -0,0 +1,218 @@
+"""
+Compression middleware for LOLA JSON-LD responses.
+
+Actor documents, collections and discovery metadata repeat the same base URLs, @context and keys
+over and over, so they shrink several times over when compressed. This middleware negotiates
+Content-Encoding from Accept-Encoding:
+
+- brotli (`br`) when the optional `brotli` package is installed, otherwise gzip
+- only JSON responses (application/activity+json, ld+json, json and x-ndjson) of a 200
+- streamed exports are compressed chunk by chunk, keeping their constant memory
+
+Bodies that are served again and again (public documents such as actors and discovery metadata,
+and migration snapshot pages) are compressed once at the highest level: the compressed variant
+is stored under the digest of the uncompressed body, so a later identical body costs a hash instead
+of a compression. Keying by content cannot serve a stale variant. Variants live in their own cache
+alias (settings.LOLA_COMPRESSION_CACHE), sized for them, so they never evict rendered documents
+or validated tokens from the default cache.
+
+Every compressible response, and every 304, carries `Vary: Accept-Encoding`. ETags stay strong: a compressed
+response's ETag gets an encoding suffix ("<tag>-gzip"), which is stripped again from If-None-Match
+and If-Match before the view compares it with its own validators (see conditional.py).
+"""
+
+import gzip
+import hashlib
+import re
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional dependency: gzip only
+    brotli = None
+
+ENCODING_BROTLI = "br"
+ENCODING_GZIP = "gzip"
+
+COMPRESSIBLE_TYPES = (
+    "application/activity+json",
+    "application/ld+json",
+    "application/json",
+    "application/x-ndjson",
+)
+
+# Bodies shorter than this are not worth the Content-Encoding overhead
+MIN_COMPRESS_LENGTH = 200
+
+DEFAULT_COMPRESSION_CACHE = "default"
+DEFAULT_COMPRESSION_CACHE_MIN_LENGTH = 2048
+DEFAULT_COMPRESSION_CACHE_TIMEOUT = 300
+
+# On-the-fly compression favours speed; cached variants are compressed once, so use the best ratio
+FAST_LEVELS = {ENCODING_GZIP: 6, ENCODING_BROTLI: 5}
+BEST_LEVELS = {ENCODING_GZIP: 9, ENCODING_BROTLI: 11}
+
+ETAG_ENCODING_RE = re.compile(r'-(gzip|br)"')
+
+
+def supported_encodings():
+    """Content codings this server can produce, most preferred first."""
+    return (ENCODING_BROTLI, ENCODING_GZIP) if brotli is not None else (ENCODING_GZIP,)
+
+
+def negotiate_encoding(accept_encoding):
+    """
+    Pick the content coding for an Accept-Encoding header (RFC 9110 section 12.5.3).
+
+    Returns:
+        The supported coding with the highest q-value (server preference breaks ties),
+        or None when the client accepts none of them.
+    """
+    qualities = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        match = re.search(r"q\s*=\s*([0-9.]+)", params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        qualities[coding] = quality
+
+    best, best_quality = None, 0.0
+    for coding in supported_encodings():
+        quality = qualities.get(coding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body, encoding, level=None):
+    """Compress bytes with gzip or brotli (deterministic output, no gzip timestamp)."""
+    level = level if level is not None else FAST_LEVELS[encoding]
+    if encoding == ENCODING_BROTLI:
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def cached_compress(body, encoding):
+    """Compressed variant of a recurring body, compressed at the best level on the first request only."""
+    cache = caches[getattr(settings, "LOLA_COMPRESSION_CACHE", DEFAULT_COMPRESSION_CACHE)]
+    key = f"lola:compressed:{encoding}:{hashlib.sha256(body).hexdigest()}"
+    compressed = cache.get(key)
+    if compressed is None:
+        compressed = compress(body, encoding, BEST_LEVELS[encoding])
+        timeout = getattr(settings, "LOLA_COMPRESSION_CACHE_TIMEOUT", DEFAULT_COMPRESSION_CACHE_TIMEOUT)
+        cache.set(key, compressed, timeout)
+    return compressed
+
+
+def compress_stream(chunks, encoding):
+    """Compress an iterable of byte chunks incrementally, one output chunk per input chunk."""
+    if encoding == ENCODING_BROTLI:
+        compressor = brotli.Compressor(quality=FAST_LEVELS[encoding])
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+
+    # zlib with a gzip header; Z_SYNC_FLUSH after each chunk keeps the stream moving
+    compressor = zlib.compressobj(FAST_LEVELS[encoding], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def encoded_etag(etag, encoding):
+    """The ETag of the `encoding` variant of a representation, e.g. "abc" -> "abc-gzip"."""
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else etag
+
+
+class CompressionMiddleware:
+    """
+    Negotiated gzip/brotli compression of JSON responses, with cached variants of recurring bodies.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.cache_min_length = getattr(
+            settings, "LOLA_COMPRESSION_CACHE_MIN_LENGTH", DEFAULT_COMPRESSION_CACHE_MIN_LENGTH
+        )
+
+    def __call__(self, request):
+        # Views compare preconditions against the ETag of the uncompressed representation
+        etag_encoding = None
+        for header in ("HTTP_IF_NONE_MATCH", "HTTP_IF_MATCH"):
+            value = request.META.get(header)
+            if value:
+                match = ETAG_ENCODING_RE.search(value)
+                if match and etag_encoding is None:
+                    etag_encoding = match.group(1)
+                request.META[header] = ETAG_ENCODING_RE.sub('"', value)
+
+        response = self.get_response(request)
+
+        if response.status_code == 304:
+            # A 304 has no Content-Type to check, but must carry the Vary of the 200 it stands for
+            patch_vary_headers(response, ("Accept-Encoding",))
+            # Confirm the compressed variant the client holds
+            if etag_encoding and response.has_header("ETag"):
+                response["ETag"] = encoded_etag(response["ETag"], etag_encoding)
+            return response
+        if not self.is_compressible(response):
+            return response
+
+        # Whether compressed or not, the response depends on the request's Accept-Encoding
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if response.status_code != 200 or response.has_header("Content-Encoding"):
+            return response
+        encoding = negotiate_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(response.streaming_content, encoding)
+            del response["Content-Length"]
+        else:
+            body = response.content
+            if len(body) < MIN_COMPRESS_LENGTH:
+                return response
+            if len(body) >= self.cache_min_length and self.is_recurring(request, response):
+                compressed = cached_compress(body, encoding)
+            else:
+                compressed = compress(body, encoding)
+            if len(compressed) >= len(body):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        response["Content-Encoding"] = encoding
+        if response.has_header("ETag"):
+            response["ETag"] = encoded_etag(response["ETag"], encoding)
+        return response
+
+    def is_compressible(self, response):
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        return content_type in COMPRESSIBLE_TYPES
+
+    def is_recurring(self, request, response):
+        """
+        Whether the same body is likely to be served again: public responses (no Authorization)
+        and responses the client may store (e.g. migration snapshot pages, see snapshots.py).
+        """
+        cache_control = response.get("Cache-Control", "")
+        if "no-store" in cache_control:
+            return False
+        return not request.META.get("HTTP_AUTHORIZATION") or "private" in cache_control
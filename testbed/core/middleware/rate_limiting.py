@@ -6,23 +6,261 @@ a 429 Too Many Requests response as defined in RFC6585, with a Retry-After heade
 
 This middleware implements basic rate limiting for OAuth endpoints to ensure
 production-ready behavior for real-world LOLA account portability usage.
+
+Limits are enforced with the Generic Cell Rate Algorithm (GCRA), a token bucket that keeps a
+single number per client and endpoint: the theoretical arrival time (TAT) of its next request.
+A limit of `requests` per `window` seconds admits a burst of `requests` and then one request
+every `window / requests` seconds. Each check is O(1), and an entry whose TAT has passed is
+equivalent to no entry, so it expires lazily. The key table is an LRU bounded by
+settings.LOLA_RATE_LIMIT_MAX_KEYS, so a flood of distinct clients cannot grow memory without bound.
+
+That table lives in each process, so limits multiply by the number of workers and instances and
+reset on every cold start. settings.LOLA_RATE_LIMIT_STORAGE selects where the state is kept:
+
+- "local" (default): the per-process GCRA table above
+- "cache": fixed-window counters in Django's cache (alias settings.LOLA_RATE_LIMIT_CACHE),
+  incremented with cache.incr()
+- "database": fixed-window counters in the RateLimitCounter table, incremented in SQL
+
+Shared counters are incremented atomically (cache.incr() is atomic with memcached, redis and
+locmem; the file and database cache backends read and write, which is fine for local testing),
+but not on every request: each process counts locally and adds its hits to the shared counter
+at most every settings.LOLA_RATE_LIMIT_SYNC_INTERVAL seconds or LOLA_RATE_LIMIT_SYNC_BATCH hits,
+learning the global count in return. A key's first request in a window always syncs. Between
+syncs a process does not see the others' hits, so a limit can be overshot by up to
+LOLA_RATE_LIMIT_SYNC_BATCH - 1 requests per process; set the batch to 1 for exact counting.
 """
 
+import hashlib
+import math
+import threading
 import time
 import logging
-from collections import defaultdict
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from datetime import datetime, timezone
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from django.http import HttpResponse
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_RATE_LIMIT_MAX_KEYS = 50000
+DEFAULT_RATE_LIMIT_SYNC_INTERVAL = 1.0
+DEFAULT_RATE_LIMIT_SYNC_BATCH = 10
+
+
+class GCRATable:
+    """
+    Thread-safe LRU-bounded table of GCRA theoretical arrival times, one float per key.
+
+    When the table is full the least recently seen key is dropped; that client then starts
+    again with a full burst, which is the only cost of bounding the table.
+    """
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._tats = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tats)
+
+    def hit(self, key, now, requests, window):
+        """
+        Record a request for `key` if its limit allows it.
+
+        Returns:
+            0 when the request is allowed, otherwise the seconds until it would be.
+        """
+        emission_interval = window / requests
+        with self._lock:
+            tat = self._tats.get(key)
+            # An entry whose TAT has passed is a full bucket, the same as no entry
+            if tat is None or tat < now:
+                tat = now
+            new_tat = tat + emission_interval
+            allow_at = new_tat - window
+            if allow_at > now:
+                # Rejected requests don't consume capacity, but keep the key from being evicted
+                if key in self._tats:
+                    self._tats.move_to_end(key)
+                return allow_at - now
+
+            self._tats[key] = new_tat
+            self._tats.move_to_end(key)
+            if len(self._tats) > self.max_keys:
+                self._tats.popitem(last=False)
+            return 0
+
+    def clear(self):
+        with self._lock:
+            self._tats.clear()
+
+
+class CacheCounterStore:
+    """Fixed-window counters in Django's cache."""
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    def incr(self, key, delta, expires_at):
+        """Add `delta` to a counter living until `expires_at` (epoch seconds); returns its new value."""
+        cache = caches[self.alias]
+        key = f'lola:ratelimit:{key}'
+        timeout = max(math.ceil(expires_at - time.time()), 1)
+        # add() only creates the counter, so the first process to see the window sets its lifetime
+        cache.add(key, 0, timeout)
+        try:
+            return cache.incr(key, delta)
+        except ValueError:
+            # Expired between add() and incr()
+            cache.set(key, delta, timeout)
+            return delta
+
+
+class DatabaseCounterStore:
+    """Fixed-window counters in the RateLimitCounter table, incremented with count = count + delta."""
+
+    # Rows of ended windows are deleted at most this often (seconds), per process
+    SWEEP_INTERVAL = 60
+
+    def __init__(self):
+        self._next_sweep = 0
+
+    def incr(self, key, delta, expires_at):
+        """Add `delta` to a counter living until `expires_at` (epoch seconds); returns its new value."""
+        # Imported here: middleware modules are imported before the app registry is ready
+        from ..models import RateLimitCounter
+
+        counters = RateLimitCounter.objects.filter(key=key)
+        if not counters.update(count=F('count') + delta):
+            self.sweep()
+            try:
+                with transaction.atomic():
+                    RateLimitCounter.objects.create(
+                        key=key, count=delta, expires_at=datetime.fromtimestamp(expires_at, tz=timezone.utc)
+                    )
+                return delta
+            except IntegrityError:
+                # Another process created the counter first
+                counters.update(count=F('count') + delta)
+        return counters.values_list('count', flat=True).first() or 0
+
+    def sweep(self):
+        now = time.time()
+        if now < self._next_sweep:
+            return
+        from ..models import RateLimitCounter
+
+        self._next_sweep = now + self.SWEEP_INTERVAL
+        RateLimitCounter.objects.filter(expires_at__lt=datetime.fromtimestamp(now, tz=timezone.utc)).delete()
+
+
+class LocalWindow:
+    """A process's view of one key's shared counter in the current window."""
+
+    __slots__ = ('index', 'shared', 'pending', 'synced_at')
+
+    def __init__(self, index):
+        self.index = index
+        self.shared = 0        # the shared count as of the last sync (includes this process's synced hits)
+        self.pending = 0       # hits of this process not yet added to the shared count
+        self.synced_at = None
+
+
+class SharedRateLimitStorage:
+    """
+    Fixed-window rate limiting against counters shared between processes (a CacheCounterStore or
+    DatabaseCounterStore), with a local fast path that batches counter syncs.
+
+    The local table is an LRU bounded to `max_keys` keys, like GCRATable.
+    """
+
+    def __init__(self, store, sync_interval=DEFAULT_RATE_LIMIT_SYNC_INTERVAL,
+                 sync_batch=DEFAULT_RATE_LIMIT_SYNC_BATCH, max_keys=DEFAULT_RATE_LIMIT_MAX_KEYS):
+        self.store = store
+        self.sync_interval = sync_interval
+        self.sync_batch = sync_batch
+        self.max_keys = max_keys
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._windows)
+
+    def hit(self, key, now, requests, window):
+        """
+        Record a request for `key` if its limit allows it.
+
+        Returns:
+            0 when the request is allowed, otherwise the seconds until the window ends.
+        """
+        index = int(now // window)
+        wait = (index + 1) * window - now
+        with self._lock:
+            local = self._windows.get(key)
+            if local is None or local.index != index:
+                local = self._windows[key] = LocalWindow(index)
+            self._windows.move_to_end(key)
+            if len(self._windows) > self.max_keys:
+                self._windows.popitem(last=False)
+
+            if local.shared + local.pending >= requests:
+                return wait
+            local.pending += 1
+            if (local.synced_at is not None and local.pending < self.sync_batch
+                    and now - local.synced_at < self.sync_interval):
+                return 0
+            delta, local.pending, local.synced_at = local.pending, 0, now
+
+        # The shared store may be remote: sync outside the lock
+        total = self.store.incr(self.store_key(key, window, index), delta, (index + 1) * window)
+        with self._lock:
+            local.shared = max(local.shared, total)
+        # Other processes used up the window before this sync
+        return wait if total > requests else 0
+
+    def store_key(self, key, window, index):
+        # Client IPs come from request headers: hash them into a fixed-size, backend-safe key
+        return hashlib.sha256(repr((key, window, index)).encode('utf-8')).hexdigest()
+
+    def clear(self):
+        with self._lock:
+            self._windows.clear()
+
+
+def get_rate_limit_storage():
+    """The rate-limit storage selected by settings.LOLA_RATE_LIMIT_STORAGE (see the module docstring)."""
+    name = getattr(settings, 'LOLA_RATE_LIMIT_STORAGE', 'local')
+    max_keys = getattr(settings, 'LOLA_RATE_LIMIT_MAX_KEYS', DEFAULT_RATE_LIMIT_MAX_KEYS)
+    if name == 'local':
+        return GCRATable(max_keys)
+    if name == 'cache':
+        store = CacheCounterStore(getattr(settings, 'LOLA_RATE_LIMIT_CACHE', 'default'))
+    elif name == 'database':
+        store = DatabaseCounterStore()
+    else:
+        raise ImproperlyConfigured(
+            f"LOLA_RATE_LIMIT_STORAGE must be 'local', 'cache' or 'database', not {name!r}"
+        )
+    return SharedRateLimitStorage(
+        store,
+        sync_interval=getattr(settings, 'LOLA_RATE_LIMIT_SYNC_INTERVAL', DEFAULT_RATE_LIMIT_SYNC_INTERVAL),
+        sync_batch=getattr(settings, 'LOLA_RATE_LIMIT_SYNC_BATCH', DEFAULT_RATE_LIMIT_SYNC_BATCH),
+        max_keys=max_keys,
+    )
+
+
 class BasicRateLimitingMiddleware:
     """
     Simple in-memory rate limiting middleware for LOLA OAuth endpoints.
     
-    This middleware tracks request rates per IP address and returns RFC6585-compliant
-    429 responses with Retry-After headers when rate limits are exceeded.
+    This middleware tracks request rates per IP address and endpoint (GCRA, see the module
+    docstring) and returns RFC6585-compliant 429 responses with Retry-After headers when rate
+    limits are exceeded.
     
     Focuses on OAuth authorization endpoints which are most critical for LOLA
     account portability operations.
@@ -31,8 +269,9 @@ class BasicRateLimitingMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
         
-        # In-memory storage for rate limiting (production would use database)
-        self.request_counts = defaultdict(list)  # IP -> list of request timestamps
+        # Rate limiting state per (IP, endpoint pattern): in this process, or shared between
+        # processes (settings.LOLA_RATE_LIMIT_STORAGE)
+        self.request_counts = get_rate_limit_storage()
         
         # Rate limiting configuration
         # OAuth endpoints get stricter limits since they're more sensitive
@@ -56,10 +295,7 @@ class BasicRateLimitingMiddleware:
         client_ip = self.get_client_ip(request)
         current_time = time.time()
         
-        # Clean up old entries to prevent memory bloat
-        self.cleanup_old_entries(current_time)
-        
-        # Check rate limit for this request
+        # Check (and record) this request against its rate limit
         rate_limit_result = self.check_rate_limit(request, client_ip, current_time)
         
         if rate_limit_result['exceeded']:
@@ -84,9 +320,6 @@ class BasicRateLimitingMiddleware:
             
             return response
         
-        # Record this request and continue
-        self.request_counts[client_ip].append(current_time)
-        
         response = self.get_response(request)
         return response
     
@@ -111,29 +344,20 @@ class BasicRateLimitingMiddleware:
     
     def check_rate_limit(self, request, client_ip, current_time):
         """
-        Check if the request should be rate limited.
+        Check if the request should be rate limited, recording it when it is not.
         
         Returns dict with 'exceeded' boolean and 'retry_after' seconds.
         """
-        # Find the most specific rate limit for this path
-        rate_limit = self.get_rate_limit_for_path(request.path)
-        
-        # Get request timestamps for this IP
-        request_times = self.request_counts[client_ip]
-        
-        # Filter to requests within the time window
-        window_start = current_time - rate_limit['window']
-        recent_requests = [t for t in request_times if t > window_start]
+        # Find the most specific rate limit for this path; each endpoint has its own bucket
+        pattern, rate_limit = self.match_rate_limit(request.path)
         
-        # Check if limit is exceeded
-        if len(recent_requests) >= rate_limit['requests']:
-            # Calculate when the oldest request in the window will expire
-            oldest_request = min(recent_requests)
-            retry_after = int(oldest_request + rate_limit['window'] - current_time) + 1
-            
+        wait = self.request_counts.hit(
+            (client_ip, pattern), current_time, rate_limit['requests'], rate_limit['window']
+        )
+        if wait > 0:
             return {
                 'exceeded': True,
-                'retry_after': max(retry_after, 1)  # At least 1 second
+                'retry_after': max(math.ceil(wait), 1)  # At least 1 second
             }
         
         return {'exceeded': False, 'retry_after': 0}
@@ -144,33 +368,25 @@ class BasicRateLimitingMiddleware:
         
         Uses the most specific match (longest matching prefix).
         """
+        return self.match_rate_limit(path)[1]
+    
+    def match_rate_limit(self, path):
+        """
+        Get the (pattern, rate limit) matching a path, the pattern being None for the default limit.
+        
+        Uses the most specific match (longest matching prefix).
+        """
+        best_pattern = None
         best_match = self.default_limit
         best_match_length = 0
         
         for pattern, limit in self.rate_limits.items():
             if path.startswith(pattern) and len(pattern) > best_match_length:
+                best_pattern = pattern
                 best_match = limit
                 best_match_length = len(pattern)
         
-        return best_match
-    
-    def cleanup_old_entries(self, current_time, max_age=3600):
-        """
-        Remove old entries to prevent memory bloat.
-        
-        Removes entries older than max_age seconds (default: 1 hour).
-        """
-        cutoff_time = current_time - max_age
-        
-        for ip in list(self.request_counts.keys()):
-            # Filter out old entries
-            self.request_counts[ip] = [
-                t for t in self.request_counts[ip] if t > cutoff_time
-            ]
-            
-            # Remove IP if no recent requests
-            if not self.request_counts[ip]:
-                del self.request_counts[ip]
+        return best_pattern, best_match
 
 
 class LOLARateLimitingMiddleware(BasicRateLimitingMiddleware):
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.3 on 2026-10-17 00:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_token_actor_binding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('activity_type', models.CharField(choices=[('Create', 'Create'), ('Like', 'Like'), ('Follow', 'Follow')], max_length=10)),
+                ('activity_id', models.BigIntegerField()),
+                ('timestamp', models.DateTimeField()),
+                ('visibility', models.CharField(max_length=20)),
+                ('outbox', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='core.portabilityoutbox')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['outbox', 'visibility', '-timestamp', '-activity_type', '-activity_id'], name='outbox_entry_visible_idx'), models.Index(fields=['outbox', '-timestamp', '-activity_type', '-activity_id'], name='outbox_entry_all_idx')],
+                'constraints': [models.UniqueConstraint(fields=('outbox', 'activity_type', 'activity_id'), name='unique_outbox_entry')],
+            },
+        ),
+    ]
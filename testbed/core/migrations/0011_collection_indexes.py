@@ -0,0 +1,37 @@
+# Generated by Django 5.1.3 on 2026-10-17 00:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_outbox_entry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blocked',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['actor', '-created_at', '-id'], name='blocked_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='followers',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['actor', '-created_at', '-id'], name='followers_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='following',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['actor', '-created_at', '-id'], name='following_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='likeactivity',
+            index=models.Index(fields=['actor', 'visibility', '-timestamp', '-id'], name='like_actor_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['actor', 'visibility', '-published', '-id'], name='note_actor_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['actor', '-published', '-id'], name='note_actor_all_idx'),
+        ),
+    ]
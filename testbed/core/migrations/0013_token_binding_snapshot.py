@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-17 01:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_export_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tokenactorbinding',
+            name='snapshot',
+            field=models.JSONField(blank=True, help_text="High-water marks (max primary key per collection table) bounding this token's reads.", null=True),
+        ),
+        migrations.AddField(
+            model_name='tokenactorbinding',
+            name='snapshot_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
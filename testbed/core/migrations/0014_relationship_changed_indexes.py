@@ -0,0 +1,25 @@
+# Generated by Django 5.1.3 on 2026-10-17 01:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_token_binding_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blocked',
+            index=models.Index(fields=['actor', 'updated_at', 'id'], name='blocked_changed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='followers',
+            index=models.Index(fields=['actor', 'updated_at', 'id'], name='followers_changed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='following',
+            index=models.Index(fields=['actor', 'updated_at', 'id'], name='following_changed_idx'),
+        ),
+    ]
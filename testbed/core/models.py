@@ -89,6 +89,7 @@ class Actor(models.Model):
             logger.error(f"Error initializing actor {self.user.username}: {e}")
     
     def save(self, *args, **kwargs):
+        # Cached renderings of the actor are invalidated by the post_save signal (see json_ld_cache)
         is_new = self._state.adding
         super().save(*args, **kwargs)
 
@@ -163,6 +164,15 @@ class LikeActivity(Activity):
         content = self.object_data.get("content", "")[:50]
         return f"Like by {self.actor.user.username}: {content}..."
 
+    class Meta:
+        indexes = [
+            # Liked collection reads: WHERE actor = ? AND visibility = 'public' ORDER BY timestamp DESC, id DESC
+            models.Index(
+                fields=['actor', 'visibility', '-timestamp', '-id'],
+                name='like_actor_visible_idx',
+            ),
+        ]
+
 class FollowActivity(Activity):
     target_actor = models.ForeignKey(
         Actor,
@@ -208,6 +218,20 @@ class Note(models.Model):
         ],
     )
 
+    class Meta:
+        indexes = [
+            # Public content reads: WHERE actor = ? AND visibility = 'public' ORDER BY published DESC, id DESC
+            models.Index(
+                fields=['actor', 'visibility', '-published', '-id'],
+                name='note_actor_visible_idx',
+            ),
+            # LOLA content reads (all visibilities): WHERE actor = ? ORDER BY published DESC, id DESC
+            models.Index(
+                fields=['actor', '-published', '-id'],
+                name='note_actor_all_idx',
+            ),
+        ]
+
     def __str__(self):
         return f"Note by {self.actor.user.username}: {self.content[:30]}"
 
@@ -271,6 +295,21 @@ class Following(models.Model):
                 condition=models.Q(target_actor_url__isnull=False)
             )
         ]
+        indexes = [
+            # Collection reads: WHERE actor = ? AND status = 'active' ORDER BY created_at DESC, id DESC.
+            # Partial on active rows where the backend supports it (PostgreSQL, SQLite).
+            models.Index(
+                fields=['actor', '-created_at', '-id'],
+                name='following_active_idx',
+                condition=models.Q(status='active'),
+            ),
+            # Incremental reads (changes.py), inactive rows included:
+            # WHERE actor = ? AND updated_at > ? ORDER BY updated_at, id
+            models.Index(
+                fields=['actor', 'updated_at', 'id'],
+                name='following_changed_idx',
+            ),
+        ]
     
     def clean(self):
         super().clean()
@@ -347,6 +386,21 @@ class Followers(models.Model):
                 condition=models.Q(follower_actor_url__isnull=False)
             )
         ]
+        indexes = [
+            # Collection reads: WHERE actor = ? AND status = 'active' ORDER BY created_at DESC, id DESC.
+            # Partial on active rows where the backend supports it (PostgreSQL, SQLite).
+            models.Index(
+                fields=['actor', '-created_at', '-id'],
+                name='followers_active_idx',
+                condition=models.Q(status='active'),
+            ),
+            # Incremental reads (changes.py), inactive rows included:
+            # WHERE actor = ? AND updated_at > ? ORDER BY updated_at, id
+            models.Index(
+                fields=['actor', 'updated_at', 'id'],
+                name='followers_changed_idx',
+            ),
+        ]
     
     def clean(self):
         super().clean()
@@ -433,6 +487,21 @@ class Blocked(models.Model):
                 condition=models.Q(blocked_actor_url__isnull=False)
             )
         ]
+        indexes = [
+            # Collection reads: WHERE actor = ? AND status = 'active' ORDER BY created_at DESC, id DESC.
+            # Partial on active rows where the backend supports it (PostgreSQL, SQLite).
+            models.Index(
+                fields=['actor', '-created_at', '-id'],
+                name='blocked_active_idx',
+                condition=models.Q(status='active'),
+            ),
+            # Incremental reads (changes.py), inactive rows included:
+            # WHERE actor = ? AND updated_at > ? ORDER BY updated_at, id
+            models.Index(
+                fields=['actor', 'updated_at', 'id'],
+                name='blocked_changed_idx',
+            ),
+        ]
     
     def clean(self):
         super().clean()
@@ -569,6 +638,13 @@ class TokenActorBinding(models.Model):
 
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Migration snapshot (see snapshots.py), recorded on the token's first LOLA request
+    snapshot = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="High-water marks (max primary key per collection table) bounding this token's reads.",
+    )
+    snapshot_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"TokenActorBinding(token_id={self.token_id}, actor_id={self.actor_id})"
@@ -594,6 +670,37 @@ class PortabilityOutbox(models.Model):
     def __str__(self):
         return f"Outbox for {self.actor.user.username}"
 
+    # (activity type, M2M field, model) for each activity table the outbox holds
+    ACTIVITY_SOURCES = (
+        ("Create", "activities_create", CreateActivity),
+        ("Like", "activities_like", LikeActivity),
+        ("Follow", "activities_follow", FollowActivity),
+    )
+
+    # Relations the JSON-LD builders dereference for each activity type. Joined when a page
+    # is loaded so rendering it costs no extra query per item; related actors that only
+    # appear as an id (activity.actor, note.actor) are read from their `*_id` column instead.
+    ACTIVITY_SELECT_RELATED = {
+        "Create": ("actor", "note"),  # actor is rendered in full for the actor-creation activity
+        "Like": ("note",),
+        "Follow": ("target_actor",),
+    }
+
+    # When embedded actors are rendered as references (IRI or stub, see json_ld_utils.REPRESENTATION_*)
+    # the Follow target is not loaded; its username is projected onto the activity instead.
+    ACTIVITY_REFERENCE_SELECT_RELATED = {**ACTIVITY_SELECT_RELATED, "Follow": ()}
+    ACTIVITY_REFERENCE_ANNOTATIONS = {
+        "Follow": {"target_actor_username": models.F("target_actor__username")},
+    }
+
+    @classmethod
+    def activity_type_of(cls, activity):
+        """Return the ActivityStreams type name for an activity instance, or None if unknown."""
+        for activity_type, _field_name, model in cls.ACTIVITY_SOURCES:
+            if isinstance(activity, model):
+                return activity_type
+        return None
+
     # Helper method to add any type of activity
     def add_activity(self, activity):
         if isinstance(activity, CreateActivity):
@@ -602,3 +709,243 @@ class PortabilityOutbox(models.Model):
             self.activities_like.add(activity)
         elif isinstance(activity, FollowActivity):
             self.activities_follow.add(activity)
+        else:
+            return
+
+        # Keep the denormalized outbox index in step with the M2M tables
+        OutboxEntry.objects.bulk_create(
+            [OutboxEntry.for_activity(self, activity)], ignore_conflicts=True
+        )
+
+    def activity_entries(self, public_only=True, activity_types=None, snapshot=None, since=None):
+        """
+        Outbox index rows visible to the caller, optionally restricted to some activity types or
+        to activities after `since` (see changes.py), and bounded by a migration snapshot (see snapshots.py).
+
+        Served by the (outbox, visibility, timestamp) composite indexes on OutboxEntry.
+        """
+        from .changes import changed_since
+        from .snapshots import bound_to_snapshot
+
+        entries = self.entries.all()
+        if public_only:
+            entries = entries.filter(visibility="public")
+        if activity_types:
+            entries = entries.filter(activity_type__in=activity_types)
+        entries = changed_since(entries, "timestamp", since)
+        return bound_to_snapshot(entries, snapshot)
+
+    def activity_count(self, public_only=True, activity_types=None, snapshot=None, since=None):
+        """Count outbox activities visible to the caller with a single indexed COUNT."""
+        return self.activity_entries(public_only, activity_types, snapshot, since).count()
+
+    def activity_page(self, public_only=True, cursor=None, limit=20, activity_types=None, actor_references=False,
+                      snapshot=None, since=None):
+        """
+        Return one keyset page of outbox activities, newest first.
+
+        Ordering, visibility/type filtering and LIMIT run as one scan of the OutboxEntry
+        index; only the page's activities are then loaded, with the relations the JSON-LD
+        builders need (one query per activity type present, whatever the page size).
+
+        Args:
+            public_only: restrict to public activities (non-LOLA requests)
+            cursor: pagination.Cursor to page from, or None for the first page
+            limit: page size
+            activity_types: optional iterable of activity type names to include
+            actor_references: load activities for reference rendering of embedded actors
+                (ACTIVITY_REFERENCE_* plans) instead of full Actor documents
+            snapshot: migration snapshot high-water marks bounding the outbox, or None
+            since: only activities after this datetime, or None
+
+        Returns:
+            tuple: (entries, activities, has_more) where entries are the page's OutboxEntry
+            rows in display order, activities are the matching model instances in the same
+            order, and has_more tells whether further rows exist beyond the page in the
+            direction of travel.
+        """
+        from .pagination import keyset_rows
+
+        entries, has_more = keyset_rows(
+            self.activity_entries(public_only, activity_types, snapshot, since),
+            OutboxEntry.ORDERING_KEY,
+            cursor,
+            limit,
+        )
+
+        return entries, self.load_activities(entries, actor_references), has_more
+
+    def iter_activity_chunks(self, public_only=True, activity_types=None, actor_references=False, chunk_size=500,
+                             snapshot=None, since=None):
+        """
+        Walk every outbox activity visible to the caller, newest first, in chunks.
+
+        Index rows are streamed from one server-side cursor over OutboxEntry; each chunk's
+        activities are then loaded as in activity_page. Yields lists of model instances.
+        """
+        from .streaming import iter_chunks
+
+        entries = (
+            self.activity_entries(public_only, activity_types, snapshot, since)
+            .order_by(*(f"-{field}" for field in OutboxEntry.ORDERING_KEY))
+            .iterator(chunk_size=chunk_size)
+        )
+        for chunk in iter_chunks(entries, chunk_size):
+            yield self.load_activities(chunk, actor_references)
+
+    def load_activities(self, entries, actor_references=False):
+        """
+        Load the activities behind OutboxEntry rows, in the same order, with the relations the
+        JSON-LD builders need: one query per activity type present, whatever the number of rows.
+
+        Args:
+            entries: OutboxEntry rows
+            actor_references: load for reference rendering of embedded actors
+                (ACTIVITY_REFERENCE_* plans) instead of full Actor documents
+
+        Returns:
+            The activities still in the database, in the order of `entries`
+        """
+        models_by_type = {activity_type: model for activity_type, _field, model in self.ACTIVITY_SOURCES}
+        ids_by_type = {}
+        for entry in entries:
+            ids_by_type.setdefault(entry.activity_type, []).append(entry.activity_id)
+
+        select_related = self.ACTIVITY_SELECT_RELATED
+        annotations = {}
+        if actor_references:
+            select_related = self.ACTIVITY_REFERENCE_SELECT_RELATED
+            annotations = self.ACTIVITY_REFERENCE_ANNOTATIONS
+
+        loaded = {}
+        for activity_type, ids in ids_by_type.items():
+            queryset = (
+                models_by_type[activity_type].objects
+                .select_related(*select_related[activity_type])
+                .annotate(**annotations.get(activity_type, {}))
+                .filter(id__in=ids)
+            )
+            for activity in queryset:
+                loaded[(activity_type, activity.id)] = activity
+
+        # An activity deleted since its entry was read is skipped (page cursors come from the entries)
+        keys = [(entry.activity_type, entry.activity_id) for entry in entries]
+        return [loaded[key] for key in keys if key in loaded]
+
+
+class OutboxEntry(models.Model):
+    """
+    Denormalized index of a PortabilityOutbox: one compact row per activity.
+
+    `Activity` is abstract and the outbox holds three separate ManyToMany fields, so reading
+    the outbox from the M2M tables needs three joins and a merge. This table carries just enough
+    (type, id, timestamp, visibility) to order, filter and count the outbox with a single indexed scan.
+
+    Written by PortabilityOutbox.add_activity; kept in sync on activity updates/deletes and M2M
+    removals by the receivers in signals.py. Existing data is backfilled with
+    `python manage.py backfill_outbox_index`.
+    """
+    ACTIVITY_TYPE_CHOICES = [
+        ("Create", "Create"),
+        ("Like", "Like"),
+        ("Follow", "Follow"),
+    ]
+
+    # Sort key of the outbox, newest first
+    ORDERING_KEY = ("timestamp", "activity_type", "activity_id")
+
+    outbox = models.ForeignKey(PortabilityOutbox, on_delete=models.CASCADE, related_name="entries")
+    activity_type = models.CharField(max_length=10, choices=ACTIVITY_TYPE_CHOICES)
+    activity_id = models.BigIntegerField()
+    timestamp = models.DateTimeField()
+    visibility = models.CharField(max_length=20)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['outbox', 'activity_type', 'activity_id'],
+                name='unique_outbox_entry'
+            )
+        ]
+        indexes = [
+            # Public reads: WHERE outbox = ? AND visibility = 'public' ORDER BY timestamp DESC, ...
+            models.Index(
+                fields=['outbox', 'visibility', '-timestamp', '-activity_type', '-activity_id'],
+                name='outbox_entry_visible_idx',
+            ),
+            # LOLA reads (all visibilities): WHERE outbox = ? ORDER BY timestamp DESC, ...
+            models.Index(
+                fields=['outbox', '-timestamp', '-activity_type', '-activity_id'],
+                name='outbox_entry_all_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.activity_type} {self.activity_id} in outbox {self.outbox_id}"
+
+    @classmethod
+    def for_activity(cls, outbox, activity):
+        """Build (unsaved) the index row for an activity held by an outbox."""
+        return cls(
+            outbox=outbox,
+            activity_type=PortabilityOutbox.activity_type_of(activity),
+            activity_id=activity.id,
+            timestamp=activity.timestamp,
+            visibility=activity.visibility,
+        )
+
+
+class ExportJob(models.Model):
+    """
+    A background migration export of one Actor (see export_jobs.py).
+
+    Created by a portability-scoped POST to .../migration/exports/ and rendered off the request
+    threads by a local worker pool into a migration bundle zip on disk (settings.LOLA_EXPORT_DIR).
+    While the job runs, progress is kept in the cache; the counts below are final once it ends.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETE = "complete"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_COMPLETE, "Complete"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    actor = models.ForeignKey(Actor, on_delete=models.CASCADE, related_name="export_jobs")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    total_items = models.PositiveIntegerField(null=True, blank=True)
+    items_written = models.PositiveIntegerField(default=0)
+    file_path = models.CharField(max_length=500, blank=True, default="")
+    file_size = models.BigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"ExportJob {self.pk} of actor {self.actor_id} ({self.status})"
+
+    @property
+    def filename(self):
+        return f"actor-{self.actor_id}-migration-{self.pk}.zip"
+
+
+class RateLimitCounter(models.Model):
+    """
+    One fixed-window request counter of the database rate-limit storage
+    (settings.LOLA_RATE_LIMIT_STORAGE = "database", see middleware/rate_limiting.py).
+
+    Counters are incremented atomically in SQL (count = count + n), so every gunicorn worker and
+    every instance sharing the database counts against the same limit. Rows of windows that have
+    ended are deleted by the storage itself.
+    """
+    # Digest of (client IP, endpoint pattern, window, window index)
+    key = models.CharField(max_length=64, unique=True)
+    count = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"RateLimitCounter {self.key}: {self.count}"
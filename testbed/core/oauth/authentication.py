@@ -11,6 +11,8 @@ from oauth2_provider.contrib.rest_framework import OAuth2Authentication
 from rest_framework import exceptions
 
 from .scopes import scope_grants_portability
+from .signed_tokens import authenticate_signed_token
+from .token_cache import get_validated_token, remember_validated_token
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +54,9 @@ class OptionalOAuth2Authentication(OAuth2Authentication):
         If authentication succeeds, checks if the token has the portability scope.
         If authentication fails, allows the request to continue as unauthenticated.
 
+        Validated tokens are cached (see token_cache.py): a warm bearer token is accepted, with its
+        actor binding, without a query. Signed tokens (see signed_tokens.py) are verified in memory.
+
         Args:
             request: The HTTP request object
 
@@ -64,7 +69,11 @@ class OptionalOAuth2Authentication(OAuth2Authentication):
         
         try:
             # 1. Normative path: standard Authorization: Bearer header auth
-            result = super().authenticate(request)
+            result = self._try_cached_bearer_auth(request)
+            if result is None:
+                result = super().authenticate(request)
+                if result is not None:
+                    remember_validated_token(result[1])
 
             # 2. Demo fallback: session-stored token
             if result is None:
@@ -75,14 +84,14 @@ class OptionalOAuth2Authentication(OAuth2Authentication):
                 
                 # Authentication succeeded
                 request.is_oauth_authenticated = True
-                logger.debug(f"OAuth authentication successful for user: {user.username}")
+                logger.debug("OAuth authentication successful for user: %s", user)
                 
                 # Check if token has the LOLA portability scope
                 if self._has_portability_scope(token):
                     request.has_portability_scope = True
-                    logger.debug(f"Token has portability scope for user: {user.username}")
+                    logger.debug("Token has portability scope for user: %s", user)
                 else:
-                    logger.debug(f"Token missing portability scope for user: {user.username}")
+                    logger.debug("Token missing portability scope for user: %s", user)
                 
                 return user, token
                 
@@ -100,6 +109,21 @@ class OptionalOAuth2Authentication(OAuth2Authentication):
         # This allows the request to continue as unauthenticated rather than failing
         return None
     
+    def _try_cached_bearer_auth(self, request):
+        """
+        Accept an `Authorization: Bearer` token without the database: a valid signed token, or a
+        token validated by an earlier request from the token cache.
+
+        Returns:
+            A tuple of (user, token) on a cache hit, None otherwise (the token is then validated
+            by django-oauth-toolkit as usual).
+        """
+        scheme, _, token_string = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+        token_string = token_string.strip()
+        if scheme.lower() != "bearer" or not token_string:
+            return None
+        return authenticate_signed_token(token_string) or get_validated_token(token_string)
+
     def _try_session_auth(self, request):
         """
         Try to authenticate using a token stored in the Django session.
@@ -161,6 +185,10 @@ class OptionalOAuth2Authentication(OAuth2Authentication):
         """
         from oauth2_provider.models import AccessToken
 
+        cached = authenticate_signed_token(token_string) or get_validated_token(token_string)
+        if cached is not None:
+            return cached
+
         try:
             access_token = AccessToken.objects.select_related(
                 "user", "application"
@@ -169,6 +197,7 @@ class OptionalOAuth2Authentication(OAuth2Authentication):
             return None
 
         if access_token.is_valid():
+            remember_validated_token(access_token)
             return access_token.user, access_token
         return None
     
@@ -0,0 +1,163 @@
+"""
+Self-contained signed LOLA access tokens (optional, settings.LOLA_SIGNED_ACCESS_TOKENS).
+
+By default access tokens are opaque random strings that every request resolves through the
+database (or the validated-token cache, see token_cache.py). With signed tokens enabled,
+ActivityPubOAuth2Validator issues a portability token whose string carries everything the
+authentication and the LOLA gate need:
+
+    lola.<django.core.signing payload>
+
+    tid  AccessToken id            bid  TokenActorBinding id     act  bound actor id
+    sub  user id                   app  application id           scp  scope
+    exp  expiry (ISO 8601)         snp  migration snapshot       sat  snapshot time
+
+The payload is signed with SECRET_KEY (HMAC-SHA256), so OptionalOAuth2Authentication and
+lola_access_error verify scope, expiry and binding in memory. The migration snapshot is taken
+when the token is issued rather than on its first request (see snapshots.py).
+
+The token is still stored as an ordinary AccessToken row, so refresh, revocation and the
+opaque code path keep working and any signed token the in-memory check rejects is validated
+against the database as usual.
+
+Revocation is durable: DOT revokes a token by deleting its row, and the binding row goes with it
+(or is deleted on its own). A signed token is only accepted while its binding row exists. That is
+checked with one query and remembered as "live" in the validated-token cache backend (see
+token_cache.py) for at most settings.LOLA_TOKEN_CACHE_TTL seconds. Deleting the token or binding
+drops the entry (see signals.py), so a revocation takes effect at once in its own process (or
+everywhere with LOLA_TOKEN_CACHE_SHARED) and within the TTL elsewhere. An evicted entry only costs
+the query again; it can never bring a revoked token back.
+"""
+
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import SimpleLazyObject
+from oauth2_provider.models import get_access_token_model
+
+from ..models import TokenActorBinding
+from ..snapshots import get_migration_snapshot
+from .token_cache import DEFAULT_TOKEN_CACHE_TTL, delete_entry, get_entry, set_entry
+
+logger = logging.getLogger(__name__)
+
+SIGNED_TOKEN_PREFIX = "lola."
+SIGNING_SALT = "testbed.core.oauth.signed_tokens"
+
+
+def is_signed_token(token_string):
+    return token_string.startswith(SIGNED_TOKEN_PREFIX)
+
+
+def _live_key(token_id):
+    return f"lola:live-signed-token:{token_id}"
+
+
+def _remember_live(token_id, expires):
+    ttl = min(
+        getattr(settings, "LOLA_TOKEN_CACHE_TTL", DEFAULT_TOKEN_CACHE_TTL),
+        (expires - timezone.now()).total_seconds(),
+    )
+    if ttl > 0:
+        set_entry(_live_key(token_id), True, ttl)
+
+
+def _is_live(claims, expires):
+    """Whether the token's binding row still exists (it is deleted with the token on revocation)."""
+    if get_entry(_live_key(claims["tid"])):
+        return True
+    live = TokenActorBinding.objects.filter(pk=claims["bid"], token_id=claims["tid"]).exists()
+    if live:
+        _remember_live(claims["tid"], expires)
+    return live
+
+
+def issue_signed_token(access_token, binding):
+    """
+    Replace the string of a freshly saved portability AccessToken with a signed token.
+
+    Records the binding's migration snapshot first, so the token can carry it.
+
+    Returns:
+        The new token string (also saved on `access_token`).
+    """
+    snapshot = get_migration_snapshot(binding)
+    claims = {
+        "tid": access_token.pk,
+        "bid": binding.pk,
+        "act": binding.actor_id,
+        "sub": access_token.user_id,
+        "app": access_token.application_id,
+        "scp": access_token.scope,
+        "exp": access_token.expires.isoformat(),
+        "snp": snapshot,
+        "sat": binding.snapshot_at.isoformat(),
+    }
+    access_token.token = SIGNED_TOKEN_PREFIX + signing.dumps(claims, salt=SIGNING_SALT, compress=True)
+    access_token.save(update_fields=["token", "token_checksum"])
+    _remember_live(access_token.pk, access_token.expires)
+    return access_token.token
+
+
+def read_signed_token(token_string):
+    """The claims of a signed token whose signature is valid (expired or not), or None."""
+    if not is_signed_token(token_string):
+        return None
+    try:
+        return signing.loads(token_string[len(SIGNED_TOKEN_PREFIX):], salt=SIGNING_SALT)
+    except signing.BadSignature:
+        return None
+
+
+def authenticate_signed_token(token_string):
+    """
+    Verify a signed token in memory.
+
+    Returns:
+        (user, AccessToken) with the token's actor_binding pre-populated, or None when the token is
+        not a signed token, its signature is invalid, it has expired or it has been revoked.
+        The user is a lazy object, loaded on first use. Revocation is checked against the database
+        at most once per LOLA_TOKEN_CACHE_TTL seconds.
+    """
+    claims = read_signed_token(token_string)
+    if claims is None:
+        return None
+    expires = parse_datetime(claims["exp"])
+    if expires <= timezone.now() or not _is_live(claims, expires):
+        return None
+
+    AccessToken = get_access_token_model()
+    token = AccessToken(
+        id=claims["tid"],
+        token=token_string,
+        user_id=claims["sub"],
+        application_id=claims["app"],
+        scope=claims["scp"],
+        expires=expires,
+    )
+    token._state.adding = False
+    token._state.db = "default"
+    token.actor_binding = TokenActorBinding(
+        id=claims["bid"],
+        actor_id=claims["act"],
+        snapshot=claims["snp"],
+        snapshot_at=parse_datetime(claims["sat"]),
+    )
+    token.actor_binding._state.adding = False
+    token.actor_binding._state.db = "default"
+
+    user = SimpleLazyObject(lambda: get_user_model().objects.get(pk=claims["sub"]))
+    return user, token
+
+
+def revoke_signed_token(token_string):
+    """Forget that a signed token is live, so the next request re-checks it (no-op for opaque tokens)."""
+    claims = read_signed_token(token_string)
+    if claims is None:
+        return
+    delete_entry(_live_key(claims["tid"]))
+    logger.info("Signed LOLA token revoked: token_id=%s", claims["tid"])
@@ -0,0 +1,194 @@
+"""
+Cache of validated access tokens for OptionalOAuth2Authentication.
+
+Without it every authenticated LOLA request loads the AccessToken (django-oauth-toolkit's
+validator) and then its TokenActorBinding (the LOLA gate, plus the migration snapshot). A
+validated token is remembered by the SHA-256 of its raw string, never the string itself, as
+
+    (token id, user id, application id, scope, expires, binding)
+
+where binding is (binding id, bound actor id, snapshot, snapshot_at) or None. A hit rebuilds the
+AccessToken and its binding without a query, so the auth + LOLA gate path is query-free on a warm
+cache; the user is loaded only if something reads request.user.
+
+- Expiry is honored exactly: an entry is only used while its token is unexpired, and lives at
+  most settings.LOLA_TOKEN_CACHE_TTL seconds.
+- Deleting (DOT revokes by deleting) or saving a token or its binding drops its entry (see signals.py).
+- The default backend is a bounded in-process LRU (settings.LOLA_TOKEN_CACHE_SIZE entries). A
+  revocation only clears the entry of the process it happens in, so other processes may accept a
+  revoked token for up to LOLA_TOKEN_CACHE_TTL seconds. Set LOLA_TOKEN_CACHE_SHARED to keep the
+  entries in Django's cache instead, where one delete reaches every process.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from oauth2_provider.models import get_access_token_model
+
+from ..models import TokenActorBinding
+
+DEFAULT_TOKEN_CACHE_TTL = 60
+DEFAULT_TOKEN_CACHE_SIZE = 1024
+
+
+class CachedBinding(NamedTuple):
+    binding_id: int
+    actor_id: int
+    snapshot: object     # dict of high-water marks, or None (see snapshots.py)
+    snapshot_at: object  # datetime or None
+
+
+class ValidatedToken(NamedTuple):
+    token_id: int
+    user_id: int
+    application_id: int
+    scope: str
+    expires: object        # datetime
+    binding: CachedBinding  # None for a token without a TokenActorBinding
+
+
+class LocalTokenCache:
+    """Thread-safe LRU of (value, deadline) entries with a per-entry time to live."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, deadline = entry
+            if deadline <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_token_cache = LocalTokenCache(getattr(settings, "LOLA_TOKEN_CACHE_SIZE", DEFAULT_TOKEN_CACHE_SIZE))
+
+
+def _shared():
+    return getattr(settings, "LOLA_TOKEN_CACHE_SHARED", False)
+
+
+def _key(token_string):
+    return f"lola:token:{hashlib.sha256(token_string.encode('utf-8')).hexdigest()}"
+
+
+def get_entry(key):
+    """Read an entry from the configured backend (local LRU or Django's cache)."""
+    return cache.get(key) if _shared() else local_token_cache.get(key)
+
+
+def set_entry(key, value, ttl):
+    if _shared():
+        cache.set(key, value, ttl)
+    else:
+        local_token_cache.set(key, value, ttl)
+
+
+def delete_entry(key):
+    if _shared():
+        cache.delete(key)
+    else:
+        local_token_cache.delete(key)
+
+
+def get_validated_token(token_string):
+    """
+    Rebuild the (user, AccessToken) pair of a cached, still unexpired token, or return None.
+
+    The AccessToken's `actor_binding` is pre-populated (or known to be missing), so the LOLA gate
+    reads it without a query. The user is a lazy object, loaded on first use.
+    """
+    entry = get_entry(_key(token_string))
+    if entry is None:
+        return None
+    if entry.expires <= timezone.now():
+        invalidate_validated_token(token_string)
+        return None
+
+    AccessToken = get_access_token_model()
+    token = AccessToken(
+        id=entry.token_id,
+        token=token_string,
+        user_id=entry.user_id,
+        application_id=entry.application_id,
+        scope=entry.scope,
+        expires=entry.expires,
+    )
+    token._state.adding = False
+    token._state.db = "default"
+    binding_relation = AccessToken._meta.get_field("actor_binding")
+    if entry.binding is None:
+        binding_relation.set_cached_value(token, None)
+    else:
+        binding = entry.binding
+        token.actor_binding = TokenActorBinding(
+            id=binding.binding_id,
+            actor_id=binding.actor_id,
+            snapshot=binding.snapshot,
+            snapshot_at=binding.snapshot_at,
+        )
+        token.actor_binding._state.adding = False
+        token.actor_binding._state.db = "default"
+
+    user = SimpleLazyObject(lambda: get_user_model().objects.get(pk=entry.user_id))
+    return user, token
+
+
+def remember_validated_token(token):
+    """Cache a token that has just been validated against the database, with its binding (one query)."""
+    ttl = min(
+        getattr(settings, "LOLA_TOKEN_CACHE_TTL", DEFAULT_TOKEN_CACHE_TTL),
+        (token.expires - timezone.now()).total_seconds(),
+    )
+    if ttl <= 0:
+        return
+    try:
+        binding = token.actor_binding
+    except TokenActorBinding.DoesNotExist:
+        binding = None
+    entry = ValidatedToken(
+        token.pk,
+        token.user_id,
+        token.application_id,
+        token.scope,
+        token.expires,
+        None if binding is None else CachedBinding(
+            binding.pk, binding.actor_id, binding.snapshot, binding.snapshot_at
+        ),
+    )
+    set_entry(_key(token.token), entry, ttl)
+
+
+def invalidate_validated_token(token_string):
+    """Drop the cached validation of a token (on revocation, deletion or change)."""
+    delete_entry(_key(token_string))
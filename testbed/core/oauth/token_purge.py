@@ -0,0 +1,209 @@
+"""
+Purging of expired OAuth rows (AccessToken, RefreshToken, IDToken, Grant) and their TokenActorBindings.
+
+django-oauth-toolkit never deletes expired rows on its own, so every authorization and refresh
+leaves rows behind and the token tables, their indexes and the binding table grow without bound.
+purge_expired_tokens() deletes what can no longer be used, with the same rules as DOT's
+cleartokens command:
+
+- refresh tokens revoked, or whose access token expired, more than REFRESH_TOKEN_EXPIRE_SECONDS ago
+- access tokens that have expired and no refresh token points to (their bindings cascade)
+- ID tokens without an access token, and grants, once expired
+- bindings of expired access tokens that are kept for their refresh token: an expired token never
+  passes the LOLA gate again, and a refresh issues a new token with its own binding
+
+Rows are deleted in bounded batches of primary keys, each in its own short transaction, so the
+purge never holds locks on a large part of a table and can run next to live traffic. Batches
+walk the primary key upwards (keyset pagination) instead of re-counting the remaining rows.
+
+Rows are deleted with QuerySet.delete(), so their signal handlers run. The TokenActorBinding handler
+(signals.invalidate_binding_token_cache) skips its per-row token lookup and cache work while a purge
+batch runs (see purging_bindings): every purged binding belongs to an expired token, which the
+validated-token cache (plain or signed) never serves again since it honors expiry on its own, and
+a purged access token's own handler drops its entries. Bindings deleted with their access tokens
+are not counted separately.
+
+A dry run counts each kind of row on its own, before anything is deleted. Rows that only become
+purgeable once earlier kinds are deleted in the same run (access tokens whose refresh token goes
+first, ID tokens whose access token goes) are not counted, so a real run may delete more.
+
+The purge runs from `manage.py purge_expired_tokens` or, with settings.LOLA_TOKEN_PURGE_INTERVAL
+set, every that many seconds on a daemon thread of the web process (start_token_purge_scheduler).
+Both also purge expired migration export jobs (see export_jobs.purge_expired_export_jobs).
+"""
+
+import logging
+import threading
+import time
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.utils import timezone
+from oauth2_provider.models import (
+    get_access_token_model,
+    get_grant_model,
+    get_id_token_model,
+    get_refresh_token_model,
+)
+from oauth2_provider.settings import oauth2_settings
+
+from ..models import TokenActorBinding
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PURGE_BATCH_SIZE = 1000
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+# Whether the current thread is deleting a purge batch (see purging_bindings)
+_purge_state = threading.local()
+
+
+class PurgeResult(NamedTuple):
+    label: str
+    rows: int        # rows deleted (or, in a dry run, that would be deleted)
+    batches: int
+    seconds: float
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def purge_targets(now=None):
+    """
+    The (label, model, Q) of every kind of purgeable row, in deletion order.
+
+    Refresh tokens go first, so the access tokens they were keeping come up in the same run.
+    """
+    now = now or timezone.now()
+    AccessToken = get_access_token_model()
+    targets = []
+
+    refresh_expire_seconds = oauth2_settings.REFRESH_TOKEN_EXPIRE_SECONDS
+    if refresh_expire_seconds:
+        if not isinstance(refresh_expire_seconds, timedelta):
+            refresh_expire_seconds = timedelta(seconds=refresh_expire_seconds)
+        refresh_expire_at = now - refresh_expire_seconds
+        targets += [
+            ("revoked refresh tokens", get_refresh_token_model(), models.Q(revoked__lt=refresh_expire_at)),
+            (
+                "expired refresh tokens",
+                get_refresh_token_model(),
+                models.Q(access_token__expires__lt=refresh_expire_at),
+            ),
+        ]
+
+    targets += [
+        ("expired access tokens", AccessToken, models.Q(refresh_token__isnull=True, expires__lt=now)),
+        ("expired ID tokens", get_id_token_model(), models.Q(access_token__isnull=True, expires__lt=now)),
+        ("expired grants", get_grant_model(), models.Q(expires__lt=now)),
+        ("bindings of expired tokens", TokenActorBinding, models.Q(token__expires__lt=now)),
+    ]
+    return targets
+
+
+def purging_bindings():
+    """Whether this thread is deleting a purge batch, whose bindings all belong to expired tokens."""
+    return getattr(_purge_state, "active", False)
+
+
+def _delete_batch(model, query, ids):
+    # The condition is applied again: a row may have been refreshed since the batch was selected
+    with transaction.atomic():
+        _purge_state.active = True
+        try:
+            _, per_model = model.objects.filter(query, pk__in=ids).delete()
+        finally:
+            _purge_state.active = False
+        return per_model.get(model._meta.label, 0)
+
+
+def purge_rows(label, model, query, batch_size=DEFAULT_PURGE_BATCH_SIZE, dry_run=False, pause=0):
+    """
+    Delete the rows of `model` matching `query` in batches of `batch_size` primary keys.
+
+    Args:
+        pause: seconds to sleep between batches, to leave room for other writers
+
+    Returns:
+        A PurgeResult. A dry run counts the matching rows without deleting anything.
+    """
+    started = time.monotonic()
+    queryset = model.objects.filter(query)
+    if dry_run:
+        rows = queryset.count()
+        return PurgeResult(label, rows, 0, time.monotonic() - started)
+
+    rows = batches = 0
+    last_pk = None
+    while True:
+        page = queryset.order_by("pk")
+        if last_pk is not None:
+            page = page.filter(pk__gt=last_pk)
+        ids = list(page.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            break
+        rows += _delete_batch(model, query, ids)
+        batches += 1
+        last_pk = ids[-1]
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    result = PurgeResult(label, rows, batches, time.monotonic() - started)
+    logger.info(
+        "Purged %s %s in %s batches (%.0f rows/s)", rows, label, batches, result.rows_per_second
+    )
+    return result
+
+
+def purge_expired_tokens(batch_size=DEFAULT_PURGE_BATCH_SIZE, dry_run=False, pause=0):
+    """Purge every kind of expired OAuth row (see purge_targets). Returns a list of PurgeResult."""
+    return [
+        purge_rows(label, model, query, batch_size=batch_size, dry_run=dry_run, pause=pause)
+        for label, model, query in purge_targets()
+    ]
+
+
+def _run_scheduled_purge(interval):
+    # Imported here: export_jobs imports PurgeResult from this module
+    from ..export_jobs import purge_expired_export_jobs
+
+    while True:
+        time.sleep(interval)
+        try:
+            purge_expired_tokens(
+                batch_size=getattr(settings, "LOLA_TOKEN_PURGE_BATCH_SIZE", DEFAULT_PURGE_BATCH_SIZE)
+            )
+            purge_expired_export_jobs()
+        except Exception:
+            logger.exception("Scheduled token purge failed")
+        finally:
+            # The thread lives as long as the process; don't keep a connection open between runs
+            connection.close()
+
+
+def start_token_purge_scheduler():
+    """
+    Purge expired tokens every settings.LOLA_TOKEN_PURGE_INTERVAL seconds on a daemon thread.
+
+    Called once from the WSGI/ASGI entry points; a no-op when the interval is 0 (the default) or
+    the scheduler is already running. Every web process runs its own schedule, which is harmless:
+    the batches of concurrent purges only delete rows the other has not deleted yet.
+    """
+    global _scheduler
+    interval = getattr(settings, "LOLA_TOKEN_PURGE_INTERVAL", 0)
+    if interval <= 0:
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = threading.Thread(
+                target=_run_scheduled_purge, args=(interval,), name="lola-token-purge", daemon=True
+            )
+            _scheduler.start()
+    return _scheduler
@@ -1,6 +1,7 @@
 import logging
 from urllib.parse import urlparse
 
+from django.conf import settings
 from oauthlib.oauth2.rfc6749.errors import InvalidRequestFatalError
 from oauth2_provider.models import get_access_token_model
 from oauth2_provider.oauth2_validators import OAuth2Validator
@@ -120,10 +121,13 @@ class ActivityPubOAuth2Validator(OAuth2Validator):
 
         Binding is skipped for any token without the portability scope.
 
+        With settings.LOLA_SIGNED_ACCESS_TOKENS the bound token is then re-issued as
+        a signed self-contained token (see oauth/signed_tokens.py).
+
         Args:
             token: OAuthLib token dict. `token["access_token"]` is the
                    final access-token string DOT has written to the DB row by
-                   the time super() returns.
+                   the time super() returns (replaced by the signed string in signed mode).
             request: OAuthLib Request object. `request.user` is the
                      authenticated Django User for authorization-code grants.
         """
@@ -185,6 +189,14 @@ class ActivityPubOAuth2Validator(OAuth2Validator):
             created,
         )
 
+        if getattr(settings, "LOLA_SIGNED_ACCESS_TOKENS", False):
+            # Optional self-contained format: re-issue the token string as a signed token carrying
+            # its scope, expiry and binding (see oauth/signed_tokens.py). The token dict is what
+            # oauthlib returns to the client, so it must hold the new string too.
+            from .signed_tokens import issue_signed_token
+
+            token["access_token"] = issue_signed_token(access_token, binding)
+
     def _resolve_bound_actor(self, request):
         """
         Resolve which source Actor a newly-issued LOLA token should be bound to.
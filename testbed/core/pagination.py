@@ -0,0 +1,270 @@
+"""
+Keyset (cursor) pagination helpers for LOLA collections.
+
+Pages are addressed by an opaque cursor that encodes the sort key of the item a page
+starts after (or ends before), so every page is a bounded
+"WHERE key < cursor ORDER BY key DESC LIMIT n" query rather than an OFFSET scan
+over the whole collection.
+
+Shared by the outbox and every LOLA collection: keyset_rows / keyset_page page a queryset,
+json_ld_builders.build_ordered_collection_json_ld / build_collection_page_json_ld render it.
+
+Wire format:
+- `?page=true`          -> first page (newest items)
+- `?page=<cursor>`      -> page relative to a cursor. The cursor is an opaque,
+                           URL-safe token carrying the travel direction and the sort key.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import NamedTuple
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.utils.dateparse import parse_datetime
+
+PAGE_PARAM = "page"
+FIRST_PAGE = "true"
+
+DIRECTION_NEXT = "next"  # towards older items
+DIRECTION_PREV = "prev"  # towards newer items
+
+DEFAULT_PAGE_SIZE = 20
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client supplies a page cursor that cannot be decoded."""
+
+
+class Cursor(NamedTuple):
+    direction: str
+    key: list
+
+
+class KeysetPage(NamedTuple):
+    queryset: QuerySet  # the page's rows, newest first
+    first_key: list     # sort key of the first / last row (None for an empty page)
+    last_key: list
+    has_more: bool      # further rows exist beyond the page in the direction of travel
+
+
+def get_page_size():
+    """Page size for LOLA collection pages (settings.LOLA_COLLECTION_PAGE_SIZE)."""
+    return getattr(settings, "LOLA_COLLECTION_PAGE_SIZE", DEFAULT_PAGE_SIZE)
+
+
+def encode_cursor(direction, key):
+    """Encode a travel direction and JSON-serializable sort key as an opaque token."""
+    payload = json.dumps({"d": direction, "k": list(key)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """
+    Decode a token produced by encode_cursor.
+
+    Raises:
+        InvalidCursor: if the token is not valid base64/JSON or has the wrong shape.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise InvalidCursor(f"Malformed page cursor: {e}") from e
+
+    if not isinstance(payload, dict):
+        raise InvalidCursor("Malformed page cursor")
+
+    direction = payload.get("d")
+    key = payload.get("k")
+    if direction not in (DIRECTION_NEXT, DIRECTION_PREV) or not isinstance(key, list):
+        raise InvalidCursor("Malformed page cursor")
+
+    return Cursor(direction, key)
+
+
+def parse_page_param(value):
+    """
+    Interpret the `page` query parameter.
+
+    Returns:
+        None for the first page (`page=true`), otherwise the decoded Cursor.
+
+    Raises:
+        InvalidCursor: for an undecodable cursor.
+    """
+    if value == FIRST_PAGE:
+        return None
+    return decode_cursor(value)
+
+
+def keyset_filter(fields, values, direction):
+    """
+    Build the row-value comparison `(f1, f2, ...) < (v1, v2, ...)` as a Q object.
+
+    Collections are ordered newest-first (all fields descending), so travelling
+    towards the next page means "strictly less than" the cursor key and travelling
+    towards the previous page means "strictly greater than".
+    """
+    lookup = "lt" if direction == DIRECTION_NEXT else "gt"
+    condition = Q()
+    for i, field in enumerate(fields):
+        equal_prefix = dict(zip(fields[:i], values[:i]))
+        condition |= Q(**equal_prefix, **{f"{field}__{lookup}": values[i]})
+    return condition
+
+
+def encode_key(values):
+    """JSON-serializable form of a sort key (datetimes as ISO 8601)."""
+    return [value.isoformat() if isinstance(value, datetime) else value for value in values]
+
+
+def decode_key(model, fields, key):
+    """
+    Convert a cursor key back into values comparable with `fields` of `model`.
+
+    Raises:
+        InvalidCursor: if the key does not match the fields' number or types.
+    """
+    if len(key) != len(fields):
+        raise InvalidCursor("Malformed page cursor key")
+
+    values = []
+    for field_name, raw in zip(fields, key):
+        field = model._meta.get_field(field_name)
+        try:
+            if isinstance(field, models.DateTimeField):
+                value = parse_datetime(raw)
+                if value is None:
+                    raise ValueError(f"{raw!r} is not a timestamp")
+            elif isinstance(field, (models.IntegerField, models.AutoField)):
+                if isinstance(raw, bool):
+                    raise ValueError(f"{raw!r} is not an integer")
+                value = int(raw)
+            else:
+                value = str(raw)
+        except (TypeError, ValueError) as e:
+            raise InvalidCursor(f"Malformed page cursor key: {e}") from e
+        values.append(value)
+    return values
+
+
+def keyset_queryset(queryset, ordering, cursor=None, limit=None):
+    """
+    The bounded query behind one page of `queryset` (see keyset_rows): the cursor filter,
+    the ordering for the direction of travel and a LIMIT of one row past the page, which
+    tells whether more rows follow. Exposed so the query can be inspected (e.g. explain()).
+
+    Raises:
+        InvalidCursor: if the cursor key does not fit `ordering`.
+    """
+    limit = limit or get_page_size()
+    direction = cursor.direction if cursor else DIRECTION_NEXT
+    if cursor is not None:
+        key = decode_key(queryset.model, ordering, cursor.key)
+        queryset = queryset.filter(keyset_filter(ordering, key, direction))
+
+    if direction == DIRECTION_NEXT:
+        queryset = queryset.order_by(*(f"-{field}" for field in ordering))
+    else:
+        queryset = queryset.order_by(*ordering)
+
+    return queryset[: limit + 1]
+
+
+def keyset_rows(queryset, ordering, cursor=None, limit=None):
+    """
+    Fetch one page of `queryset` ordered newest first by `ordering` (compared descending; the
+    last field must be unique, e.g. "id"), as a single bounded query.
+
+    Returns:
+        tuple: (rows, has_more) with rows in display order, whatever the queryset yields
+        (model instances, values() dicts, values_list() tuples).
+
+    Raises:
+        InvalidCursor: if the cursor key does not fit `ordering`.
+    """
+    limit = limit or get_page_size()
+    rows = list(keyset_queryset(queryset, ordering, cursor, limit))
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if cursor is not None and cursor.direction != DIRECTION_NEXT:
+        rows.reverse()
+    return rows, has_more
+
+
+def keyset_page(queryset, ordering, cursor=None, limit=None):
+    """
+    Paginate a collection queryset by keyset (see keyset_rows).
+
+    The page is located with a narrow query on the sort key columns only (served from the
+    collection's composite index); its rows are then returned as a lazy queryset restricted
+    to those primary keys, so callers remain free to project it (values(), select_related()).
+
+    Returns:
+        KeysetPage
+    """
+    keys, has_more = keyset_rows(queryset.values_list(*ordering, "pk"), ordering, cursor, limit)
+    page_queryset = (
+        queryset
+        .filter(pk__in=[key[-1] for key in keys])
+        .order_by(*(f"-{field}" for field in ordering))
+    )
+    return KeysetPage(
+        queryset=page_queryset,
+        first_key=encode_key(keys[0][:-1]) if keys else None,
+        last_key=encode_key(keys[-1][:-1]) if keys else None,
+        has_more=has_more,
+    )
+
+
+def page_url(collection_id, token=FIRST_PAGE, params=None):
+    """
+    URL of a collection page: the first page by default, or the page for `token`.
+
+    Collection ids carry no trailing slash while the routes do, so the slash is added
+    here to make page links resolve without an APPEND_SLASH redirect.
+
+    `params` holds query parameters that shape the collection (e.g. an activity type filter)
+    and must be carried across every page link.
+    """
+    query = {**(params or {}), PAGE_PARAM: token}
+    return f"{collection_id}/?{urlencode(query)}"
+
+
+def build_page_links(collection_id, first_key, last_key, cursor, has_more, params=None):
+    """
+    Compute the `next` / `prev` links of a page.
+
+    Args:
+        collection_id: id of the parent OrderedCollection
+        first_key / last_key: JSON-serializable sort keys of the first and last item
+            on this page (None when the page is empty)
+        cursor: the Cursor this page was requested with (None for the first page)
+        has_more: whether more items exist beyond this page in the travel direction
+        params: collection-shaping query parameters to carry on the links (see page_url)
+
+    Returns:
+        dict with optional "next" and "prev" URLs.
+    """
+    links = {}
+    if first_key is None:
+        return links
+
+    direction = cursor.direction if cursor else DIRECTION_NEXT
+
+    # Towards older items: known from has_more when travelling forward; when travelling
+    # backward we came from an older page, so it exists.
+    if direction == DIRECTION_PREV or has_more:
+        links["next"] = page_url(collection_id, encode_cursor(DIRECTION_NEXT, last_key), params)
+
+    # Towards newer items: the first page has none; a forward page came from one.
+    if cursor is not None and (direction == DIRECTION_NEXT or has_more):
+        links["prev"] = page_url(collection_id, encode_cursor(DIRECTION_PREV, first_key), params)
+
+    return links
@@ -0,0 +1,23 @@
+"""
+DRF renderers for LOLA endpoints.
+
+NDJSONRenderer lets content negotiation accept `application/x-ndjson` (or `?format=ndjson`) on
+the collection views. Their NDJSON bodies are streamed by the views themselves
+(streaming.streaming_ndjson_response); the renderer only encodes the regular Responses those
+views may still return, such as errors, as a single line.
+"""
+
+from rest_framework.renderers import BaseRenderer
+
+from .streaming import NDJSON_FORMAT, NDJSON_MEDIA_TYPE, encode_ndjson_line
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = NDJSON_MEDIA_TYPE
+    format = NDJSON_FORMAT
+    charset = None  # NDJSON is always UTF-8
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return encode_ndjson_line(data).encode("utf-8")
@@ -0,0 +1,117 @@
+"""
+Cross-request cache of rendered outbox and collection responses.
+
+Several destinations crawling the same actor request the same documents and pages. The rendered
+bytes of a response are stored in Django's cache under a key made of the response variant (path
+with page cursor and filters, renderer, scope flag, representation, compaction and base URL, see
+conditional.response_variant), the effective snapshot bound and the actor's *generation*.
+
+The generation is a per-actor counter bumped by signals on every write that can change one of the
+actor's responses (see signals.py): Note, the three activity models, Following, Followers,
+Blocked, Actor and the PortabilityOutbox M2M tables. Writes to rows other actors' responses embed
+(an actor followed, following or blocked, a liked Note) bump the generations of those actors too.
+Invalidation is one increment whatever the number of cached pages; entries of old generations are
+never read again and age out after settings.LOLA_RESPONSE_CACHE_TIMEOUT seconds. Bulk
+QuerySet.update() calls bypass the signals and must call bump_actor_generation themselves.
+
+A token's migration snapshot bounds collection rows by primary key (see snapshots.py), but every
+token has its own marks. The key holds the highest primary key among the rows a response reads
+instead: tokens whose marks admit the same rows share entries, and a write that changes which rows
+are admitted also bumps the generation.
+
+The generation is read before rendering, so a write during a render only orphans the entry.
+
+Generations live in Django's default cache, so a bump only reaches the processes sharing it. With
+the per-process local-memory default, other workers and instances keep serving their entries until
+the timeout; deployments with several processes or instances must set a shared CACHE_URL.
+"""
+
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+DEFAULT_RESPONSE_CACHE_TIMEOUT = 300
+
+
+def _generation_key(actor_id):
+    return f"lola:actor-generation:{actor_id}"
+
+
+def get_actor_generation(actor_id):
+    """The actor's current generation (created on first use)."""
+    key = _generation_key(actor_id)
+    generation = cache.get(key)
+    if generation is None:
+        # Start from the clock, not 0, so a counter evicted from the cache never reuses an old generation
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_actor_generation(actor_id):
+    """Make every cached response of an actor unreachable."""
+    try:
+        cache.incr(_generation_key(actor_id))
+    except ValueError:
+        # No counter yet: nothing was cached under it
+        cache.set(_generation_key(actor_id), time.time_ns(), None)
+
+
+def bump_actor_generations(actor_ids):
+    """Make every cached response of several actors unreachable, in one cache round trip."""
+    # A deleted counter restarts from the clock, past every generation it has handed out
+    cache.delete_many([_generation_key(actor_id) for actor_id in set(actor_ids)])
+
+
+def response_cache_key(actor_id, variant, bound=None):
+    """
+    Cache key of one response variant of an actor at its current generation.
+
+    Args:
+        bound: for a snapshot-bounded read, the highest primary key among the rows it reads (0 when
+            there are none); None for an unbounded read
+    """
+    digest = hashlib.sha256(repr((variant, bound)).encode("utf-8")).hexdigest()
+    return f"lola:response:{actor_id}:{get_actor_generation(actor_id)}:{digest}"
+
+
+def get_cached_response(key):
+    """Return (content bytes, content type) of a cached response, or None on a miss."""
+    return cache.get(key)
+
+
+def cache_response(key, response):
+    """Store a rendered response's bytes and content type."""
+    timeout = getattr(settings, "LOLA_RESPONSE_CACHE_TIMEOUT", DEFAULT_RESPONSE_CACHE_TIMEOUT)
+    cache.set(key, (response.content, response["Content-Type"]), timeout)
+
+
+class CachedResponse(Response):
+    """
+    A Response served from the response cache: rendering returns the stored bytes and content
+    type instead of running the renderer, so the response is otherwise finalized by DRF and the
+    view decorators exactly like a freshly rendered one.
+    """
+
+    def __init__(self, content, content_type):
+        self.cached_content = content
+        self.cached_content_type = content_type
+        super().__init__()
+
+    @property
+    def data(self):
+        # Only cached JSON renderings exist; decoded on access (by tests and tooling), never when serving
+        return json.loads(self.cached_content)
+
+    @data.setter
+    def data(self, value):
+        pass
+
+    @property
+    def rendered_content(self):
+        self["Content-Type"] = self.cached_content_type
+        return self.cached_content
@@ -1,7 +1,24 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from testbed.core.models import Actor
+from oauth2_provider.models import get_access_token_model
+from testbed.core.models import (
+    Actor,
+    Blocked,
+    CreateActivity,
+    FollowActivity,
+    Followers,
+    Following,
+    LikeActivity,
+    Note,
+    OutboxEntry,
+    PortabilityOutbox,
+    TokenActorBinding,
+)
+from testbed.core.oauth.signed_tokens import revoke_signed_token
+from testbed.core.oauth.token_cache import invalidate_validated_token
+from testbed.core.oauth.token_purge import purging_bindings
+from testbed.core.response_cache import bump_actor_generation, bump_actor_generations
 from testbed.core.utils.actor_utils import populate_source_actor_outbox
 import logging
 
@@ -43,3 +60,169 @@ def create_actors_for_new_users(sender, instance, created, **kwargs):
         
     except Exception as e:
         logger.error(f"Error creating/populating actors for {instance.username}: {e}")
+
+
+"""
+    Signal handlers keeping the denormalized OutboxEntry index in step with the activity tables.
+    Entries are created by PortabilityOutbox.add_activity; these cover every other write path.
+"""
+@receiver(post_save, sender=CreateActivity)
+@receiver(post_save, sender=LikeActivity)
+@receiver(post_save, sender=FollowActivity)
+def sync_outbox_entries(sender, instance, created, **kwargs):
+    # New activities are not in any outbox yet
+    if created:
+        return
+
+    OutboxEntry.objects.filter(
+        activity_type=PortabilityOutbox.activity_type_of(instance),
+        activity_id=instance.pk,
+    ).update(timestamp=instance.timestamp, visibility=instance.visibility)
+
+
+@receiver(post_delete, sender=CreateActivity)
+@receiver(post_delete, sender=LikeActivity)
+@receiver(post_delete, sender=FollowActivity)
+def delete_outbox_entries(sender, instance, **kwargs):
+    OutboxEntry.objects.filter(
+        activity_type=PortabilityOutbox.activity_type_of(instance),
+        activity_id=instance.pk,
+    ).delete()
+
+
+# Activity type held by each outbox M2M through table
+OUTBOX_THROUGH_TYPES = {
+    PortabilityOutbox._meta.get_field(field_name).remote_field.through: activity_type
+    for activity_type, field_name, _model in PortabilityOutbox.ACTIVITY_SOURCES
+}
+
+
+def prune_outbox_entries(sender, instance, action, reverse, pk_set, **kwargs):
+    # Only removals need handling; additions go through add_activity
+    if action not in ("post_remove", "post_clear"):
+        return
+
+    entries = OutboxEntry.objects.filter(activity_type=OUTBOX_THROUGH_TYPES[sender])
+    if reverse:
+        # activity.outboxes.remove(...)/clear(): instance is the activity, pk_set holds outbox ids
+        entries = entries.filter(activity_id=instance.pk)
+        if action == "post_remove":
+            entries = entries.filter(outbox_id__in=pk_set)
+    else:
+        # outbox.activities_*.remove(...)/clear(): instance is the outbox, pk_set holds activity ids
+        entries = entries.filter(outbox_id=instance.pk)
+        if action == "post_remove":
+            entries = entries.filter(activity_id__in=pk_set)
+    entries.delete()
+
+
+for through in OUTBOX_THROUGH_TYPES:
+    m2m_changed.connect(prune_outbox_entries, sender=through)
+
+
+"""
+    Signal handlers bumping the generation of the actors whose cached responses a write changes
+    (see response_cache.py): the owner of the row, and the actors whose responses embed it.
+"""
+# (model, foreign key) of the rows embedding another actor's document or reference
+ACTOR_REFERENCES = (
+    (Following, "target_actor"),
+    (Followers, "follower_actor"),
+    (Blocked, "blocked_actor"),
+    (FollowActivity, "target_actor"),
+)
+
+# (model, foreign key) of the activities embedding a Note, possibly another actor's
+NOTE_REFERENCES = (
+    (CreateActivity, "note"),
+    (LikeActivity, "note"),
+)
+
+
+def referencing_actor_ids(references, instance):
+    """Owners of the rows of `references` pointing at `instance`."""
+    actor_ids = set()
+    for model, field_name in references:
+        actor_ids.update(model.objects.filter(**{field_name: instance}).values_list("actor_id", flat=True))
+    return actor_ids
+
+
+# Also drops the actor's cached JSON-LD (see json_ld_cache.py). post_delete covers cascades (e.g.
+# deleting the user) which never call Actor.delete(); post_save also covers new rows, as some
+# databases (e.g. SQLite) can reuse a deleted actor's id.
+@receiver(post_save, sender=Actor)
+@receiver(post_delete, sender=Actor)
+def bump_actor_generation_on_actor_change(sender, instance, **kwargs):
+    bump_actor_generation(instance.pk)
+
+
+# New rows are not referenced yet. Deletions cascade to the referencing rows, whose own handlers
+# bump their owners.
+@receiver(post_save, sender=Actor)
+def bump_actor_referencing_generations(sender, instance, created, **kwargs):
+    if not created:
+        bump_actor_generations(referencing_actor_ids(ACTOR_REFERENCES, instance))
+
+
+@receiver(post_save, sender=Note)
+def bump_note_referencing_generations(sender, instance, created, **kwargs):
+    if not created:
+        bump_actor_generations(referencing_actor_ids(NOTE_REFERENCES, instance))
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+@receiver(post_save, sender=CreateActivity)
+@receiver(post_delete, sender=CreateActivity)
+@receiver(post_save, sender=LikeActivity)
+@receiver(post_delete, sender=LikeActivity)
+@receiver(post_save, sender=FollowActivity)
+@receiver(post_delete, sender=FollowActivity)
+@receiver(post_save, sender=Following)
+@receiver(post_delete, sender=Following)
+@receiver(post_save, sender=Followers)
+@receiver(post_delete, sender=Followers)
+@receiver(post_save, sender=Blocked)
+@receiver(post_delete, sender=Blocked)
+def bump_owner_generation(sender, instance, **kwargs):
+    bump_actor_generation(instance.actor_id)
+
+
+def bump_outbox_generation(sender, instance, action, reverse, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    # Either side of the M2M: the outbox and the activities in it belong to the same actor
+    bump_actor_generation(instance.actor_id)
+
+
+for through in OUTBOX_THROUGH_TYPES:
+    m2m_changed.connect(bump_outbox_generation, sender=through)
+
+
+"""
+    Signal handlers dropping cached token validations (see oauth/token_cache.py) when a token is
+    revoked (DOT deletes it), deleted or changed, or when its actor binding changes. Deletions also
+    drop the "live" entry of signed tokens (see oauth/signed_tokens.py).
+"""
+@receiver(post_save, sender=get_access_token_model())
+@receiver(post_delete, sender=get_access_token_model())
+def invalidate_token_cache(sender, instance, **kwargs):
+    invalidate_validated_token(instance.token)
+    if kwargs.get("signal") is post_delete:
+        revoke_signed_token(instance.token)
+
+
+@receiver(post_save, sender=TokenActorBinding)
+@receiver(post_delete, sender=TokenActorBinding)
+def invalidate_binding_token_cache(sender, instance, **kwargs):
+    # Purged bindings belong to expired tokens, which the caches never serve again (see token_purge.py)
+    if purging_bindings():
+        return
+    token_string = (
+        get_access_token_model().objects.filter(pk=instance.token_id).values_list("token", flat=True).first()
+    )
+    # A deleted token has already dropped its own entry
+    if token_string is not None:
+        invalidate_validated_token(token_string)
+        if kwargs.get("signal") is post_delete:
+            revoke_signed_token(token_string)
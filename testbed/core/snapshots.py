@@ -0,0 +1,83 @@
+"""
+Migration snapshots: stable LOLA collection reads for the lifetime of a portability token.
+
+A destination crawls the paginated collections of an account over many requests while the
+account keeps posting, liking and following. Keyset cursors already survive new rows, but
+totalItems drifts and items created with older sort keys (e.g. a backdated Note) land inside
+pages the crawler has already walked.
+
+The first LOLA request of a token records a high-water mark on its TokenActorBinding: the
+highest primary key of every collection table at that moment. Every collection read made with
+the token (outbox, following, followers, content, liked, blocked, migration bundle) is then
+bounded by `pk <= mark`, so the token sees the account as it was when the migration started and
+its collection pages stay stable across new rows for the lifetime of the token.
+
+Rows deleted or deactivated after the snapshot still drop out of later reads: the snapshot
+bounds additions, it does not preserve history. Responses may therefore still change, so clients
+must revalidate them (see patch_snapshot_cache_headers). A refreshed token starts a new snapshot.
+
+Marks are primary keys, so the tables must never renumber existing rows (backfill_outbox_index
+--rebuild keeps the pks of the OutboxEntry rows it keeps).
+"""
+
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from .models import Blocked, Followers, Following, LikeActivity, Note, OutboxEntry, TokenActorBinding
+
+# Tables whose rows make up the LOLA collections (the outbox through its OutboxEntry index)
+SNAPSHOT_MODELS = (OutboxEntry, Note, LikeActivity, Following, Followers, Blocked)
+
+
+def _mark_key(model):
+    return model._meta.label_lower
+
+
+def take_high_water_marks():
+    """Highest primary key of each collection table, keyed by model label (0 for an empty table)."""
+    return {
+        _mark_key(model): model.objects.aggregate(mark=Max("pk"))["mark"] or 0
+        for model in SNAPSHOT_MODELS
+    }
+
+
+def get_migration_snapshot(binding):
+    """
+    The high-water marks of a token's binding, recorded on first use.
+
+    Concurrent first requests race on a conditional UPDATE: the first snapshot written wins
+    and the others read it back.
+    """
+    if binding.snapshot is None:
+        marks, now = take_high_water_marks(), timezone.now()
+        recorded = TokenActorBinding.objects.filter(pk=binding.pk, snapshot__isnull=True).update(
+            snapshot=marks, snapshot_at=now
+        )
+        if recorded:
+            binding.snapshot, binding.snapshot_at = marks, now
+        else:
+            binding.refresh_from_db(fields=["snapshot", "snapshot_at"])
+    return binding.snapshot
+
+
+def bound_to_snapshot(queryset, snapshot):
+    """Restrict a queryset of a collection table to the rows that existed when `snapshot` was taken."""
+    if not snapshot:
+        return queryset
+    mark = snapshot.get(_mark_key(queryset.model))
+    if mark is None:
+        return queryset
+    return queryset.filter(pk__lte=mark)
+
+
+def patch_snapshot_cache_headers(response):
+    """
+    Mark a snapshot-bounded collection response as storable by the token holder only, and to be
+    revalidated (with its ETag) before each reuse: deletes, deactivations and visibility changes
+    still change it.
+    """
+    patch_cache_control(response, private=True, no_cache=True)
+    # The same URL answers differently for another token, or without one
+    patch_vary_headers(response, ("Authorization",))
+    return response
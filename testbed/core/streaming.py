@@ -0,0 +1,326 @@
+"""
+Streaming "full export" of LOLA collections.
+
+`?export=full` on a collection or outbox route returns the whole OrderedCollection with inline
+`orderedItems` in a single response instead of a `first` page link. Nothing is materialized:
+row keys are read through a server-side cursor (QuerySet.iterator(); a named cursor on
+PostgreSQL), the rows of each chunk are loaded and rendered, and the document is encoded
+incrementally into a StreamingHttpResponse. Peak memory therefore depends on
+settings.LOLA_EXPORT_CHUNK_SIZE, not on the size of the collection.
+
+The same collections are also served as NDJSON (`Accept: application/x-ndjson`, or
+`?format=ndjson`): one ActivityStreams object per line, with no collection wrapper, so importers
+can parse and store items as they arrive. NDJSON responses are always full, streamed exports.
+
+The migration bundle (views.api.migration_bundle) packs every collection of an actor as NDJSON
+members of one zip, written incrementally by iter_zip inside a read_snapshot() transaction.
+Background export jobs write the same zip to disk; file_range_response serves it with HTTP Range
+support so interrupted downloads can resume.
+
+Wire format:
+- `?export=full` -> the whole collection, streamed
+- `export` (and NDJSON) cannot be combined with `page`
+"""
+
+import json
+import os
+import re
+import time
+import zipfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.http import FileResponse, StreamingHttpResponse
+
+EXPORT_PARAM = "export"
+EXPORT_FULL = "full"
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NDJSON_FORMAT = "ndjson"
+
+DEFAULT_EXPORT_CHUNK_SIZE = 500
+
+# Encoded output is flushed to the client in blocks of about this many bytes
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+class InvalidExport(ValueError):
+    """Raised when the `export` query parameter has an unsupported value."""
+
+
+def get_export_chunk_size():
+    """Rows loaded and rendered at a time by a full export (settings.LOLA_EXPORT_CHUNK_SIZE)."""
+    return getattr(settings, "LOLA_EXPORT_CHUNK_SIZE", DEFAULT_EXPORT_CHUNK_SIZE)
+
+
+def parse_export_param(value):
+    """
+    Interpret the `export` query parameter.
+
+    Returns:
+        True for `export=full`, False when the parameter is absent.
+
+    Raises:
+        InvalidExport: for any other value.
+    """
+    if value is None:
+        return False
+    if value != EXPORT_FULL:
+        raise InvalidExport(f"export must be '{EXPORT_FULL}'")
+    return True
+
+
+def iter_chunks(iterable, size):
+    """Split an iterable into lists of at most `size` items."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def iter_queryset_chunks(queryset, ordering, chunk_size=None):
+    """
+    Walk `queryset` newest first by `ordering` (compared descending, as for keyset pages) in
+    chunks, yielding each chunk as a queryset of its rows in that order.
+
+    The primary keys are streamed from one server-side cursor; each chunk's rows are then
+    loaded by primary key, so callers can still select_related() / values() every chunk.
+    """
+    chunk_size = chunk_size or get_export_chunk_size()
+    descending = [f"-{field}" for field in ordering]
+    keys = queryset.order_by(*descending).values_list("pk", flat=True).iterator(chunk_size=chunk_size)
+    for pks in iter_chunks(keys, chunk_size):
+        yield queryset.filter(pk__in=pks).order_by(*descending)
+
+
+def iter_collection_items(queryset, ordering, build_items, auth_context, chunk_size=None):
+    """
+    Render every row of a collection queryset, chunk by chunk (see iter_queryset_chunks).
+
+    `build_items` is the same page renderer the paginated view uses. The request-scoped actor
+    memo is emptied after each chunk so it cannot grow with the collection.
+    """
+    for chunk in iter_queryset_chunks(queryset, ordering, chunk_size):
+        yield from build_items(chunk)
+        if auth_context is not None:
+            auth_context.get("actor_json_ld", {}).clear()
+
+
+def _dumps(value):
+    # Same output as DRF's JSONRenderer defaults: compact separators, UTF-8 kept as is
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":"))
+
+
+def _iter_json_fragments(document):
+    yield "{"
+    for index, (key, value) in enumerate(document.items()):
+        yield f"{',' if index else ''}{_dumps(key)}:"
+        if isinstance(value, Iterator):
+            yield "["
+            for item_index, item in enumerate(value):
+                yield f"{',' if item_index else ''}{_dumps(item)}"
+            yield "]"
+        else:
+            yield _dumps(value)
+    yield "}"
+
+
+def _buffered(fragments, buffer_size):
+    # Join small text fragments into UTF-8 blocks of about buffer_size bytes
+    buffer, buffered = [], 0
+    for fragment in fragments:
+        buffer.append(fragment)
+        buffered += len(fragment)
+        if buffered >= buffer_size:
+            yield "".join(buffer).encode("utf-8")
+            buffer, buffered = [], 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def iter_json(document, buffer_size=STREAM_BUFFER_SIZE):
+    """
+    Encode a JSON object incrementally as UTF-8 blocks.
+
+    Top-level values that are iterators (e.g. generators of collection items) are encoded as
+    arrays one element at a time; every other value is encoded in one piece.
+    """
+    return _buffered(_iter_json_fragments(document), buffer_size)
+
+
+def encode_ndjson_line(value):
+    """One NDJSON line: compact JSON (never containing a raw newline) ending in a newline."""
+    return f"{_dumps(value)}\n"
+
+
+def iter_ndjson(items, buffer_size=STREAM_BUFFER_SIZE):
+    """Encode an iterable of objects as NDJSON, in UTF-8 blocks."""
+    return _buffered((encode_ndjson_line(item) for item in items), buffer_size)
+
+
+def streaming_json_ld_response(document):
+    """
+    StreamingHttpResponse for a JSON-LD document built with lazy item iterators.
+
+    activitypub_content adds the ActivityPub content type and CORS headers, as for Responses.
+    """
+    return StreamingHttpResponse(iter_json(document), content_type="application/activity+json")
+
+
+def streaming_ndjson_response(items):
+    """StreamingHttpResponse of an iterable of JSON-LD objects, one per line."""
+    return StreamingHttpResponse(iter_ndjson(items), content_type=NDJSON_MEDIA_TYPE)
+
+
+class _ZipOutput:
+    # Write-only, unseekable file object collecting what ZipFile writes, so the archive can be
+    # handed out as it grows. Without seek(), ZipFile writes sizes in data descriptors.
+    def __init__(self):
+        self._blocks = []
+        self._position = 0
+
+    def write(self, data):
+        self._blocks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._blocks)
+        self._blocks = []
+        return data
+
+
+def iter_zip(members):
+    """
+    Write a zip archive incrementally.
+
+    Args:
+        members: iterable of (name, iterable of bytes blocks); members are consumed one after the
+            other, so later members may depend on state built while earlier ones were written.
+
+    Yields:
+        The archive's bytes as they are produced.
+    """
+    output = _ZipOutput()
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, blocks in members:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            # Sizes are unknown up front; zip64 keeps members over 4 GiB valid
+            with archive.open(info, "w", force_zip64=True) as member:
+                for block in blocks:
+                    member.write(block)
+                    if data := output.drain():
+                        yield data
+            if data := output.drain():
+                yield data
+    if data := output.drain():
+        yield data
+
+
+@contextmanager
+def read_snapshot():
+    """
+    Run the enclosed reads in one transaction that sees a single snapshot of the database, so
+    the pieces of a multi-collection export are mutually consistent.
+
+    PostgreSQL's default READ COMMITTED takes a new snapshot per statement, so the outermost
+    transaction is raised to REPEATABLE READ. SQLite transactions read from one snapshot already.
+    """
+    outermost = not connection.in_atomic_block
+    with transaction.atomic():
+        if outermost and connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+        yield
+
+
+def streaming_zip_response(chunks, filename):
+    """StreamingHttpResponse downloading the bytes of a zip archive (see iter_zip) as `filename`."""
+    response = StreamingHttpResponse(chunks, content_type="application/zip")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+class InvalidRange(ValueError):
+    """Raised when a Range header cannot be satisfied for the resource size."""
+
+
+_BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range_header(header, size):
+    """
+    Interpret an HTTP Range header (RFC 9110 section 14.2) for a resource of `size` bytes.
+
+    Only a single byte range is honoured: multiple ranges, other units and malformed headers
+    return None, meaning the whole resource is served, as the RFC allows a server to ignore Range.
+
+    Returns:
+        (start, end) inclusive byte offsets, or None for the whole resource.
+
+    Raises:
+        InvalidRange: for a well-formed range that lies outside the resource.
+    """
+    match = _BYTE_RANGE.match((header or "").strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise InvalidRange(f"Range {header} not satisfiable")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise InvalidRange(f"Range {header} not satisfiable")
+    return start, end
+
+
+def _iter_file_range(file, length, block_size=STREAM_BUFFER_SIZE):
+    try:
+        while length > 0:
+            block = file.read(min(block_size, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+    finally:
+        file.close()
+
+
+def file_range_response(request, path, filename, content_type="application/zip"):
+    """
+    Download response for a file on disk, honouring a single-range `Range` request header with
+    206 Partial Content.
+
+    Raises:
+        InvalidRange: for an unsatisfiable range (the caller answers 416).
+    """
+    size = os.path.getsize(path)
+    byte_range = parse_range_header(request.headers.get("Range"), size)
+    if byte_range is None:
+        response = FileResponse(open(path, "rb"), as_attachment=True, filename=filename, content_type=content_type)
+    else:
+        start, end = byte_range
+        file = open(path, "rb")
+        file.seek(start)
+        response = StreamingHttpResponse(_iter_file_range(file, end - start + 1), status=206, content_type=content_type)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response["Accept-Ranges"] = "bytes"
+    return response
@@ -14,6 +14,20 @@ from testbed.core.factories import (
 from testbed.core.models import Actor, User
 from testbed.core.utils.actor_utils import populate_source_actor_outbox
 
+# Rendered documents and validated tokens are cached across requests; start each test with empty
+# caches so entries keyed by ids reused between test databases never leak from one test to the next
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import caches
+    from testbed.core.oauth.token_cache import local_token_cache
+    for cache in caches.all():
+        cache.clear()
+    local_token_cache.clear()
+    yield
+    for cache in caches.all():
+        cache.clear()
+    local_token_cache.clear()
+
 # Helper function to create an isolated actor (no signals triggered)
 def create_isolated_actor(username_prefix, role=None):
     # Creates an actor without triggering signals for additional objects
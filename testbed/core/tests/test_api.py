@@ -1,15 +1,29 @@
+import io
+import json
+import zipfile
+from datetime import timedelta
+
 import pytest
 from rest_framework.test import APIClient
 from rest_framework import status
+from django.test import override_settings
 from django.urls import reverse
 from django.test import RequestFactory
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.signals import post_init
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
 from oauth2_provider.models import Application, AccessToken
-from testbed.core.models import Actor, Following, Followers
+from testbed.core.models import Actor, Blocked, ExportJob, Following, Followers, LikeActivity, Note
 from testbed.core.factories import (
     ActorFactory,
     ApplicationFactory,
     AccessTokenFactory,
+    CreateActivityFactory,
+    FollowActivityFactory,
+    NoteFactory,
 )
 from testbed.core.tests.conftest import bind_portability_token, create_isolated_actor
 from testbed.core.json_ld_utils import (
@@ -20,6 +34,7 @@ from testbed.core.json_ld_utils import (
 )
 from testbed.core.oauth.authentication import OptionalOAuth2Authentication
 from testbed.core.oauth.utils import store_token_in_session
+from testbed.core.views import api
 
 User = get_user_model()
 
@@ -56,11 +71,19 @@ def test_outbox_api_for_source_actor(mock_request):
     
     assert json_ld["id"] == build_outbox_id(actor.id, mock_request)
     assert isinstance(json_ld["totalItems"], int)
-    assert isinstance(json_ld["items"], list)
+    assert json_ld["first"] == f"{json_ld['id']}/?page=true"
+
+    # Items are served by the first OrderedCollectionPage
+    page = APIClient().get(
+        reverse("actor-outbox", kwargs={"pk": actor.id}), {"page": "true"}
+    ).data
+    assert page["type"] == "OrderedCollectionPage"
+    assert page["partOf"] == json_ld["id"]
+    assert isinstance(page["orderedItems"], list)
 
     # Check items structure if any exist
-    if json_ld["items"]:
-        for item in json_ld["items"]:
+    if page["orderedItems"]:
+        for item in page["orderedItems"]:
             assert item["@context"] == build_basic_context()
             assert "type" in item
             assert "id" in item
@@ -230,11 +253,14 @@ class TestFollowingCollectionEndpoint:
         assert data["type"] == "OrderedCollection"
         assert data["id"].endswith(f"/actors/{source_actor.id}/following")
         assert "totalItems" in data
-        assert "orderedItems" in data
+        assert data["first"] == f"{data['id']}/?page=true"
         
         # Should only include active following relationships
         assert data["totalItems"] == 2
-        assert len(data["orderedItems"]) == 2
+        page = client.get(data["first"]).data
+        assert page["type"] == "OrderedCollectionPage"
+        assert page["partOf"] == data["id"]
+        assert len(page["orderedItems"]) == 2
 
     # Validate that Following collection includes full Actor objects for local actors
     @pytest.mark.django_db
@@ -242,7 +268,7 @@ class TestFollowingCollectionEndpoint:
         source_actor, target1, target2 = self.setup_following_data()
         client = APIClient()
         
-        response = client.get(reverse("following-collection", kwargs={"pk": source_actor.id}))
+        response = client.get(reverse("following-collection", kwargs={"pk": source_actor.id}), {"page": "true"})
         data = response.data
         
         # Each item should be a complete Actor object
@@ -258,13 +284,16 @@ class TestFollowingCollectionEndpoint:
         actor_with_no_follows = create_isolated_actor("no_follows")
         client = APIClient()
         
-        response = client.get(reverse("following-collection", kwargs={"pk": actor_with_no_follows.id}))
+        url = reverse("following-collection", kwargs={"pk": actor_with_no_follows.id})
+        response = client.get(url)
         
         assert response.status_code == status.HTTP_200_OK
         
         data = response.data
         assert data["totalItems"] == 0
-        assert data["orderedItems"] == []
+        page = client.get(url, {"page": "true"}).data
+        assert page["orderedItems"] == []
+        assert "next" not in page
 
     # Verify proper ActivityPub headers for federation compatibility
     @pytest.mark.django_db
@@ -279,6 +308,51 @@ class TestFollowingCollectionEndpoint:
         assert response["Content-Type"] == "application/json"
         assert response["Access-Control-Allow-Origin"] == "*"
 
+    # Stub representation: {id, type, preferredUsername} read without loading Actor objects
+    @pytest.mark.django_db
+    def test_following_collection_stub_representation(self):
+        source_actor, target1, target2 = self.setup_following_data()
+        url = reverse("following-collection", kwargs={"pk": source_actor.id})
+
+        instantiated = []
+        def record_actor(sender, instance, **kwargs):
+            instantiated.append(instance)
+
+        post_init.connect(record_actor, sender=Actor)
+        try:
+            response = APIClient().get(url, {"representation": "stub", "page": "true"})
+        finally:
+            post_init.disconnect(record_actor, sender=Actor)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert {item["preferredUsername"] for item in response.data["orderedItems"]} == {
+            target1.username, target2.username
+        }
+        assert all(set(item) == {"id", "type", "preferredUsername"} for item in response.data["orderedItems"])
+        # Only the collection owner (resolved by @actor_required) is loaded
+        assert [actor.id for actor in instantiated] == [source_actor.id]
+
+    # IRI representation and the Prefer header
+    @pytest.mark.django_db
+    def test_following_collection_iri_representation_and_prefer_header(self):
+        source_actor, target1, target2 = self.setup_following_data()
+        url = reverse("following-collection", kwargs={"pk": source_actor.id})
+        client = APIClient()
+
+        iri_items = client.get(url, {"representation": "iri", "page": "true"}).data["orderedItems"]
+        assert sorted(iri_items) == sorted(
+            [data["id"] for data in client.get(url, {"page": "true"}).data["orderedItems"]]
+        )
+
+        response = client.get(url, {"page": "true"}, HTTP_PREFER="return=minimal")
+        assert response["Preference-Applied"] == "return=minimal"
+        assert "Prefer" in response["Vary"]
+        assert all("endpoints" not in item for item in response.data["orderedItems"])
+
+        response = client.get(url, {"representation": "compact-ish"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["error_code"] == "invalid_parameters"
+
 
 # LOLA Followers Collection Tests
 
@@ -351,7 +425,7 @@ class TestFollowersCollectionEndpoint:
         
         # Should show active followers only
         assert data["totalItems"] == 2
-        assert len(data["orderedItems"]) == 2
+        assert len(client.get(data["first"]).data["orderedItems"]) == 2
 
     # Verify that non-LOLA OAuth tokens are rejected (scope validation)
     @pytest.mark.django_db
@@ -376,7 +450,7 @@ class TestFollowersCollectionEndpoint:
         client = APIClient()
         client.credentials(HTTP_AUTHORIZATION=f'Bearer {lola_token.token}')
 
-        response = client.get(reverse("followers-collection", kwargs={"pk": target_actor.id}))
+        response = client.get(reverse("followers-collection", kwargs={"pk": target_actor.id}), {"page": "true"})
         data = response.data
         
         # Each follower should be represented as a complete Actor object
@@ -483,3 +557,989 @@ class TestOptionalAuthenticationSessionPath:
         token = AccessTokenFactory(lola_scope=True, expired=True)
         result = OptionalOAuth2Authentication()._resolve_valid_access_token(token.token)
         assert result is None
+
+
+# Keyset-paginated outbox
+
+"""
+The outbox root carries only totalItems and a `first` link; items are served as
+OrderedCollectionPages navigated through opaque `page` cursors.
+"""
+class TestOutboxPagination:
+
+    # Create an actor whose outbox holds `count` Create activities plus the actor-creation activity.
+    # Tokens below are issued to actor.user so no new user (and signal-seeded content) is created afterwards.
+    def setup_outbox(self, count, visibility="public"):
+        actor = create_isolated_actor("outbox_paging")
+        for _ in range(count):
+            note = NoteFactory(actor=actor, visibility=visibility)
+            actor.portability_outbox.add_activity(
+                CreateActivityFactory(actor=actor, note=note, visibility=visibility)
+            )
+        return actor
+
+    # Follow `next` links from the first page to the end of the outbox
+    def walk(self, client, url, link="next"):
+        pages = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            pages.append(response.data)
+            url = response.data.get(link)
+        return pages
+
+    @pytest.mark.django_db
+    def test_pages_cover_outbox_in_order_without_duplicates(self, settings):
+        settings.LOLA_COLLECTION_PAGE_SIZE = 2
+        actor = self.setup_outbox(4)
+        client = APIClient()
+
+        root = client.get(reverse("actor-outbox", kwargs={"pk": actor.id})).data
+        assert root["totalItems"] == 5
+
+        pages = self.walk(client, root["first"])
+        assert [len(page["orderedItems"]) for page in pages] == [2, 2, 1]
+        assert "prev" not in pages[0]
+        assert "next" not in pages[-1]
+
+        ids = [item["id"] for page in pages for item in page["orderedItems"]]
+        published = [item["published"] for page in pages for item in page["orderedItems"]]
+        assert len(set(ids)) == 5
+        assert published == sorted(published, reverse=True)
+
+        # Walking back from the last page returns the same pages in reverse
+        back = self.walk(client, pages[-1]["prev"], link="prev")
+        assert [page["orderedItems"] for page in back] == [
+            page["orderedItems"] for page in reversed(pages[:-1])
+        ]
+
+    @pytest.mark.django_db
+    def test_private_activities_only_paged_for_lola_token(self):
+        actor = self.setup_outbox(3, visibility="private")
+        lola_token = bind_portability_token(actor, user=actor.user)
+        url = reverse("actor-outbox", kwargs={"pk": actor.id})
+
+        public_page = APIClient().get(url, {"page": "true"}).data
+        assert len(public_page["orderedItems"]) == 1
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {lola_token.token}")
+        assert client.get(url).data["totalItems"] == 4
+        assert len(client.get(url, {"page": "true"}).data["orderedItems"]) == 4
+
+    @pytest.mark.django_db
+    def test_migration_outbox_route_is_paginated(self):
+        actor = self.setup_outbox(1)
+        lola_token = bind_portability_token(actor, user=actor.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {lola_token.token}")
+
+        response = client.get(
+            reverse("migration-outbox", kwargs={"pk": actor.id}), {"page": "true"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["type"] == "OrderedCollectionPage"
+        assert len(response.data["orderedItems"]) == 2
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", "eyJkIjoibmV4dCIsImsiOlsieCJdfQ"])
+    @pytest.mark.django_db
+    def test_malformed_cursor_returns_400(self, cursor):
+        actor = self.setup_outbox(0)
+        response = APIClient().get(
+            reverse("actor-outbox", kwargs={"pk": actor.id}), {"page": cursor}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["error_code"] == "invalid_parameters"
+
+    @pytest.mark.django_db
+    def test_type_filter_is_carried_across_pages(self, settings):
+        settings.LOLA_COLLECTION_PAGE_SIZE = 1
+        actor = self.setup_outbox(2)
+        client = APIClient()
+        url = reverse("actor-outbox", kwargs={"pk": actor.id})
+
+        root = client.get(url, {"type": "Create"}).data
+        assert root["totalItems"] == 3
+        assert "type=Create" in root["id"]
+
+        pages = self.walk(client, root["first"])
+        assert len(pages) == 3
+        assert all(page["partOf"] == root["id"] for page in pages)
+        assert {item["type"] for page in pages for item in page["orderedItems"]} == {"Create"}
+
+        assert client.get(url, {"type": "Like"}).data["totalItems"] == 0
+
+    @pytest.mark.django_db
+    def test_unknown_type_filter_returns_400(self):
+        actor = self.setup_outbox(0)
+        response = APIClient().get(
+            reverse("actor-outbox", kwargs={"pk": actor.id}), {"type": "Create,Announce"}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["error_code"] == "invalid_parameters"
+
+    @pytest.mark.django_db
+    def test_follow_objects_use_requested_representation(self):
+        actor = self.setup_outbox(0)
+        target_actor = create_isolated_actor("outbox_follow_target")
+        actor.portability_outbox.add_activity(
+            FollowActivityFactory(actor=actor, target_actor=target_actor, visibility="public")
+        )
+        url = reverse("actor-outbox", kwargs={"pk": actor.id})
+
+        def follow_object(params):
+            page = APIClient().get(url, {"page": "true", **params}).data
+            return next(item for item in page["orderedItems"] if item["type"] == "Follow")["object"]
+
+        assert follow_object({})["endpoints"]
+        assert follow_object({"representation": "iri"}) == build_actor_id(target_actor.id, RequestFactory().get("/"))
+        assert follow_object({"representation": "stub"}) == {
+            "id": build_actor_id(target_actor.id, RequestFactory().get("/")),
+            "type": "Person",
+            "preferredUsername": target_actor.username,
+        }
+
+    @pytest.mark.django_db
+    def test_migration_outbox_is_compact_by_default(self, settings):
+        settings.LOLA_COLLECTION_PAGE_SIZE = 1
+        actor = self.setup_outbox(2)
+        lola_token = bind_portability_token(actor, user=actor.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {lola_token.token}")
+
+        def nested_contexts(page):
+            return [
+                item for item in page["orderedItems"]
+                if "@context" in item or "@context" in item["object"]
+            ]
+
+        regular = client.get(reverse("actor-outbox", kwargs={"pk": actor.id}), {"page": "true"}).data
+        assert regular["@context"] == build_basic_context()
+        assert nested_contexts(regular)
+
+        migration_url = reverse("migration-outbox", kwargs={"pk": actor.id})
+        compact = client.get(migration_url, {"page": "true"}).data
+        assert compact["@context"] == build_actor_context()
+        assert not nested_contexts(compact)
+
+        # Later pages stay compact although links point at the canonical outbox URL
+        pages = self.walk(client, compact["next"])
+        assert all("compact=true" in page["id"] for page in pages)
+        assert not any(nested_contexts(page) for page in pages)
+
+        assert nested_contexts(client.get(migration_url, {"page": "true", "compact": "false"}).data)
+        assert client.get(migration_url, {"compact": "maybe"}).status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.django_db
+    def test_representation_is_carried_across_pages(self, settings):
+        settings.LOLA_COLLECTION_PAGE_SIZE = 1
+        actor = self.setup_outbox(1)
+        client = APIClient()
+
+        root = client.get(reverse("actor-outbox", kwargs={"pk": actor.id}), {"representation": "iri"}).data
+        assert "representation=iri" in root["first"]
+        assert "representation" not in root["id"]
+        assert all("representation=iri" in page["id"] for page in self.walk(client, root["first"]))
+
+
+"""
+Keyset pagination shared by the following, followers, content, liked and blocked collections
+"""
+class TestCollectionPagination:
+
+    # Seed `count` items of the collection for a fresh actor; all actors are created up front
+    # so no signal-seeded content lands in the collection afterwards
+    def setup_collection(self, name, count):
+        actor = create_isolated_actor(f"{name}_paging")
+        others = [create_isolated_actor(f"{name}_paging_{i}") for i in range(count)]
+        for other in others:
+            if name == "following":
+                Following.objects.create(actor=actor, target_actor=other)
+            elif name == "followers":
+                Followers.objects.create(actor=actor, follower_actor=other)
+            elif name == "blocked":
+                Blocked.objects.create(actor=actor, blocked_actor=other)
+            elif name == "content":
+                NoteFactory(actor=actor, visibility="public")
+            elif name == "liked":
+                LikeActivity.objects.create(
+                    actor=actor, note=NoteFactory(actor=other), visibility="public"
+                )
+        return actor
+
+    @pytest.mark.parametrize("name", ["following", "followers", "content", "liked", "blocked"])
+    @pytest.mark.django_db
+    def test_collection_pages_cover_all_items(self, name, settings):
+        settings.LOLA_COLLECTION_PAGE_SIZE = 2
+        actor = self.setup_collection(name, 5)
+        expected = {
+            "following": Following.objects.filter(actor=actor, status=Following.STATUS_ACTIVE),
+            "followers": Followers.objects.filter(actor=actor, status=Followers.STATUS_ACTIVE),
+            "blocked": Blocked.objects.filter(actor=actor, status=Blocked.STATUS_ACTIVE),
+            "content": Note.objects.filter(actor=actor),
+            "liked": LikeActivity.objects.filter(actor=actor, visibility="public"),
+        }[name]
+
+        client = APIClient()
+        token = bind_portability_token(actor, user=actor.user)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.token}")
+
+        root = client.get(f"/api/actors/{actor.id}/{name}/").data
+        assert root["type"] == "OrderedCollection"
+        assert root["totalItems"] == expected.count()
+        assert "orderedItems" not in root
+
+        pages, url = [], root["first"]
+        while url:
+            page = client.get(url).data
+            assert page["partOf"] == root["id"]
+            assert len(page["orderedItems"]) <= 2
+            pages.append(page)
+            url = page.get("next")
+
+        ids = [item["id"] for page in pages for item in page["orderedItems"]]
+        assert len(ids) == len(set(ids)) == root["totalItems"]
+
+        # Walking back from the last page revisits the same pages
+        if len(pages) > 1:
+            back, url = [], pages[-1]["prev"]
+            while url:
+                back.append(client.get(url).data["orderedItems"])
+                url = client.get(url).data.get("prev")
+            assert back == [page["orderedItems"] for page in reversed(pages[:-1])]
+
+    @pytest.mark.django_db
+    def test_stub_representation_is_paginated(self, settings):
+        settings.LOLA_COLLECTION_PAGE_SIZE = 2
+        actor = self.setup_collection("following", 3)
+        client = APIClient()
+
+        first = client.get(f"/api/actors/{actor.id}/following/", {"page": "true", "representation": "stub"}).data
+        second = client.get(first["next"]).data
+        assert "representation=stub" in first["next"]
+        items = first["orderedItems"] + second["orderedItems"]
+        assert len(items) == 3
+        assert all(set(item) == {"id", "type", "preferredUsername"} for item in items)
+
+    @pytest.mark.django_db
+    def test_cursor_from_another_collection_is_rejected(self):
+        actor = self.setup_collection("following", 3)
+        for _ in range(2):
+            note = NoteFactory(actor=actor, visibility="public")
+            actor.portability_outbox.add_activity(CreateActivityFactory(actor=actor, note=note, visibility="public"))
+        client = APIClient()
+        with override_settings(LOLA_COLLECTION_PAGE_SIZE=1):
+            outbox_cursor = client.get(reverse("actor-outbox", kwargs={"pk": actor.id}), {"page": "true"}).data
+        cursor = outbox_cursor["next"].split("page=")[1]
+
+        response = client.get(f"/api/actors/{actor.id}/following/", {"page": cursor})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["error_code"] == "invalid_parameters"
+
+
+class TestFullExport:
+
+    setup_collection = TestCollectionPagination.setup_collection
+
+    def export(self, client, url, **params):
+        response = client.get(url, {"export": "full", **params})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert response["Content-Type"] == "application/activity+json"
+        assert response["Access-Control-Allow-Origin"] == "*"
+        return json.loads(b"".join(response.streaming_content))
+
+    @pytest.mark.parametrize("name", ["following", "followers", "content", "liked", "blocked"])
+    @pytest.mark.django_db
+    def test_export_matches_paginated_items(self, name, settings):
+        settings.LOLA_EXPORT_CHUNK_SIZE = 2
+        actor = self.setup_collection(name, 5)
+        client = APIClient()
+        token = bind_portability_token(actor, user=actor.user)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.token}")
+
+        url = f"/api/actors/{actor.id}/{name}/"
+        export = self.export(client, url)
+
+        with override_settings(LOLA_COLLECTION_PAGE_SIZE=100):
+            page = client.get(url, {"page": "true"}).data
+        assert export["type"] == "OrderedCollection"
+        assert export["id"] == page["partOf"]
+        assert export["totalItems"] == len(page["orderedItems"])
+        assert export["orderedItems"] == json.loads(json.dumps(page["orderedItems"]))
+
+    @pytest.mark.django_db
+    def test_outbox_export_streams_every_activity(self, settings):
+        settings.LOLA_EXPORT_CHUNK_SIZE = 2
+        actor = create_isolated_actor("outbox_export")
+        for _ in range(4):
+            note = NoteFactory(actor=actor, visibility="public")
+            actor.portability_outbox.add_activity(CreateActivityFactory(actor=actor, note=note, visibility="public"))
+        client = APIClient()
+
+        export = self.export(client, reverse("actor-outbox", kwargs={"pk": actor.id}), type="Create")
+
+        assert export["totalItems"] == actor.portability_outbox.activity_count(activity_types=["Create"])
+        assert len(export["orderedItems"]) == export["totalItems"]
+        assert all(item["type"] == "Create" for item in export["orderedItems"])
+        assert export["id"].endswith("?type=Create")
+
+    @pytest.mark.django_db
+    def test_export_reads_rows_in_chunks(self, settings):
+        # Rows are read in chunks: one query per chunk, never the whole collection at once
+        settings.LOLA_EXPORT_CHUNK_SIZE = 2
+        actor = self.setup_collection("content", 6)
+        client = APIClient()
+        token = bind_portability_token(actor, user=actor.user)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.token}")
+
+        with CaptureQueriesContext(connection) as queries:
+            export = self.export(client, f"/api/actors/{actor.id}/content/")
+        assert len(export["orderedItems"]) == 6
+        chunk_queries = [q for q in queries.captured_queries if '"core_note"."id" IN' in q["sql"]]
+        assert len(chunk_queries) == 3
+
+    @pytest.mark.parametrize("params", [{"export": "partial"}, {"export": "full", "page": "true"}])
+    @pytest.mark.django_db
+    def test_invalid_export_is_rejected(self, params):
+        actor = create_isolated_actor("bad_export")
+        response = APIClient().get(f"/api/actors/{actor.id}/following/", params)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["error_code"] == "invalid_parameters"
+
+    @pytest.mark.django_db
+    def test_export_requires_scope_on_strict_collections(self):
+        actor = create_isolated_actor("export_scope")
+        response = APIClient().get(f"/api/actors/{actor.id}/followers/", {"export": "full"})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def ndjson(self, client, url, **params):
+        response = client.get(url, params, HTTP_ACCEPT="application/x-ndjson")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert "Accept" in response["Vary"]
+        body = b"".join(response.streaming_content).decode("utf-8")
+        assert body.endswith("\n")
+        return [json.loads(line) for line in body.splitlines()]
+
+    @pytest.mark.parametrize("name", ["following", "followers", "content", "liked", "blocked"])
+    @pytest.mark.django_db
+    def test_ndjson_streams_one_item_per_line(self, name, settings):
+        settings.LOLA_EXPORT_CHUNK_SIZE = 2
+        actor = self.setup_collection(name, 5)
+        client = APIClient()
+        token = bind_portability_token(actor, user=actor.user)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.token}")
+
+        url = f"/api/actors/{actor.id}/{name}/"
+        lines = self.ndjson(client, url)
+
+        export = self.export(client, url, compact="false")
+        assert lines == export["orderedItems"]
+
+    @pytest.mark.django_db
+    def test_outbox_ndjson_lines_are_standalone_documents(self, settings):
+        settings.LOLA_EXPORT_CHUNK_SIZE = 2
+        actor = create_isolated_actor("outbox_ndjson")
+        for _ in range(3):
+            note = NoteFactory(actor=actor, visibility="public")
+            actor.portability_outbox.add_activity(CreateActivityFactory(actor=actor, note=note, visibility="public"))
+        client = APIClient()
+
+        # Compact by default on the migration route, but NDJSON lines each keep their @context
+        lines = self.ndjson(client, reverse("migration-outbox", kwargs={"pk": actor.id}), type="Create")
+
+        assert len(lines) == actor.portability_outbox.activity_count(activity_types=["Create"])
+        assert all(line["type"] == "Create" and "@context" in line for line in lines)
+
+    @pytest.mark.django_db
+    def test_ndjson_errors_are_single_lines(self):
+        actor = create_isolated_actor("ndjson_errors")
+        response = APIClient().get(
+            f"/api/actors/{actor.id}/followers/", HTTP_ACCEPT="application/x-ndjson"
+        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert json.loads(response.content)["error_code"] == "insufficient_scope"
+
+        response = APIClient().get(
+            f"/api/actors/{actor.id}/following/", {"page": "true"}, HTTP_ACCEPT="application/x-ndjson"
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestMigrationBundle:
+
+    def download(self, client, actor):
+        response = client.get(reverse("migration-bundle", kwargs={"pk": actor.id}))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert response["Content-Type"] == "application/zip"
+        assert f"actor-{actor.id}-migration.zip" in response["Content-Disposition"]
+        return zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+
+    @pytest.mark.django_db
+    def test_bundle_holds_every_collection(self, settings):
+        settings.LOLA_EXPORT_CHUNK_SIZE = 2
+        actor = create_isolated_actor("bundle_owner")
+        friend = create_isolated_actor("bundle_friend")
+        Following.objects.create(actor=actor, target_actor=friend)
+        Followers.objects.create(actor=actor, follower_actor=friend)
+        Blocked.objects.create(
+            actor=actor,
+            blocked_actor_url="https://remote.example/users/troll",
+            blocked_actor_data={"type": "Person", "preferredUsername": "troll"},
+        )
+        NoteFactory(actor=actor, visibility="private")
+        client = APIClient()
+        token = bind_portability_token(actor, user=actor.user)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.token}")
+
+        archive = self.download(client, actor)
+
+        assert archive.namelist() == [
+            "actor.json",
+            "outbox.ndjson",
+            "following.ndjson",
+            "followers.ndjson",
+            "content.ndjson",
+            "liked.ndjson",
+            "blocked.ndjson",
+            "manifest.json",
+        ]
+        assert json.loads(archive.read("actor.json"))["id"].endswith(f"/actors/{actor.id}")
+
+        manifest = json.loads(archive.read("manifest.json"))
+        for member in manifest["members"]:
+            lines = archive.read(member["name"]).decode("utf-8").splitlines()
+            assert len(lines) == member["totalItems"]
+
+        # Members match the collection endpoints; private content is included (portability scope)
+        content = [json.loads(line) for line in archive.read("content.ndjson").splitlines()]
+        ndjson = client.get(f"/api/actors/{actor.id}/content/", HTTP_ACCEPT="application/x-ndjson")
+        assert content == [json.loads(line) for line in b"".join(ndjson.streaming_content).splitlines()]
+        assert len(content) == Note.objects.filter(actor=actor).count()
+        assert json.loads(archive.read("following.ndjson"))["id"].endswith(f"/actors/{friend.id}")
+
+    @pytest.mark.django_db
+    def test_bundle_requires_bound_portability_token(self):
+        actor = create_isolated_actor("bundle_gate")
+        other = create_isolated_actor("bundle_gate_other")
+        url = reverse("migration-bundle", kwargs={"pk": actor.id})
+
+        assert APIClient().get(url).status_code == status.HTTP_403_FORBIDDEN
+
+        client = APIClient()
+        token = bind_portability_token(other, user=other.user)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.token}")
+        response = client.get(url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert response.data["error_code"] == "actor_mismatch"
+
+
+class TestExportJobs:
+
+    def start_export(self, actor, django_capture_on_commit_callbacks):
+        client = APIClient()
+        token = bind_portability_token(actor, user=actor.user)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.token}")
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(reverse("migration-exports", kwargs={"pk": actor.id}))
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        return client, response
+
+    @pytest.mark.django_db
+    def test_export_job_renders_the_bundle_to_disk(self, settings, tmp_path, django_capture_on_commit_callbacks):
+        settings.LOLA_EXPORT_DIR = tmp_path
+        actor = create_isolated_actor("export_job")
+        NoteFactory(actor=actor, visibility="private")
+
+        client, response = self.start_export(actor, django_capture_on_commit_callbacks)
+        assert response.data["status"] == "pending"
+
+        job_status = client.get(response["Location"]).data
+        assert job_status["status"] == "complete"
+        assert job_status["itemsWritten"] == job_status["totalItems"] > 0
+
+        download = client.get(job_status["download"])
+        assert download.status_code == status.HTTP_200_OK
+        assert download["Accept-Ranges"] == "bytes"
+        body = b"".join(download.streaming_content)
+        assert len(body) == job_status["size"]
+        archive = zipfile.ZipFile(io.BytesIO(body))
+        manifest = json.loads(archive.read("manifest.json"))
+        assert sum(member["totalItems"] for member in manifest["members"]) == job_status["totalItems"]
+
+    @pytest.mark.django_db
+    def test_download_supports_ranges(self, settings, tmp_path, django_capture_on_commit_callbacks):
+        settings.LOLA_EXPORT_DIR = tmp_path
+        actor = create_isolated_actor("export_range")
+        client, response = self.start_export(actor, django_capture_on_commit_callbacks)
+        download_url = client.get(response["Location"]).data["download"]
+        full = b"".join(client.get(download_url).streaming_content)
+
+        partial = client.get(download_url, HTTP_RANGE="bytes=10-19")
+        assert partial.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert partial["Content-Range"] == f"bytes 10-19/{len(full)}"
+        assert b"".join(partial.streaming_content) == full[10:20]
+
+        suffix = client.get(download_url, HTTP_RANGE="bytes=-5")
+        assert b"".join(suffix.streaming_content) == full[-5:]
+
+        unsatisfiable = client.get(download_url, HTTP_RANGE=f"bytes={len(full)}-")
+        assert unsatisfiable.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        assert unsatisfiable["Content-Range"] == f"bytes */{len(full)}"
+
+    @pytest.mark.django_db
+    def test_jobs_are_private_to_their_actor(self, settings, tmp_path, django_capture_on_commit_callbacks):
+        settings.LOLA_EXPORT_DIR = tmp_path
+        actor = create_isolated_actor("export_owner")
+        other = create_isolated_actor("export_other")
+        _client, response = self.start_export(actor, django_capture_on_commit_callbacks)
+        job_id = response["Location"].rstrip("/").split("/")[-1]
+
+        other_client = APIClient()
+        token = bind_portability_token(other, user=other.user)
+        other_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.token}")
+        # Through its own actor the job does not exist; through the owner the binding gate refuses
+        not_found = other_client.get(reverse("migration-export-detail", kwargs={"pk": other.id, "job_id": job_id}))
+        assert not_found.status_code == status.HTTP_404_NOT_FOUND
+        assert not_found.data["error_code"] == "export_job_not_found"
+        mismatch = other_client.get(reverse("migration-export-detail", kwargs={"pk": actor.id, "job_id": job_id}))
+        assert mismatch.status_code == status.HTTP_403_FORBIDDEN
+
+    @pytest.mark.django_db
+    def test_download_before_completion_is_refused(self):
+        actor = create_isolated_actor("export_pending")
+        job = ExportJob.objects.create(actor=actor)
+        client = APIClient()
+        token = bind_portability_token(actor, user=actor.user)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.token}")
+
+        response = client.get(reverse("migration-export-download", kwargs={"pk": actor.id, "job_id": job.pk}))
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response.data["error_code"] == "export_not_ready"
+
+
+    @pytest.mark.django_db
+    def test_repeated_requests_reuse_the_actors_job(self, settings, tmp_path, django_capture_on_commit_callbacks):
+        settings.LOLA_EXPORT_DIR = tmp_path
+        actor = create_isolated_actor("export_dedupe")
+        pending = ExportJob.objects.create(actor=actor)
+        client = APIClient()
+        token = bind_portability_token(actor, user=actor.user)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.token}")
+        url = reverse("migration-exports", kwargs={"pk": actor.id})
+
+        response = client.post(url)
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response["Location"].rstrip("/").endswith(f"/{pending.pk}")
+
+        # Once complete, its file is offered until it is gone
+        pending.delete()
+        with django_capture_on_commit_callbacks(execute=True):
+            first = client.post(url)
+        second = client.post(url)
+        assert second.status_code == status.HTTP_200_OK
+        assert second["Location"] == first["Location"]
+        assert ExportJob.objects.filter(actor=actor).count() == 1
+
+    @pytest.mark.django_db
+    def test_stale_jobs_fail_and_missing_files_are_gone(self, settings, tmp_path):
+        settings.LOLA_EXPORT_DIR = tmp_path
+        actor = create_isolated_actor("export_stale")
+        long_ago = timezone.now() - timedelta(seconds=settings.LOLA_EXPORT_JOB_TIMEOUT + 1)
+        running = ExportJob.objects.create(actor=actor, status=ExportJob.STATUS_RUNNING, started_at=long_ago)
+        complete = ExportJob.objects.create(
+            actor=actor, status=ExportJob.STATUS_COMPLETE, file_path=str(tmp_path / "elsewhere.zip"),
+            completed_at=timezone.now(),
+        )
+        client = APIClient()
+        token = bind_portability_token(actor, user=actor.user)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.token}")
+
+        # The file was written by another instance (or has expired): a terminal error
+        gone = client.get(reverse("migration-export-download", kwargs={"pk": actor.id, "job_id": complete.pk}))
+        assert gone.status_code == status.HTTP_410_GONE
+        assert gone.data["error_code"] == "export_file_gone"
+
+        # A new request fails the job whose process stopped and starts a fresh one
+        response = client.post(reverse("migration-exports", kwargs={"pk": actor.id}))
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        running.refresh_from_db()
+        assert running.status == ExportJob.STATUS_FAILED
+        assert response["Location"].rstrip("/").split("/")[-1] not in {str(running.pk), str(complete.pk)}
+
+    @pytest.mark.django_db
+    def test_expired_jobs_are_purged_with_their_files(self, settings, tmp_path):
+        settings.LOLA_EXPORT_DIR = tmp_path
+        actor = create_isolated_actor("export_ttl")
+        old = timezone.now() - timedelta(seconds=settings.LOLA_EXPORT_TTL + 1)
+        expired = ExportJob.objects.create(actor=actor, status=ExportJob.STATUS_COMPLETE, completed_at=old)
+        path = tmp_path / expired.filename
+        path.write_bytes(b"zip")
+        ExportJob.objects.filter(pk=expired.pk).update(file_path=str(path))
+        recent = ExportJob.objects.create(actor=actor, status=ExportJob.STATUS_FAILED, completed_at=timezone.now())
+
+        out = io.StringIO()
+        call_command("purge_expired_tokens", stdout=out)
+        assert "expired export jobs: 1 rows deleted" in out.getvalue()
+        assert list(ExportJob.objects.values_list("pk", flat=True)) == [recent.pk]
+        assert not path.exists()
+
+
+class TestMigrationSnapshot:
+
+    setup_collection = TestCollectionPagination.setup_collection
+
+    def client_for(self, token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.token}")
+        return client
+
+    @pytest.mark.django_db
+    def test_collection_reads_are_bounded_by_the_first_request(self, settings):
+        settings.LOLA_COLLECTION_PAGE_SIZE = 2
+        actor = self.setup_collection("content", 3)
+        token = bind_portability_token(actor, user=actor.user)
+        client = self.client_for(token)
+        url = f"/api/actors/{actor.id}/content/"
+
+        first = client.get(url, {"page": "true"}).data
+        # The actor keeps posting while the destination crawls
+        NoteFactory(actor=actor, visibility="public")
+        NoteFactory(actor=actor, visibility="private")
+
+        assert client.get(url).data["totalItems"] == 3
+        assert client.get(url, {"page": "true"}).data["orderedItems"] == first["orderedItems"]
+        rest = client.get(first["next"]).data
+        assert "next" not in rest
+        ids = [item["id"] for item in first["orderedItems"] + rest["orderedItems"]]
+        assert len(set(ids)) == 3
+
+        # A new token starts a new snapshot
+        other_client = self.client_for(bind_portability_token(actor, user=actor.user))
+        assert other_client.get(url).data["totalItems"] == 5
+
+    @pytest.mark.django_db
+    def test_outbox_and_public_reads(self):
+        actor = create_isolated_actor("snapshot_outbox")
+        token = bind_portability_token(actor, user=actor.user)
+        client = self.client_for(token)
+        outbox_url = reverse("actor-outbox", kwargs={"pk": actor.id})
+
+        assert client.get(outbox_url).data["totalItems"] == 1
+        note = NoteFactory(actor=actor, visibility="public")
+        actor.portability_outbox.add_activity(CreateActivityFactory(actor=actor, note=note, visibility="public"))
+
+        assert client.get(outbox_url).data["totalItems"] == 1
+        assert len(client.get(outbox_url, {"page": "true"}).data["orderedItems"]) == 1
+        # Only portability tokens are pinned; public readers see the live outbox
+        assert APIClient().get(outbox_url).data["totalItems"] == 2
+
+    @pytest.mark.django_db
+    def test_snapshot_pages_are_private_and_revalidated(self):
+        actor = self.setup_collection("following", 2)
+        token = bind_portability_token(actor, user=actor.user)
+        url = f"/api/actors/{actor.id}/following/"
+
+        response = self.client_for(token).get(url, {"page": "true"})
+        assert "private" in response["Cache-Control"]
+        assert "no-cache" in response["Cache-Control"]
+        assert "max-age" not in response["Cache-Control"]
+        assert "Authorization" in response["Vary"]
+
+        public = APIClient().get(url, {"page": "true"})
+        assert not public.has_header("Cache-Control")
+
+
+class TestIncrementalSync:
+
+    def client_for(self, actor):
+        client = APIClient()
+        token = bind_portability_token(actor, user=actor.user)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.token}")
+        return client
+
+    # Seed an actor with one follow, one follower and one note, all dated (with anything else the
+    # actor was seeded with) well before `since`
+    def setup_synced_actor(self, since):
+        actor = create_isolated_actor("sync")
+        others = [create_isolated_actor(f"sync_{i}") for i in range(4)]
+        Following.objects.create(actor=actor, target_actor=others[0])
+        Followers.objects.create(actor=actor, follower_actor=others[1])
+        NoteFactory(actor=actor, visibility="public")
+        old = since - timedelta(days=1)
+        Following.objects.filter(actor=actor).update(created_at=old, updated_at=old)
+        Followers.objects.filter(actor=actor).update(created_at=old, updated_at=old)
+        Note.objects.filter(actor=actor).update(published=old)
+        LikeActivity.objects.filter(actor=actor).update(timestamp=old)
+        actor.portability_outbox.entries.update(timestamp=old)
+        return actor, others
+
+    @pytest.mark.django_db
+    def test_since_restricts_collections_and_is_carried_on_links(self, settings):
+        settings.LOLA_COLLECTION_PAGE_SIZE = 1
+        since = timezone.now() - timedelta(hours=1)
+        actor, others = self.setup_synced_actor(since)
+        Following.objects.create(actor=actor, target_actor=others[2])
+        Following.objects.create(actor=actor, target_actor=others[3])
+        client = self.client_for(actor)
+        # The token's snapshot is taken now; incremental reads still see later changes
+        client.get(f"/api/actors/{actor.id}/following/")
+        note = NoteFactory(actor=actor, visibility="public")
+        actor.portability_outbox.add_activity(CreateActivityFactory(actor=actor, note=note, visibility="public"))
+
+        root = client.get(f"/api/actors/{actor.id}/following/", {"since": since.isoformat()}).data
+        assert root["totalItems"] == 2
+        assert "since=" in root["id"] and "since=" in root["first"]
+        first = client.get(root["first"]).data
+        second = client.get(first["next"]).data
+        ids = {item["id"] for item in first["orderedItems"] + second["orderedItems"]}
+        assert ids == {build_actor_id(other.id, None) for other in others[2:]}
+
+        outbox = client.get(reverse("actor-outbox", kwargs={"pk": actor.id}), {"since": since.isoformat()}).data
+        assert outbox["totalItems"] == 1
+        content = client.get(f"/api/actors/{actor.id}/content/", {"since": since.isoformat()}).data
+        assert content["totalItems"] == 1
+
+    @pytest.mark.django_db
+    def test_changes_feed_reports_additions_and_removals_oldest_first(self, settings):
+        settings.LOLA_COLLECTION_PAGE_SIZE = 2
+        since = timezone.now() - timedelta(hours=1)
+        actor, others = self.setup_synced_actor(since)
+        client = self.client_for(actor)
+
+        # After the previous sync: unfollowed, followed someone new, gained a follower, posted
+        unfollowed = Following.objects.get(actor=actor)
+        unfollowed.status = Following.STATUS_INACTIVE
+        unfollowed.save()
+        Following.objects.create(actor=actor, target_actor=others[2])
+        Followers.objects.create(actor=actor, follower_actor=others[3])
+        note = NoteFactory(actor=actor, visibility="private")
+        actor.portability_outbox.add_activity(CreateActivityFactory(actor=actor, note=note, visibility="private"))
+
+        url = reverse("migration-changes", kwargs={"pk": actor.id})
+        root = client.get(url, {"since": since.isoformat()}).data
+        assert root["type"] == "OrderedCollection"
+        assert root["totalItems"] == 5
+
+        changes, page_url = [], root["first"]
+        while page_url:
+            page = client.get(page_url).data
+            assert "prev" not in page
+            changes += page["orderedItems"]
+            page_url = page.get("next")
+
+        assert len(changes) == 5
+        published = [change["published"] for change in changes]
+        assert published == sorted(published)
+        summary = {(change["type"], change["target"].rsplit("/", 1)[1], change["object"]["id"]) for change in changes}
+        assert ("Remove", "following", build_actor_id(others[0].id, None)) in summary
+        assert ("Add", "following", build_actor_id(others[2].id, None)) in summary
+        assert ("Add", "followers", build_actor_id(others[3].id, None)) in summary
+        assert {target for _type, target, _id in summary} == {"following", "followers", "content", "outbox"}
+
+    @pytest.mark.django_db
+    def test_changes_feed_pages_through_equal_change_times(self, settings):
+        settings.LOLA_COLLECTION_PAGE_SIZE = 1
+        since = timezone.now() - timedelta(hours=1)
+        actor, others = self.setup_synced_actor(since)
+        Following.objects.create(actor=actor, target_actor=others[2])
+        Followers.objects.create(actor=actor, follower_actor=others[3])
+        NoteFactory(actor=actor)
+        # Every relationship and note (two of each) changed at the same instant: only the
+        # cursor's tie-breakers order them
+        moment = timezone.now()
+        Following.objects.filter(actor=actor).update(updated_at=moment)
+        Followers.objects.filter(actor=actor).update(updated_at=moment)
+        Note.objects.filter(actor=actor).update(published=moment)
+
+        client = self.client_for(actor)
+        changes, page_url = [], reverse("migration-changes", kwargs={"pk": actor.id})
+        page_url = client.get(page_url, {"since": since.isoformat()}).data["first"]
+        while page_url:
+            page = client.get(page_url).data
+            changes += page["orderedItems"]
+            page_url = page.get("next")
+
+        keys = [(change["target"], change["object"]["id"]) for change in changes]
+        assert len(keys) == len(set(keys)) == 6
+
+
+    @pytest.mark.django_db
+    def test_changes_feed_requires_scope_and_valid_parameters(self):
+        actor = create_isolated_actor("sync_errors")
+        url = reverse("migration-changes", kwargs={"pk": actor.id})
+        assert APIClient().get(url).status_code == status.HTTP_403_FORBIDDEN
+
+        client = self.client_for(actor)
+        for params in ({"since": "yesterday"}, {"page": "not-a-cursor"}):
+            response = client.get(url, params)
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+            assert response.data["error_code"] == "invalid_parameters"
+        assert client.get(f"/api/actors/{actor.id}/following/", {"since": "2024-13-45"}).status_code == 400
+
+
+class TestConditionalRequests:
+
+    @pytest.mark.django_db
+    def test_responses_carry_validators_and_vary_on_authorization(self):
+        actor = create_isolated_actor("conditional")
+        client = APIClient()
+        for url in (
+            f"/api/actors/{actor.id}/",
+            reverse("actor-outbox", kwargs={"pk": actor.id}),
+            f"/api/actors/{actor.id}/following/",
+        ):
+            response = client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert response["ETag"].startswith('"')
+            assert "Last-Modified" in response
+            assert "Authorization" in response["Vary"]
+
+    @pytest.mark.django_db
+    def test_matching_validators_answer_304_without_building_the_body(self, monkeypatch):
+        actor = create_isolated_actor("conditional_304")
+        client = APIClient()
+        url = f"/api/actors/{actor.id}/following/"
+        first = client.get(url, {"page": "true"})
+
+        def fail(*args, **kwargs):
+            raise AssertionError("the body must not be built for a 304")
+
+        monkeypatch.setattr("testbed.core.views.api.build_collection_page_json_ld", fail)
+        response = client.get(url, {"page": "true"}, HTTP_IF_NONE_MATCH=first["ETag"])
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["ETag"] == first["ETag"]
+        assert not response.content
+
+        response = client.get(url, {"page": "true"}, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    @pytest.mark.django_db
+    def test_changes_and_variants_get_new_etags(self):
+        actor = create_isolated_actor("conditional_changes")
+        other = create_isolated_actor("conditional_other")
+        client = APIClient()
+        url = f"/api/actors/{actor.id}/following/"
+        etag = client.get(url)["ETag"]
+
+        # Other parameters and a portability token are other variants
+        assert client.get(url, {"page": "true"})["ETag"] != etag
+        assert client.get(url, {"representation": "iri"})["ETag"] != etag
+        scoped = APIClient()
+        token = bind_portability_token(actor, user=actor.user)
+        scoped.credentials(HTTP_AUTHORIZATION=f"Bearer {token.token}")
+        assert scoped.get(url)["ETag"] != etag
+
+        # Following someone, then unfollowing them, each change the collection's version
+        relationship = Following.objects.create(actor=actor, target_actor=other)
+        followed = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert followed.status_code == status.HTTP_200_OK
+        relationship.status = Following.STATUS_INACTIVE
+        relationship.save()
+        unfollowed = client.get(url, HTTP_IF_NONE_MATCH=followed["ETag"])
+        assert unfollowed.status_code == status.HTTP_200_OK
+        assert unfollowed["ETag"] not in (etag, followed["ETag"])
+
+    # Test edits and delete-plus-insert, which keep the row count and newest time, change the ETag
+    @pytest.mark.django_db
+    def test_edits_and_replacements_get_new_etags(self):
+        actor = create_isolated_actor("conditional_edits")
+        note = NoteFactory(actor=actor, content="Original content", visibility="public")
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {bind_portability_token(actor, user=actor.user).token}")
+        url = f"/api/actors/{actor.id}/content/"
+        etag = client.get(url)["ETag"]
+
+        note.content = "Edited content"
+        note.save()
+        edited = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert edited.status_code == status.HTTP_200_OK
+
+        # Same count and same newest published time as before
+        published = note.published
+        note.delete()
+        NoteFactory(actor=actor, content="Replacement", visibility="public", published=published)
+        replaced = client.get(url, HTTP_IF_NONE_MATCH=edited["ETag"])
+        assert replaced.status_code == status.HTTP_200_OK
+        assert replaced["ETag"] not in (etag, edited["ETag"])
+
+
+class TestResponseCache:
+
+    @pytest.mark.django_db
+    def test_repeated_crawls_render_once_until_the_actor_changes(self, monkeypatch):
+        actor = create_isolated_actor("response_cache")
+        other = create_isolated_actor("response_cache_other")
+        renders = []
+        real_build = api.build_ordered_collection_json_ld
+
+        def counting_build(*args, **kwargs):
+            renders.append(args)
+            return real_build(*args, **kwargs)
+
+        monkeypatch.setattr(api, "build_ordered_collection_json_ld", counting_build)
+        url = f"/api/actors/{actor.id}/following/"
+        first = APIClient().get(url)
+        again = APIClient().get(url)
+        assert len(renders) == 1
+        assert again.content == first.content
+        assert again["Content-Type"] == first["Content-Type"]
+
+        # A write bumps the actor's generation; scoped reads are another variant
+        Following.objects.create(actor=actor, target_actor=other)
+        assert APIClient().get(url).data["totalItems"] == first.data["totalItems"] + 1
+        scoped = APIClient()
+        scoped.credentials(HTTP_AUTHORIZATION=f"Bearer {bind_portability_token(actor, user=actor.user).token}")
+        scoped.get(url)
+        assert len(renders) == 3
+
+    # Test pages embedding another actor's document or Note are dropped when that object changes
+    @pytest.mark.django_db
+    def test_edits_to_embedded_objects_invalidate_cached_pages(self):
+        actor = create_isolated_actor("response_cache_embeds")
+        other = create_isolated_actor("response_cache_embedded")
+        Following.objects.create(actor=actor, target_actor=other)
+        note = NoteFactory(actor=other, content="Original content", visibility="public")
+        LikeActivity.objects.create(actor=actor, note=note, visibility="public")
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {bind_portability_token(actor, user=actor.user).token}")
+        following_url = f"/api/actors/{actor.id}/following/?page=true"
+        liked_url = f"/api/actors/{actor.id}/liked/?page=true"
+        assert other.username in client.get(following_url).content.decode()
+        assert "Original content" in client.get(liked_url).content.decode()
+
+        other.username = "response_cache_renamed"
+        other.save()
+        note.content = "Edited content"
+        note.save()
+        assert "response_cache_renamed" in client.get(following_url).content.decode()
+        assert "Edited content" in client.get(liked_url).content.decode()
+
+    # Test snapshot reads share entries when their marks admit the same rows
+    @pytest.mark.django_db
+    def test_tokens_with_different_snapshots_share_entries(self, monkeypatch):
+        actor = create_isolated_actor("response_cache_snapshots")
+        other = create_isolated_actor("response_cache_snapshots_other")
+        Following.objects.create(actor=actor, target_actor=other)
+        renders = []
+        real_build = api.build_ordered_collection_json_ld
+
+        def counting_build(*args, **kwargs):
+            renders.append(args)
+            return real_build(*args, **kwargs)
+
+        monkeypatch.setattr(api, "build_ordered_collection_json_ld", counting_build)
+        url = f"/api/actors/{actor.id}/following/"
+        first, second = APIClient(), APIClient()
+        first.credentials(HTTP_AUTHORIZATION=f"Bearer {bind_portability_token(actor, user=actor.user).token}")
+        first.get(url)
+
+        # Another actor's row moves the marks of the next snapshot, not the rows it admits
+        Following.objects.create(actor=other, target_actor=actor)
+        second.credentials(HTTP_AUTHORIZATION=f"Bearer {bind_portability_token(actor, user=actor.user).token}")
+        assert second.get(url).status_code == status.HTTP_200_OK
+        assert len(renders) == 1
@@ -0,0 +1,49 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from testbed.core import json_ld_builders
+from testbed.core.management.commands.benchmark import COLLECTION_INDEXES
+from testbed.core.models import Actor, Following
+
+
+# With the actor cache off, every Follow renders its target again without the memo, and only the
+# first one does with it. The seeded data is rolled back.
+@pytest.mark.django_db
+def test_benchmark_popular_actor_command(monkeypatch):
+    renders = []
+    real_render = json_ld_builders._render_actor_json_ld
+
+    def counting_render(actor, *args):
+        renders.append(actor.pk)
+        return real_render(actor, *args)
+
+    monkeypatch.setattr(json_ld_builders, "_render_actor_json_ld", counting_render)
+    actor_count = Actor.objects.count()
+    out = StringIO()
+    call_command("benchmark", "popular-actor", size=3, repeat=1, stdout=out)
+
+    assert "with actor memo" in out.getvalue()
+    # The popular target once per Follow, then once; the owner (its actor-creation activity) once per run
+    assert len(renders) == (3 + 1) + (1 + 1)
+    assert Actor.objects.count() == actor_count
+
+
+
+# The collection reads use the collection indexes, and fall back to the actor_id indexes without them
+@pytest.mark.django_db
+def test_benchmark_collections_command():
+    following_count = Following.objects.count()
+    out = StringIO()
+    call_command("benchmark", "collections", size=5, repeat=1, plans=True, stdout=out)
+
+    with_indexes, _, without_indexes = out.getvalue().partition("-- without indexes")
+    assert without_indexes
+    assert Following.objects.count() == following_count
+    if connection.vendor != "sqlite":
+        pytest.skip("plans of tiny tables are only predictable on SQLite")
+    for name in COLLECTION_INDEXES:
+        assert f"INDEX {name} " in with_indexes
+        assert name not in without_indexes
@@ -0,0 +1,97 @@
+import gzip
+import hashlib
+import json
+
+import pytest
+from django.core.cache import cache, caches
+from rest_framework.test import APIClient
+
+from testbed.core.middleware import compression
+from testbed.core.middleware.compression import ENCODING_BROTLI, ENCODING_GZIP, negotiate_encoding
+from testbed.core.tests.conftest import create_isolated_actor
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("", None),
+        ("identity", None),
+        ("gzip", ENCODING_GZIP),
+        ("deflate, gzip;q=0.5", ENCODING_GZIP),
+        ("gzip;q=0", None),
+        ("*", ENCODING_GZIP),
+        ("*, gzip;q=0", None),
+    ],
+)
+def test_negotiate_encoding(accept_encoding, expected, monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+def test_negotiate_encoding_prefers_brotli_when_available(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+    assert negotiate_encoding("gzip, br") == ENCODING_BROTLI
+    assert negotiate_encoding("gzip, br;q=0.5") == ENCODING_GZIP
+
+
+@pytest.mark.django_db
+class TestCompressionMiddleware:
+
+    @pytest.fixture(autouse=True)
+    def gzip_only(self, monkeypatch):
+        monkeypatch.setattr(compression, "brotli", None)
+
+    def test_actor_document_is_gzipped_with_a_suffixed_etag(self):
+        actor = create_isolated_actor("gzip_actor")
+        client = APIClient()
+        url = f"/api/actors/{actor.id}/"
+
+        plain = client.get(url)
+        response = client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        assert response["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response["Vary"]
+        assert json.loads(gzip.decompress(response.content)) == json.loads(plain.content)
+        assert response["ETag"] == plain["ETag"][:-1] + '-gzip"'
+        assert "Content-Encoding" not in plain and "Accept-Encoding" in plain["Vary"]
+
+        # The suffixed ETag still validates, and the 304 confirms the gzip variant
+        not_modified = client.get(url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"])
+        assert not_modified.status_code == 304
+        assert not_modified["ETag"] == response["ETag"]
+        assert "Accept-Encoding" in not_modified["Vary"]
+
+    def test_recurring_bodies_are_compressed_once(self, monkeypatch, settings):
+        settings.LOLA_COMPRESSION_CACHE_MIN_LENGTH = 0
+        actor = create_isolated_actor("gzip_cached")
+        calls = []
+        real_compress = compression.compress
+
+        def counting_compress(body, encoding, level=None):
+            calls.append(level)
+            return real_compress(body, encoding, level)
+
+        monkeypatch.setattr(compression, "compress", counting_compress)
+        client = APIClient()
+        bodies = [
+            client.get(f"/api/actors/{actor.id}/", HTTP_ACCEPT_ENCODING="gzip").content for _ in range(3)
+        ]
+        assert calls == [compression.BEST_LEVELS[ENCODING_GZIP]]
+        assert bodies[0] == bodies[1] == bodies[2]
+
+    def test_compressed_variants_use_their_own_cache(self, settings):
+        settings.LOLA_COMPRESSION_CACHE_MIN_LENGTH = 0
+        actor = create_isolated_actor("gzip_alias")
+        response = APIClient().get(f"/api/actors/{actor.id}/", HTTP_ACCEPT_ENCODING="gzip")
+        key = f"lola:compressed:{ENCODING_GZIP}:{hashlib.sha256(gzip.decompress(response.content)).hexdigest()}"
+        assert caches[settings.LOLA_COMPRESSION_CACHE].get(key) == response.content
+        assert cache.get(key) is None
+
+    def test_streamed_export_is_gzipped(self):
+        actor = create_isolated_actor("gzip_stream")
+        response = APIClient().get(
+            f"/api/actors/{actor.id}/outbox/", {"export": "full"}, HTTP_ACCEPT_ENCODING="gzip"
+        )
+        assert response.streaming
+        assert response["Content-Encoding"] == "gzip"
+        document = json.loads(gzip.decompress(b"".join(response.streaming_content)))
+        assert document["type"] == "OrderedCollection"
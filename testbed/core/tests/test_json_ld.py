@@ -9,6 +9,7 @@ from testbed.core.json_ld_builders import (
     build_like_activity_json_ld,
     build_follow_activity_json_ld,
     build_outbox_json_ld,
+    build_outbox_page_json_ld,
 )
 from testbed.core.factories import (
     LikeActivityFactory,
@@ -54,16 +55,16 @@ def test_activity_types_in_outbox(outbox, create_activity, like_activity, follow
     outbox.add_activity(follow_activity)
 
     # Use authenticated context to see all activities regardless of visibility
-    json_ld = build_outbox_json_ld(outbox, lola_auth_context)
+    json_ld = build_outbox_page_json_ld(outbox, lola_auth_context)
     
     # Check that we have all activity types
-    activity_types = {item["type"] for item in json_ld["items"]}
+    activity_types = {item["type"] for item in json_ld["orderedItems"]}
     assert "Create" in activity_types
     assert "Like" in activity_types
     assert "Follow" in activity_types
     
     # Check specific activities
-    for item in json_ld["items"]:
+    for item in json_ld["orderedItems"]:
         if item["type"] == "Create":
             assert "object" in item
         elif item["type"] == "Like":
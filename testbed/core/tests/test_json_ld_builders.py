@@ -1,11 +1,15 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from testbed.core.json_ld_builders import (
     build_actor_json_ld,
     build_note_json_ld,
     build_create_activity_json_ld,
     build_like_activity_json_ld,
     build_follow_activity_json_ld,
-    build_outbox_json_ld
+    build_outbox_json_ld,
+    build_outbox_page_json_ld,
+    build_relationship_items,
 )
 from testbed.core.json_ld_utils import (
     build_basic_context,
@@ -23,7 +27,7 @@ from testbed.core.factories import (
     NoteFactory
 )
 from testbed.core.tests.conftest import create_isolated_actor
-from testbed.core.models import Actor, CreateActivity, LikeActivity, FollowActivity
+from testbed.core.models import Actor, CreateActivity, LikeActivity, FollowActivity, Followers, Following
 
 # Test building JSON-LD for an actor
 @pytest.mark.django_db
@@ -186,10 +190,15 @@ def test_build_outbox_json_ld(lola_auth_context, mock_request):
     assert json_ld["type"] == "OrderedCollection"
     assert json_ld["id"] == build_outbox_id(outbox.actor.id, mock_request)
     assert isinstance(json_ld["totalItems"], int)
-    assert isinstance(json_ld["items"], list)
+    assert json_ld["first"] == f"{json_ld['id']}/?page=true"
+
+    page = build_outbox_page_json_ld(outbox, lola_auth_context)
+    assert page["type"] == "OrderedCollectionPage"
+    assert page["partOf"] == json_ld["id"]
+    assert isinstance(page["orderedItems"], list)
     
     # Verify each item has required fields
-    for item in json_ld["items"]:
+    for item in page["orderedItems"]:
         assert "@context" in item
         assert "type" in item
         assert "id" in item
@@ -198,7 +207,99 @@ def test_build_outbox_json_ld(lola_auth_context, mock_request):
         assert "visibility" in item
     
     # Verify activity types are present
-    activity_types = {item["type"] for item in json_ld["items"]}
+    activity_types = {item["type"] for item in page["orderedItems"]}
     assert "Create" in activity_types
     assert "Like" in activity_types
     assert "Follow" in activity_types
+
+# Test rendering an outbox page costs the same number of queries whatever its size
+@pytest.mark.django_db
+def test_build_outbox_page_json_ld_query_count_is_flat(lola_auth_context):
+    actor = create_isolated_actor("json_ld_query_count_test")
+    target_actor = create_isolated_actor("json_ld_query_count_target")
+    other_actor = create_isolated_actor("json_ld_query_count_other")
+    outbox = actor.portability_outbox
+
+    # One of each shape the builders render: note/actor Creates, local/remote Likes and Follows
+    def add_activities():
+        note = NoteFactory(actor=actor)
+        other_note = NoteFactory(actor=other_actor)
+        for activity in (
+            CreateActivityFactory(actor=actor, note=note),
+            CreateActivityFactory(actor=actor, note=None),
+            LikeActivityFactory(actor=actor, note=other_note),
+            LikeActivityFactory(actor=actor, remote=True),
+            FollowActivityFactory(actor=actor, target_actor=target_actor),
+            FollowActivityFactory(actor=actor, remote=True),
+        ):
+            outbox.add_activity(activity)
+
+    def count_queries():
+        with CaptureQueriesContext(connection) as queries:
+            page = build_outbox_page_json_ld(outbox, lola_auth_context, page_size=100)
+        return len(queries), len(page["orderedItems"])
+
+    add_activities()
+    small_queries, small_items = count_queries()
+
+    for _ in range(5):
+        add_activities()
+    large_queries, large_items = count_queries()
+
+    assert large_items > small_items
+    # Index scan plus one query per activity type, independent of the number of items
+    assert large_queries == small_queries <= 4
+
+# Test an actor embedded many times in one response is rendered (and fetched from cache) once
+@pytest.mark.django_db
+def test_actor_memo_renders_repeated_actor_once(mock_request):
+    from unittest.mock import patch
+    from testbed.core import json_ld_builders
+
+    actor = create_isolated_actor("json_ld_memo_test")
+    popular_actor = create_isolated_actor("json_ld_memo_popular")
+    outbox = actor.portability_outbox
+    for _ in range(5):
+        outbox.add_activity(FollowActivityFactory(actor=actor, target_actor=popular_actor))
+
+    auth_context = {
+        "is_authenticated": True,
+        "has_portability_scope": True,
+        "request": mock_request,
+        "actor_json_ld": {},
+    }
+    with patch.object(
+        json_ld_builders, "get_cached_actor_json_ld", wraps=json_ld_builders.get_cached_actor_json_ld
+    ) as cache_lookup:
+        page = build_outbox_page_json_ld(outbox, auth_context, page_size=100)
+
+    follows = [item for item in page["orderedItems"] if item["type"] == "Follow"]
+    assert len(follows) == 5
+    assert all(item["object"] == follows[0]["object"] for item in follows)
+    # One lookup per distinct actor: the popular target and the owner (actor-creation activity)
+    assert cache_lookup.call_count == 2
+    assert set(auth_context["actor_json_ld"]) == {popular_actor.id, actor.id}
+
+
+# Remote relationship actors drop their stored @context in compact mode, like other embedded remote objects
+@pytest.mark.django_db
+@pytest.mark.parametrize("model, local_field, url_field, data_field", [
+    (Following, "target_actor", "target_actor_url", "target_actor_data"),
+    (Followers, "follower_actor", "follower_actor_url", "follower_actor_data"),
+])
+def test_compact_relationship_items_strip_remote_context(model, local_field, url_field, data_field):
+    actor = create_isolated_actor(f"compact_{local_field}")
+    remote_url = f"https://remote.example/users/{local_field}"
+    model.objects.create(**{
+        "actor": actor,
+        url_field: remote_url,
+        data_field: {"@context": "https://www.w3.org/ns/activitystreams", "type": "Person"},
+    })
+    relationships = model.objects.filter(actor=actor)
+
+    def items(compact):
+        auth_context = {"compact": compact, "request": None}
+        return build_relationship_items(relationships, local_field, url_field, data_field, auth_context)
+
+    assert items(compact=True) == [{"type": "Person", "id": remote_url}]
+    assert items(compact=False)[0]["@context"] == "https://www.w3.org/ns/activitystreams"
@@ -10,6 +10,7 @@ from testbed.core.json_ld_utils import (
     build_activity_id,
     build_note_id,
     build_outbox_id,
+    get_id_factory,
 )
 
 # Test that context URLs are correct
@@ -53,3 +54,25 @@ def test_build_note_id(mock_request):
 def test_build_outbox_id(mock_request):
     outbox_id = build_outbox_id(123, mock_request)
     assert outbox_id == "http://testserver/api/actors/123/outbox"
+
+# Test the id factory validates the host once and is reused for the whole request
+def test_id_factory_memoized_per_request(mock_request):
+    from unittest.mock import patch
+
+    with patch.object(mock_request, "get_host", wraps=mock_request.get_host) as get_host:
+        ids = [build_actor_id(i, mock_request) for i in range(100)]
+        assert get_id_factory(mock_request) is get_id_factory(mock_request)
+
+    assert get_host.call_count == 1
+    assert ids[7] == "http://testserver/api/actors/7"
+    assert get_id_factory(mock_request).actor_collection(7, "following") == "http://testserver/api/actors/7/following"
+
+# Test BASE_URL mode shares one factory per process and ignores the request host
+def test_id_factory_from_base_url(mock_request, settings):
+    settings.LOLA_IDS_FROM_BASE_URL = True
+    settings.BASE_URL = "https://ap.example"
+
+    factory = get_id_factory(mock_request)
+    assert factory is get_id_factory(None)
+    assert build_note_id(5, mock_request) == "https://ap.example/api/notes/5"
+    assert factory.oauth_authorize_url == "https://ap.example/oauth/authorize/"
@@ -1,5 +1,12 @@
+from django.utils import timezone
 from rest_framework.test import APIClient
 from rest_framework import status
+from testbed.core.json_ld_cache import (
+    actor_json_ld_key,
+    cache_actor_json_ld,
+    get_cached_actor_json_ld,
+    invalidate_actor_json_ld,
+)
 from testbed.core.models import Actor
 from testbed.core.factories import (
     UserWithActorsFactory,
@@ -232,3 +239,54 @@ def test_public_vs_authenticated_response_comparison():
     for collection in ['following', 'followers', 'liked', 'blocked', 'outbox']:
         assert collection not in public_data
         assert collection in auth_data
+
+
+# Rendered Actor documents are cached per scope, and dropped when the actor changes
+def test_actor_document_is_cached_per_scope_and_invalidated_on_move():
+    client = APIClient()
+    user = UserWithActorsFactory()
+    actor = Actor.objects.get(user=user, role=Actor.ROLE_SOURCE)
+
+    public_data = client.get(f'/api/actors/{actor.id}/').json()
+    assert get_cached_actor_json_ld(actor_json_ld_key(actor.id, False, 'http://testserver')) == public_data
+    assert get_cached_actor_json_ld(actor_json_ld_key(actor.id, True, 'http://testserver')) is None
+
+    # A cached public rendering is never served to a portability-scoped request
+    token = bind_portability_token(actor, user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.token}')
+    assert 'migration' in client.get(f'/api/actors/{actor.id}/').json()
+
+    actor.record_move('old-server.example', 'old_name', timezone.now())
+    assert get_cached_actor_json_ld(actor_json_ld_key(actor.id, False, 'http://testserver')) is None
+
+    client.credentials()
+    previously = client.get(f'/api/actors/{actor.id}/').json()['previously']
+    assert previously[-1]['object'] == 'https://old-server.example/users/old_name'
+
+# Deleting an actor (here via its user's cascade) drops its cached documents
+def test_actor_document_cache_invalidated_on_delete():
+    client = APIClient()
+    user = UserWithActorsFactory()
+    actor = Actor.objects.get(user=user, role=Actor.ROLE_SOURCE)
+
+    client.get(f'/api/actors/{actor.id}/')
+    assert get_cached_actor_json_ld(actor_json_ld_key(actor.id, False, 'http://testserver')) is not None
+
+    user.delete()
+    assert get_cached_actor_json_ld(actor_json_ld_key(actor.id, False, 'http://testserver')) is None
+
+# A render that raced with an invalidation is stored under the old generation, and never served
+def test_actor_document_render_racing_an_invalidation_is_not_served():
+    client = APIClient()
+    user = UserWithActorsFactory()
+    actor = Actor.objects.get(user=user, role=Actor.ROLE_SOURCE)
+
+    # The key is taken before rendering; the actor changes while the render runs
+    stale_key = actor_json_ld_key(actor.id, False, 'http://testserver')
+    invalidate_actor_json_ld(actor.id)
+    cache_actor_json_ld(stale_key, {'stale': True})
+    assert 'stale' not in client.get(f'/api/actors/{actor.id}/').json()
+
+    # Variants have their own keys: storing one leaves the others in place
+    cache_actor_json_ld(actor_json_ld_key(actor.id, True, 'http://testserver'), {'scoped': True})
+    assert get_cached_actor_json_ld(actor_json_ld_key(actor.id, False, 'http://testserver')) is not None
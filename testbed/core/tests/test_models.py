@@ -1,7 +1,13 @@
+from datetime import timedelta
+from io import StringIO
 import pytest
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from testbed.core.models import Actor, Note, CreateActivity, LikeActivity, FollowActivity, PortabilityOutbox, Following, Followers
+from django.core.management import call_command
+from django.db import models
+from oauth2_provider.models import AccessToken, Grant, RefreshToken
+from testbed.core.export_jobs import run_export_job
+from testbed.core.models import Actor, Note, CreateActivity, LikeActivity, FollowActivity, PortabilityOutbox, OutboxEntry, Following, Followers, ExportJob, TokenActorBinding
 from testbed.core.factories import (
     UserOnlyFactory,
     ActorFactory,
@@ -11,6 +17,8 @@ from testbed.core.factories import (
     FollowActivityFactory,
     FollowingFactory,
     FollowersFactory,
+    AccessTokenFactory,
+    TokenActorBindingFactory,
 )
 from testbed.core.tests.conftest import (
     create_isolated_actor,
@@ -211,6 +219,163 @@ def test_outbox_activity_addition():
     assert activities[1] in outbox.activities_like.all()
     assert activities[2] in outbox.activities_follow.all()
 
+# Test the denormalized outbox index follows adds, updates and removals
+def test_outbox_entries_track_activities():
+    actor = create_isolated_actor("outbox_index_test")
+    outbox = actor.portability_outbox
+    note = NoteFactory(actor=actor)
+    create_activity = CreateActivityFactory(actor=actor, note=note, visibility="public")
+    like_activity = LikeActivityFactory(actor=actor, note=note, visibility="public")
+
+    outbox.add_activity(create_activity)
+    outbox.add_activity(like_activity)
+    outbox.add_activity(like_activity)  # adding twice must not duplicate the entry
+
+    entries = outbox.entries.filter(activity_id__in=[create_activity.id, like_activity.id])
+    assert set(entries.values_list("activity_type", flat=True)) == {"Create", "Like"}
+    assert outbox.activity_count(public_only=False) == outbox.entries.count()
+
+    # Visibility changes are mirrored so public reads stay correct
+    create_activity.visibility = "private"
+    create_activity.save()
+    assert outbox.entries.get(activity_type="Create", activity_id=create_activity.id).visibility == "private"
+
+    # Removing from the outbox or deleting the activity drops the entry
+    outbox.activities_like.remove(like_activity)
+    assert not outbox.entries.filter(activity_type="Like", activity_id=like_activity.id).exists()
+    create_activity.delete()
+    assert not outbox.entries.filter(activity_type="Create", activity_id=create_activity.id).exists()
+
+# Test an activity deleted between the index scan and the bulk load is skipped
+def test_outbox_load_activities_skips_deleted_activities():
+    actor = create_isolated_actor("outbox_load_deleted_test")
+    target_actor = create_isolated_actor("outbox_load_deleted_target")
+    outbox = actor.portability_outbox
+    outbox.add_activity(FollowActivityFactory(actor=actor, target_actor=target_actor))
+    entries = list(outbox.activity_entries(public_only=False))
+    assert len(entries) > 1
+    models_by_type = {activity_type: model for activity_type, _field, model in PortabilityOutbox.ACTIVITY_SOURCES}
+    models_by_type[entries[0].activity_type].objects.filter(pk=entries[0].activity_id).delete()
+
+    activities = outbox.load_activities(entries)
+    assert [(PortabilityOutbox.activity_type_of(activity), activity.id) for activity in activities] == [
+        (entry.activity_type, entry.activity_id) for entry in entries[1:]
+    ]
+
+# Test the outbox can be restricted to some activity types
+def test_outbox_entries_type_filter():
+    actor = create_isolated_actor("outbox_type_filter_test")
+    target_actor = create_isolated_actor("outbox_type_filter_target")
+    outbox = actor.portability_outbox
+    outbox.add_activity(FollowActivityFactory(actor=actor, target_actor=target_actor))
+
+    entries, activities, has_more = outbox.activity_page(public_only=False, activity_types=["Follow"])
+    assert entries and {entry.activity_type for entry in entries} == {"Follow"}
+    assert all(isinstance(activity, FollowActivity) for activity in activities)
+    assert outbox.activity_count(public_only=False, activity_types=["Follow"]) == outbox.activities_follow.count()
+
+# Test the backfill command rebuilds the index from the M2M tables
+def test_backfill_outbox_index_command():
+    actor = create_isolated_actor("outbox_backfill_test")
+    outbox = actor.portability_outbox
+    expected = outbox.activities_create.count() + outbox.activities_like.count() + outbox.activities_follow.count()
+    total = OutboxEntry.objects.count()
+
+    OutboxEntry.objects.all().delete()
+    call_command("backfill_outbox_index", batch_size=2, stdout=StringIO())
+
+    assert OutboxEntry.objects.count() == total
+    assert outbox.entries.count() == expected
+
+    # Re-running is a no-op
+    call_command("backfill_outbox_index", stdout=StringIO())
+    assert OutboxEntry.objects.count() == total
+
+# Test a rebuild keeps the ids of the rows it keeps, so migration snapshots still cover them
+def test_backfill_outbox_index_rebuild_keeps_ids():
+    actor = create_isolated_actor("outbox_rebuild_test")
+    outbox = actor.portability_outbox
+    kept = outbox.entries.order_by("pk").first()
+    snapshot = {"core.outboxentry": OutboxEntry.objects.aggregate(mark=models.Max("pk"))["mark"]}
+    before = outbox.activity_count(public_only=False, snapshot=snapshot)
+    # A stale row whose activity is no longer in the outbox, and a row with stale visibility
+    stale = OutboxEntry.objects.create(
+        outbox=outbox, activity_type="Like", activity_id=10**9, timestamp=timezone.now(), visibility="public"
+    )
+    OutboxEntry.objects.filter(pk=kept.pk).update(visibility="stale")
+
+    call_command("backfill_outbox_index", rebuild=True, stdout=StringIO())
+
+    assert not OutboxEntry.objects.filter(pk=stale.pk).exists()
+    kept.refresh_from_db()
+    assert kept.visibility != "stale"
+    assert outbox.activity_count(public_only=False, snapshot=snapshot) == before > 0
+
+
+# Test the purge command deletes expired tokens, grants and dead bindings, in batches
+def test_purge_expired_tokens_command():
+    actor = create_isolated_actor("token_purge_test")
+    live = TokenActorBindingFactory(actor=actor, token=AccessTokenFactory(lola_scope=True, user=actor.user))
+    expired = [
+        TokenActorBindingFactory(actor=actor, token=AccessTokenFactory(lola_scope=True, expired=True, user=actor.user))
+        for _ in range(3)
+    ]
+    # An expired token kept for its refresh token: the token stays, its binding goes
+    refreshable = TokenActorBindingFactory(
+        actor=actor, token=AccessTokenFactory(lola_scope=True, expired=True, user=actor.user)
+    )
+    RefreshToken.objects.create(
+        user=actor.user, application=refreshable.token.application, token="refresh-live",
+        access_token=refreshable.token,
+    )
+    RefreshToken.objects.create(
+        user=actor.user, application=live.token.application, token="refresh-revoked",
+        revoked=timezone.now() - timedelta(days=30),
+    )
+    for code, expires in (("old", timezone.now() - timedelta(minutes=1)), ("new", timezone.now() + timedelta(minutes=10))):
+        Grant.objects.create(
+            user=actor.user, application=live.token.application, code=code, expires=expires,
+            redirect_uri="https://example.com/callback",
+        )
+
+    out = StringIO()
+    call_command("purge_expired_tokens", dry_run=True, stdout=out)
+    assert "expired access tokens: 3 rows would be deleted" in out.getvalue()
+    assert AccessToken.objects.count() == 5 and TokenActorBinding.objects.count() == 5
+
+    out = StringIO()
+    call_command("purge_expired_tokens", batch_size=2, stdout=out)
+    assert "expired access tokens: 3 rows deleted in 2 batches" in out.getvalue()
+    assert set(AccessToken.objects.values_list("pk", flat=True)) == {live.token_id, refreshable.token_id}
+    assert list(TokenActorBinding.objects.all()) == [live]
+    assert list(RefreshToken.objects.values_list("token", flat=True)) == ["refresh-live"]
+    assert list(Grant.objects.values_list("code", flat=True)) == ["new"]
+    assert not any(AccessToken.objects.filter(pk=binding.token_id).exists() for binding in expired)
+
+
+# Test purged bindings skip their per-row cache work, and bindings deleted outside a purge do not
+def test_purge_skips_binding_cache_invalidation(monkeypatch):
+    from testbed.core import signals
+
+    actor = create_isolated_actor("token_purge_signals_test")
+    refreshable = TokenActorBindingFactory(
+        actor=actor, token=AccessTokenFactory(lola_scope=True, expired=True, user=actor.user)
+    )
+    RefreshToken.objects.create(
+        user=actor.user, application=refreshable.token.application, token="refresh-kept",
+        access_token=refreshable.token,
+    )
+    live = TokenActorBindingFactory(actor=actor, token=AccessTokenFactory(lola_scope=True, user=actor.user))
+    invalidated = []
+    monkeypatch.setattr(signals, "invalidate_validated_token", invalidated.append)
+
+    call_command("purge_expired_tokens", stdout=StringIO())
+    assert not TokenActorBinding.objects.filter(pk=refreshable.pk).exists()
+    assert invalidated == []
+
+    live.delete()
+    assert invalidated == [live.token.token]
+
 
 # LOLA Following Model Tests
 
@@ -484,3 +649,18 @@ def test_followers_status_field():
     followers.save()
     followers.refresh_from_db()
     assert followers.status == Followers.STATUS_ACTIVE
+
+
+@pytest.mark.django_db
+def test_failed_export_job_records_the_error(settings, tmp_path):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    settings.LOLA_EXPORT_DIR = blocker
+    job = ExportJob.objects.create(actor=create_isolated_actor("export_failure"))
+
+    run_export_job(job.pk)
+
+    job.refresh_from_db()
+    assert job.status == ExportJob.STATUS_FAILED
+    assert job.error
+    assert job.completed_at is not None
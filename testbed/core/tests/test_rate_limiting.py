@@ -0,0 +1,170 @@
+import re
+from io import StringIO
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from testbed.core.middleware.rate_limiting import (
+    BasicRateLimitingMiddleware,
+    CacheCounterStore,
+    GCRATable,
+    SharedRateLimitStorage,
+    get_rate_limit_storage,
+)
+from testbed.core.models import RateLimitCounter
+
+
+def test_gcra_allows_a_burst_then_one_request_per_interval():
+    table = GCRATable(max_keys=10)
+    # 10 requests per 300 seconds: a burst of 10, then one every 30 seconds
+    assert all(table.hit("client", 1000.0, 10, 300) == 0 for _ in range(10))
+    assert table.hit("client", 1000.0, 10, 300) == 30.0
+    # A rejected request does not consume capacity
+    assert table.hit("client", 1029.0, 10, 300) == 1.0
+    assert table.hit("client", 1030.0, 10, 300) == 0
+    assert table.hit("client", 1030.0, 10, 300) == 30.0
+
+
+def test_gcra_entries_expire_lazily():
+    table = GCRATable(max_keys=10)
+    for _ in range(10):
+        table.hit("client", 1000.0, 10, 300)
+    # Once its theoretical arrival time has passed, the client has its full burst again
+    assert all(table.hit("client", 1300.0, 10, 300) == 0 for _ in range(10))
+    assert table.hit("client", 1300.0, 10, 300) > 0
+
+
+def test_gcra_table_is_lru_bounded():
+    table = GCRATable(max_keys=3)
+    for key in ("a", "b", "c"):
+        table.hit(key, 1000.0, 1, 60)
+    assert table.hit("a", 1000.0, 1, 60) > 0  # "a" is now the most recently seen
+    table.hit("d", 1000.0, 1, 60)
+
+    assert len(table) == 3
+    assert table.hit("b", 1000.0, 1, 60) == 0  # "b" was evicted
+    assert table.hit("a", 1000.0, 1, 60) > 0
+
+
+# A flood of distinct clients costs the same per request at its end as at its start, once the
+# key table is full and every new client evicts the least recently seen one
+@pytest.mark.django_db
+def test_limiter_cost_stays_flat_under_a_client_flood(settings):
+    settings.LOLA_RATE_LIMIT_MAX_KEYS = 1000
+    out = StringIO()
+    call_command("benchmark", "rate-limit-flood", size=5000, repeat=3, stdout=out)
+
+    output = out.getvalue()
+    assert "Tracked keys: 1000 (limit 1000)" in output
+    ratio = float(re.search(r"last/first tenth cost ratio ([0-9.]+)", output).group(1))
+    # Generous bound against timing noise; a cost growing with the table would be several times higher
+    assert 0 < ratio < 3
+
+
+class TestRateLimitingMiddleware:
+
+    def make_middleware(self):
+        middleware = BasicRateLimitingMiddleware(lambda request: HttpResponse("ok"))
+        middleware.rate_limits = {'/oauth/token/': {'requests': 2, 'window': 60}}
+        middleware.default_limit = {'requests': 5, 'window': 60}
+        return middleware
+
+    def test_429_with_retry_after_when_exceeded(self):
+        middleware = self.make_middleware()
+        request = RequestFactory().post("/oauth/token/", REMOTE_ADDR="203.0.113.42")
+
+        assert [middleware(request).status_code for _ in range(3)] == [200, 200, 429]
+        response = middleware(request)
+        assert response['Retry-After'] == "30"
+        assert response['Access-Control-Expose-Headers'] == 'Retry-After'
+
+    def test_limits_are_per_client_and_endpoint(self):
+        middleware = self.make_middleware()
+        factory = RequestFactory()
+        for _ in range(2):
+            middleware(factory.post("/oauth/token/", REMOTE_ADDR="203.0.113.42"))
+
+        assert middleware(factory.post("/oauth/token/", REMOTE_ADDR="203.0.113.42")).status_code == 429
+        assert middleware(factory.post("/oauth/token/", REMOTE_ADDR="198.51.100.10")).status_code == 200
+        assert middleware(factory.get("/api/actors/1/", REMOTE_ADDR="203.0.113.42")).status_code == 200
+
+
+class CountingStore(CacheCounterStore):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def incr(self, key, delta, expires_at):
+        self.calls += 1
+        return super().incr(key, delta, expires_at)
+
+
+def test_shared_storage_enforces_one_limit_across_processes():
+    # Two workers sharing the cache; syncing every hit makes the count exact
+    workers = [SharedRateLimitStorage(CacheCounterStore(), sync_batch=1) for _ in range(2)]
+    results = [workers[i % 2].hit("client", 1000.0, 4, 60) for i in range(6)]
+
+    assert results[:4] == [0, 0, 0, 0]
+    # Rejected until the window (960-1020) ends
+    assert results[4:] == [20.0, 20.0]
+    assert workers[0].hit("client", 1020.0, 4, 60) == 0
+
+
+def test_shared_storage_batches_counter_syncs():
+    store = CountingStore()
+    storage = SharedRateLimitStorage(store, sync_interval=60, sync_batch=5)
+    assert all(storage.hit("client", 1000.0, 100, 60) == 0 for _ in range(11))
+    # The first hit of the window, then one sync per 5 hits
+    assert store.calls == 3
+
+    # Another process's hits are learned at the next sync
+    other = SharedRateLimitStorage(CacheCounterStore(), sync_batch=1)
+    for _ in range(89):
+        other.hit("client", 1000.0, 100, 60)
+    assert [storage.hit("client", 1000.0, 100, 60) for _ in range(4)] == [0, 0, 0, 0]
+    assert storage.hit("client", 1000.0, 100, 60) > 0
+
+
+def test_cache_storage_with_file_backend(settings, tmp_path):
+    settings.CACHES = {
+        **settings.CACHES,
+        "ratelimit": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": str(tmp_path)},
+    }
+    settings.LOLA_RATE_LIMIT_STORAGE = "cache"
+    settings.LOLA_RATE_LIMIT_CACHE = "ratelimit"
+    settings.LOLA_RATE_LIMIT_SYNC_BATCH = 1
+    factory = RequestFactory()
+    workers = [BasicRateLimitingMiddleware(lambda request: HttpResponse("ok")) for _ in range(2)]
+    for worker in workers:
+        worker.rate_limits = {'/oauth/token/': {'requests': 3, 'window': 300}}
+
+    statuses = [
+        workers[i % 2](factory.post("/oauth/token/", REMOTE_ADDR="203.0.113.42")).status_code
+        for i in range(4)
+    ]
+    assert statuses == [200, 200, 200, 429]
+
+
+@pytest.mark.django_db
+def test_database_storage_counts_atomically(settings):
+    settings.LOLA_RATE_LIMIT_STORAGE = "database"
+    settings.LOLA_RATE_LIMIT_SYNC_BATCH = 1
+    workers = [get_rate_limit_storage() for _ in range(2)]
+    results = [workers[i % 2].hit(("203.0.113.42", "/oauth/token/"), 1000.0, 3, 300) for i in range(4)]
+
+    assert results == [0, 0, 0, 200.0]
+    assert list(RateLimitCounter.objects.values_list("count", flat=True)) == [4]
+
+    # A new window starts a new counter; the ended one is swept
+    workers[0].store._next_sweep = 0
+    assert workers[0].hit(("203.0.113.42", "/oauth/token/"), 1200.0, 3, 300) == 0
+    assert RateLimitCounter.objects.count() == 1
+
+
+def test_unknown_storage_is_rejected(settings):
+    settings.LOLA_RATE_LIMIT_STORAGE = "redis"
+    with pytest.raises(ImproperlyConfigured):
+        get_rate_limit_storage()
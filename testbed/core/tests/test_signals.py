@@ -70,3 +70,26 @@ def test_populate_source_actor_outbox_utility(populated_source_actor):
     # Check that notes belong to the source actor
     for activity in outbox.activities_create.filter(note__isnull=False):
         assert activity.note.actor == populated_source_actor
+
+# Test that writes to an actor's data bump its response cache generation
+@pytest.mark.django_db
+def test_writes_bump_actor_generation():
+    from testbed.core.factories import CreateActivityFactory, NoteFactory
+    from testbed.core.models import Following
+    from testbed.core.response_cache import get_actor_generation
+    from testbed.core.tests.conftest import create_isolated_actor
+
+    actor = create_isolated_actor("generation")
+    other = create_isolated_actor("generation_other")
+    generations = [get_actor_generation(actor.pk)]
+
+    note = NoteFactory(actor=actor)
+    generations.append(get_actor_generation(actor.pk))
+    activity = CreateActivityFactory(actor=actor, note=note)
+    generations.append(get_actor_generation(actor.pk))
+    actor.portability_outbox.activities_create.remove(activity)
+    generations.append(get_actor_generation(actor.pk))
+    Following.objects.create(actor=actor, target_actor=other).delete()
+    generations.append(get_actor_generation(actor.pk))
+
+    assert generations == sorted(set(generations))
@@ -0,0 +1,72 @@
+import io
+import json
+import zipfile
+
+import pytest
+from testbed.core.streaming import (
+    InvalidExport,
+    InvalidRange,
+    iter_chunks,
+    iter_json,
+    iter_ndjson,
+    iter_zip,
+    parse_export_param,
+    parse_range_header,
+)
+
+
+def test_iter_json_streams_iterator_values_as_arrays():
+    document = {"type": "OrderedCollection", "totalItems": 3, "orderedItems": (i for i in range(3))}
+    blocks = list(iter_json(document, buffer_size=8))
+
+    assert len(blocks) > 1
+    assert json.loads(b"".join(blocks)) == {"type": "OrderedCollection", "totalItems": 3, "orderedItems": [0, 1, 2]}
+
+
+def test_iter_json_matches_json_for_plain_values():
+    document = {"name": "café", "items": [], "empty": iter(())}
+    assert json.loads(b"".join(iter_json(document))) == {"name": "café", "items": [], "empty": []}
+
+
+def test_iter_chunks():
+    assert list(iter_chunks(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_parse_export_param():
+    assert parse_export_param(None) is False
+    assert parse_export_param("full") is True
+    with pytest.raises(InvalidExport):
+        parse_export_param("all")
+
+
+def test_iter_ndjson_writes_one_line_per_item():
+    body = b"".join(iter_ndjson([{"content": "line\nbreak"}, "https://example.com/1"], buffer_size=4))
+    assert body.decode("utf-8").splitlines() == ['{"content":"line\\nbreak"}', '"https://example.com/1"']
+
+
+def test_iter_zip_writes_members_incrementally():
+    blocks = list(iter_zip([("a.txt", [b"hello ", b"world"]), ("b.ndjson", iter_ndjson([{"n": 1}]))]))
+
+    assert len(blocks) > 1
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(blocks)))
+    assert archive.read("a.txt") == b"hello world"
+    assert archive.read("b.ndjson") == b'{"n":1}\n'
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-9", (0, 9)),
+    ("bytes=90-", (90, 99)),
+    ("bytes=95-200", (95, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=0-1,5-6", None),  # multiple ranges: the whole file is served
+    ("items=0-1", None),
+])
+def test_parse_range_header(header, expected):
+    assert parse_range_header(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=5-2", "bytes=-0"])
+def test_parse_range_header_rejects_unsatisfiable_ranges(header):
+    with pytest.raises(InvalidRange):
+        parse_range_header(header, 100)
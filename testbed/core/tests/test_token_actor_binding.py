@@ -1,8 +1,10 @@
 import pytest
 from unittest.mock import MagicMock, patch
 
-from django.db import IntegrityError
+from django.core.cache import cache
+from django.db import IntegrityError, connection
 from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from oauth2_provider.oauth2_validators import OAuth2Validator
@@ -11,14 +13,25 @@ from rest_framework.test import APIClient
 
 from testbed.core.factories import (
     AccessTokenFactory,
+    NoteFactory,
     TokenActorBindingFactory,
     UserOnlyFactory,
 )
 from testbed.core.models import Actor, TokenActorBinding
+from testbed.core.oauth.signed_tokens import SIGNED_TOKEN_PREFIX, authenticate_signed_token
+from testbed.core.oauth.token_cache import get_validated_token, local_token_cache, remember_validated_token
 from testbed.core.oauth.validators import ActivityPubOAuth2Validator
+from testbed.core.snapshots import get_migration_snapshot
 from testbed.core.views.decorators import lola_access_error
 
 
+# Every test in this module runs against both token formats: opaque (the default) and signed
+@pytest.fixture(autouse=True, params=["opaque", "signed"])
+def token_format(request, settings):
+    settings.LOLA_SIGNED_ACCESS_TOKENS = request.param == "signed"
+    return request.param
+
+
 # Model
 
 @pytest.mark.django_db
@@ -37,6 +50,20 @@ def test_one_token_one_binding_enforced():
         TokenActorBinding.objects.create(token=binding.token, actor=other_actor)
 
 
+@pytest.mark.django_db
+def test_migration_snapshot_is_recorded_once():
+    """The first snapshot written for a binding wins; later calls (and stale copies) read it back."""
+    binding = TokenActorBindingFactory()
+    stale = TokenActorBinding.objects.get(pk=binding.pk)
+
+    snapshot = get_migration_snapshot(binding)
+    assert snapshot["core.note"] >= 0
+    assert TokenActorBinding.objects.get(pk=binding.pk).snapshot == snapshot
+
+    NoteFactory(actor=binding.actor)
+    assert get_migration_snapshot(stale) == snapshot
+
+
 # Validator
 
 @pytest.mark.django_db
@@ -243,3 +270,140 @@ def test_scope_claimed_without_token_fails_closed():
     assert error is not None
     assert error.status_code == 403
     assert error.data["error_code"] == "actor_mismatch"
+
+
+# Token cache
+
+def _token_queries(queries):
+    # Queries reading the token or its binding (not the collection data)
+    return [
+        query["sql"] for query in queries
+        if "oauth2_provider_accesstoken" in query["sql"] or "core_tokenactorbinding" in query["sql"]
+    ]
+
+
+# A warm token is authenticated and bound without a query, and the binding is still enforced
+@pytest.mark.django_db
+def test_warm_token_skips_token_and_binding_queries():
+    binding = TokenActorBindingFactory()
+    user_b = UserOnlyFactory()
+    actor_b = Actor.objects.create(
+        user=user_b, username=f"{user_b.username}_src", role=Actor.ROLE_SOURCE
+    )
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {binding.token.token}")
+    url = reverse("followers-collection", kwargs={"pk": binding.actor.pk})
+    assert client.get(url).status_code == status.HTTP_200_OK
+
+    with CaptureQueriesContext(connection) as queries:
+        assert client.get(url).status_code == status.HTTP_200_OK
+    assert _token_queries(queries.captured_queries) == []
+
+    response = client.get(reverse("followers-collection", kwargs={"pk": actor_b.pk}))
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert response.data["error_code"] == "actor_mismatch"
+
+
+# Revoking the token or deleting its binding drops the cached validation
+@pytest.mark.django_db
+@pytest.mark.parametrize("change", ["revoke", "unbind"])
+def test_token_cache_invalidated_on_revocation(change):
+    binding = TokenActorBindingFactory()
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {binding.token.token}")
+    url = reverse("followers-collection", kwargs={"pk": binding.actor.pk})
+    assert client.get(url).status_code == status.HTTP_200_OK
+
+    if change == "revoke":
+        binding.token.revoke()
+        expected_error = "insufficient_scope"
+    else:
+        binding.delete()
+        expected_error = "actor_mismatch"
+
+    response = client.get(url)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert response.data["error_code"] == expected_error
+
+
+# A cached token is rejected from the moment it expires
+@pytest.mark.django_db
+def test_token_cache_honors_expiry():
+    binding = TokenActorBindingFactory()
+    remember_validated_token(binding.token)
+    assert get_validated_token(binding.token.token) is not None
+
+    with patch("testbed.core.oauth.token_cache.timezone.now", return_value=binding.token.expires):
+        assert get_validated_token(binding.token.token) is None
+
+
+# Signed tokens
+
+# The validator issues a signed token carrying its binding, verified without the database
+@pytest.mark.django_db
+def test_signed_token_issued_and_verified_in_memory(token_format):
+    if token_format != "signed":
+        pytest.skip("signed tokens only")
+    user = UserOnlyFactory()
+    actor = user.actors.get(role=Actor.ROLE_SOURCE)
+    access_token = AccessTokenFactory(user=user, lola_scope=True)
+    token_dict = {"access_token": access_token.token, "scope": access_token.scope}
+    mock_request = MagicMock()
+    mock_request.user = user
+
+    with patch.object(OAuth2Validator, "_save_bearer_token"):
+        ActivityPubOAuth2Validator()._save_bearer_token(token_dict, mock_request)
+
+    assert token_dict["access_token"].startswith(SIGNED_TOKEN_PREFIX)
+    with CaptureQueriesContext(connection) as queries:
+        _user, token = authenticate_signed_token(token_dict["access_token"])
+        assert token.actor_binding.actor_id == actor.pk
+        assert token.actor_binding.snapshot is not None
+    assert queries.captured_queries == []
+
+    # Tampering with the payload breaks the signature
+    tampered = token_dict["access_token"][:-2] + ("AA" if not token_dict["access_token"].endswith("AA") else "BB")
+    assert authenticate_signed_token(tampered) is None
+
+
+# Revocation survives the loss of every cache entry: it is checked against the database
+@pytest.mark.django_db
+@pytest.mark.parametrize("change", ["revoke", "unbind"])
+def test_signed_token_revocation_survives_cache_eviction(token_format, change):
+    if token_format != "signed":
+        pytest.skip("signed tokens only")
+    binding = TokenActorBindingFactory()
+    token_string = binding.token.token
+    assert authenticate_signed_token(token_string) is not None
+
+    if change == "revoke":
+        binding.token.revoke()
+    else:
+        binding.delete()
+    cache.clear()
+    local_token_cache.clear()
+
+    assert authenticate_signed_token(token_string) is None
+
+
+# Gate overhead
+
+# A cold token resolves the actor, its outbox and its binding with one query, reported in Server-Timing
+@pytest.mark.django_db
+def test_gate_resolves_actor_and_binding_in_one_query(settings):
+    settings.LOLA_SERVER_TIMING = True
+    binding = TokenActorBindingFactory()
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {binding.token.token}")
+    url = reverse("actor-outbox", kwargs={"pk": binding.actor.pk})
+    # The first request records the migration snapshot
+    assert client.get(url).status_code == status.HTTP_200_OK
+
+    local_token_cache.clear()
+    response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Server-Timing"].startswith("lola-gate;dur=")
+    assert response["Server-Timing"].endswith('desc="queries=1"')
+
+    # Public requests read the actor alone
+    assert APIClient().get(url)["Server-Timing"].endswith('desc="queries=1"')
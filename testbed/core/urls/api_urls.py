@@ -7,6 +7,11 @@ from testbed.core.views import (
     content_collection,
     liked_collection,
     blocked_collection,
+    migration_bundle,
+    migration_changes,
+    migration_export_create,
+    migration_export_detail,
+    migration_export_download,
 )
 
 urlpatterns = [
@@ -72,4 +77,32 @@ urlpatterns = [
         blocked_collection,
         name="migration-blocked",
     ),
+    # LOLA migration bundle: every collection in one streamed zip, LOLA authentication required
+    path(
+        "actors/<int:pk>/migration/bundle/",
+        migration_bundle,
+        name="migration-bundle",
+    ),
+    # LOLA background export jobs: POST to start, poll the status, download the finished bundle (Range supported)
+    path(
+        "actors/<int:pk>/migration/exports/",
+        migration_export_create,
+        name="migration-exports",
+    ),
+    path(
+        "actors/<int:pk>/migration/exports/<int:job_id>/",
+        migration_export_detail,
+        name="migration-export-detail",
+    ),
+    path(
+        "actors/<int:pk>/migration/exports/<int:job_id>/download/",
+        migration_export_download,
+        name="migration-export-download",
+    ),
+    # LOLA changes feed: what changed since a timestamp, for catch-up syncs, LOLA authentication required
+    path(
+        "actors/<int:pk>/migration/changes/",
+        migration_changes,
+        name="migration-changes",
+    ),
 ]
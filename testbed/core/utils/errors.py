@@ -21,6 +21,12 @@ class ErrorCodes:
     FORBIDDEN_ACCESS = "forbidden_access"
     UNAUTHORIZED = "unauthorized"
     ACTOR_MISMATCH = "actor_mismatch"
+    EXPORT_JOB_NOT_FOUND = "export_job_not_found"
+
+    # Export download errors (409 / 410 / 416)
+    EXPORT_NOT_READY = "export_not_ready"
+    EXPORT_FILE_GONE = "export_file_gone"
+    RANGE_NOT_SATISFIABLE = "range_not_satisfiable"
     
     # Rate Limiting Errors (429)
     RATE_LIMIT_EXCEEDED = "rate_limit_exceeded"
@@ -163,6 +169,113 @@ def build_actor_mismatch_error(request=None):
     )
 
 
+def build_invalid_parameter_error(parameter, detail, request=None):
+    """
+    Build standardized 400 error for a malformed query parameter.
+
+    Args:
+        parameter (str): Name of the offending query parameter
+        detail (str): Human-readable description of what is wrong with it
+        request (HttpRequest, optional): Django request object for context
+
+    Returns:
+        Response: 400 error response with invalid_parameters error code
+    """
+    return build_error_response(
+        error_code=ErrorCodes.INVALID_PARAMETERS,
+        detail=detail,
+        status_code=400,
+        request=request,
+        hint=f"The '{parameter}' query parameter could not be interpreted",
+        remediation=f"Use the '{parameter}' values from the links returned by the collection, or omit the parameter",
+    )
+
+
+def build_export_job_not_found_error(job_id, request=None):
+    """
+    Build standardized 404 error for an export job that does not exist for the requested actor.
+
+    Args:
+        job_id (int): The export job ID that was not found
+        request (HttpRequest, optional): Django request object for context
+
+    Returns:
+        Response: 404 error response with export_job_not_found error code
+    """
+    return build_error_response(
+        error_code=ErrorCodes.EXPORT_JOB_NOT_FOUND,
+        detail=f"Export job {job_id} does not exist for this actor",
+        status_code=404,
+        request=request,
+        hint="Export jobs are only visible under the actor they were created for",
+        remediation="Use the status URL returned when the export was requested",
+    )
+
+
+def build_export_not_ready_error(job_status, request=None):
+    """
+    Build standardized 409 error for downloading an export job that has not completed.
+
+    Args:
+        job_status (str): The job's current status
+        request (HttpRequest, optional): Django request object for context
+
+    Returns:
+        Response: 409 error response with export_not_ready error code
+    """
+    return build_error_response(
+        error_code=ErrorCodes.EXPORT_NOT_READY,
+        detail=f"Export job is {job_status}; its file is not available",
+        status_code=409,
+        request=request,
+        hint="The file is served once the job status is 'complete'",
+        remediation="Poll the export job status URL until it completes, or request a new export if it failed",
+    )
+
+
+def build_export_file_gone_error(request=None):
+    """
+    Build standardized 410 error for a complete export job whose file is not available here.
+
+    Args:
+        request (HttpRequest, optional): Django request object for context
+
+    Returns:
+        Response: 410 error response with export_file_gone error code
+    """
+    return build_error_response(
+        error_code=ErrorCodes.EXPORT_FILE_GONE,
+        detail="Export job is complete but its file is no longer available",
+        status_code=410,
+        request=request,
+        hint="Export files expire, and are only kept by the server instance that wrote them",
+        remediation="Request a new export",
+    )
+
+
+def build_range_not_satisfiable_error(size, request=None):
+    """
+    Build standardized 416 error for a Range header outside the requested file.
+
+    Args:
+        size (int): Size of the file in bytes
+        request (HttpRequest, optional): Django request object for context
+
+    Returns:
+        Response: 416 error response with a `Content-Range: bytes */size` header
+    """
+    response = build_error_response(
+        error_code=ErrorCodes.RANGE_NOT_SATISFIABLE,
+        detail="Requested range not satisfiable",
+        status_code=416,
+        request=request,
+        hint=f"The file is {size} bytes long",
+        remediation="Request a byte range within the file, or omit the Range header",
+    )
+    response["Content-Range"] = f"bytes */{size}"
+    return response
+
+
 def build_rate_limit_error(retry_after_seconds, request=None):
     """
     Build standardized 429 error for rate limiting with Retry-After header.
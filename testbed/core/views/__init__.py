@@ -13,6 +13,11 @@ from .api import (
     followers_collection,
     following_collection,
     liked_collection,
+    migration_bundle,
+    migration_changes,
+    migration_export_create,
+    migration_export_detail,
+    migration_export_download,
     oauth_authorization_server_metadata,
     portability_outbox_detail,
 )
@@ -39,6 +44,11 @@ __all__ = [
     "content_collection",
     "liked_collection",
     "blocked_collection",
+    "migration_bundle",
+    "migration_changes",
+    "migration_export_create",
+    "migration_export_detail",
+    "migration_export_download",
     "oauth_authorization_server_metadata",
     "deactivate_account",
     "trigger_account",
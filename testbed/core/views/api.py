@@ -3,12 +3,15 @@ LOLA API views
 
 Contains:
 - actor_detail [dual-mode]: ActivityPub Actor with conditional LOLA migration.* properties
-- portability_outbox_detail [dual-mode]: Outbox with LOLA content filtering
+- portability_outbox_detail [dual-mode]: Keyset-paginated outbox with LOLA content filtering
 - following_collection [dual-mode]: Following OrderedCollection
 - followers_collection [strict]: LOLA-gated Followers OrderedCollection
 - content_collection [strict]: LOLA-gated raw Notes (no Activity wrappers)
 - liked_collection [strict]: LOLA-gated liked objects with migration metadata
 - blocked_collection [strict]: LOLA-gated block list (FEP-c648)
+- migration_bundle [strict]: every collection of the actor in one streamed zip
+- migration_export_create / _detail / _download [strict]: the same bundle as a background job
+- migration_changes [strict]: what changed in the outbox and collections since a timestamp
 - oauth_authorization_server_metadata [public]: RFC8414 discovery endpoint (no actor)
 
 Access model (actor-scoped views):
@@ -20,51 +23,145 @@ every actor-scoped view stacks two decorators from decorators.py:
   It runs AFTER @actor_required, so the 404 existence check always precedes the 403 auth check.
 
 The two gate differ only in whether the portability scope is mandatory:
-- @lola_scope_required (STRICT) - followers, content, liked, blocked.
+- @lola_scope_required (STRICT) - followers, content, liked, blocked, migration bundle, exports and changes.
   No token -> 403 insufficient_scope; a token bound to a different actor -> 403 actor_mismatch.
 - @lola_scope_optional (DUAL-MODE) - actor-detail, outbox, following.
   Public access stays open (no token -> plain public response), but a token bound to a different
   actor -> 403 actor_mismatch, so it is never served this actor's augmented/private data.
   The dedicated .../migration/{outbox,following} routes reuse these same views and inherit the gate.
 
+Views embedding actors (outbox, following, followers, blocked) also stack @actor_representation
+innermost: `?representation=stub|iri` or `Prefer: return=minimal` renders embedded actors as
+references instead of full Actor documents. Views embedding JSON-LD objects stack @compact_json_ld
+(`?compact=true|false`, on by default for the migration routes): only the top-level document
+then carries @context.
+
+The outbox and collection views also serve an unpaginated full export (`?export=full`), streamed
+with constant memory through a StreamingHttpResponse, and NDJSON (`Accept: application/x-ndjson`,
+one object per line, via @renderer_classes(COLLECTION_RENDERERS)); see streaming.py.
+
+Collection reads made with a portability token are bounded by the token's migration snapshot
+(see snapshots.py), so a destination crawling them page by page sees one stable view of the account.
+
+The actor, outbox and collection views answer conditional GETs (ETag / Last-Modified, see conditional.py)
+with a 304 before any JSON-LD is built. Rendered outbox and collection documents and pages are cached
+across requests until the actor's data changes (see response_cache.py).
+
 Each view below therefore assumes `actor` exists and the caller is authorized for it, and documents only
 what is endpoint-specific. All views build their payload via json_ld_builders, passing the dict from build_auth_context(request).
 """
 
 import logging
+import os
+from typing import Callable, NamedTuple
 
 from django.conf import settings
+from django.db.models.query import QuerySet
 from django.http import JsonResponse
 from django.urls import reverse
-from rest_framework.decorators import api_view, authentication_classes
+from django.utils import timezone
+from rest_framework.decorators import api_view, authentication_classes, renderer_classes
 from rest_framework.response import Response
-
+from rest_framework.settings import api_settings
+
+from ..changes import (
+    SINCE_PARAM,
+    InvalidSince,
+    changed_since,
+    changes_page,
+    count_changes,
+    decode_change_key,
+    encode_change_key,
+    load_changes,
+    parse_since_param,
+    tracked_rows,
+)
+from ..conditional import build_validators, conditional_response, latest, response_variant, rows_version
 from ..json_ld_builders import (
+    build_activity_json_ld,
     build_actor_json_ld,
-    build_collection_json_ld,
+    build_change_json_ld,
+    build_changes_page_json_ld,
+    build_collection_export_json_ld,
+    build_collection_page_json_ld,
+    build_liked_object_json_ld,
     build_note_json_ld,
+    build_ordered_collection_json_ld,
+    build_outbox_export_json_ld,
     build_outbox_json_ld,
+    build_outbox_page_json_ld,
     build_relationship_items,
+    iter_outbox_activities_json_ld,
+    since_params,
 )
-from ..json_ld_utils import build_actor_id, build_note_id
+from ..export_jobs import enqueue_export_job, get_export_progress, get_or_create_export_job
+from ..json_ld_utils import REPRESENTATION_FULL, get_id_factory
 from ..models import (
     Blocked,
+    ExportJob,
     Followers,
     Following,
     LikeActivity,
     Note,
+    OutboxEntry,
 )
 from ..oauth.authentication import OptionalOAuth2Authentication
+from ..renderers import NDJSONRenderer
+from ..response_cache import (
+    CachedResponse,
+    cache_response,
+    get_actor_generation,
+    get_cached_response,
+    response_cache_key,
+)
+from ..snapshots import bound_to_snapshot, patch_snapshot_cache_headers
+from ..pagination import (
+    DIRECTION_NEXT,
+    FIRST_PAGE,
+    PAGE_PARAM,
+    InvalidCursor,
+    encode_cursor,
+    keyset_page,
+    parse_page_param,
+)
+from ..streaming import (
+    EXPORT_PARAM,
+    NDJSON_FORMAT,
+    InvalidExport,
+    InvalidRange,
+    file_range_response,
+    iter_collection_items,
+    iter_json,
+    iter_ndjson,
+    iter_zip,
+    parse_export_param,
+    read_snapshot,
+    streaming_json_ld_response,
+    streaming_ndjson_response,
+    streaming_zip_response,
+)
+from ..utils.errors import (
+    build_export_file_gone_error,
+    build_export_job_not_found_error,
+    build_export_not_ready_error,
+    build_invalid_parameter_error,
+    build_range_not_satisfiable_error,
+)
 from .decorators import (
     actor_required,
     activitypub_content,
+    actor_representation,
     build_auth_context,
+    compact_json_ld,
     lola_scope_optional,
     lola_scope_required,
 )
 
 logger = logging.getLogger(__name__)
 
+# Renderers of the outbox and collection views: DRF's defaults plus NDJSON (see streaming.py)
+COLLECTION_RENDERERS = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
+
 
 @api_view(["GET"])
 @authentication_classes([OptionalOAuth2Authentication])
@@ -75,32 +172,371 @@ def actor_detail(request, pk, actor):
     # Build standardized authentication context
     auth_context = build_auth_context(request)
 
+    # Answer 304 from the loaded row alone when the client's copy is current (see conditional.py)
+    validators = build_validators(request, auth_context, (actor.updated_at,), actor.updated_at)
+
     # Build response with authentication context
-    data = build_actor_json_ld(actor, auth_context)
-    return Response(data)
+    return conditional_response(
+        request, validators, lambda: Response(build_actor_json_ld(actor, auth_context))
+    )
 
 
 @api_view(["GET"])
 @authentication_classes([OptionalOAuth2Authentication])
+@renderer_classes(COLLECTION_RENDERERS)
 @activitypub_content
 @actor_required
 @lola_scope_optional
+@actor_representation
+@compact_json_ld
 def portability_outbox_detail(request, pk, actor):
+    """
+    Returns the outbox as an OrderedCollection whose `first` link leads to keyset-paginated
+    OrderedCollectionPages (`?page=true`, then the opaque `?page=<cursor>` values from `next`/`prev`).
+    Reads come from the OutboxEntry index; `?type=` restricts the outbox to some activity types and
+    `?since=` to the activities after a timestamp.
+    `?export=full` streams the whole outbox in one response instead; NDJSON streams its activities.
+    Also serves the advertised .../migration/outbox/ route.
+    """
     outbox = actor.portability_outbox
 
+    # Optional `type` filter, e.g. ?type=Create or ?type=Like,Follow
+    activity_types = None
+    if request.GET.get("type"):
+        activity_types = request.GET["type"].split(",")
+        valid_types = {activity_type for activity_type, _label in OutboxEntry.ACTIVITY_TYPE_CHOICES}
+        if not set(activity_types) <= valid_types:
+            return build_invalid_parameter_error(
+                "type", f"Activity type must be one of {sorted(valid_types)}", request
+            )
+
+    # Optional incremental read: only activities after ?since=<timestamp> (see changes.py)
+    try:
+        since = parse_since_param(request.GET.get(SINCE_PARAM))
+    except InvalidSince as e:
+        return build_invalid_parameter_error(SINCE_PARAM, str(e), request)
+
     # Build standardized authentication context
     auth_context = build_auth_context(request)
 
-    # Build response with authentication-based content filtering
-    data = build_outbox_json_ld(outbox, auth_context)
-    return Response(data)
+    error = full_export_error(request)
+    if error is not None:
+        return error
+
+    # Version the visible outbox rows with one aggregate, so a current client gets a 304 before
+    # any activity is rendered (see conditional.py)
+    entries = outbox.activity_entries(
+        not auth_context["has_portability_scope"], activity_types, auth_context.get("snapshot"), since
+    )
+    count, last, last_pk = rows_version(entries, "timestamp")
+    validators = build_validators(
+        request,
+        auth_context,
+        (actor.updated_at, count, last, get_actor_generation(actor.pk)),
+        latest(actor.updated_at, last),
+    )
+    return conditional_response(request, validators, lambda: cached_response(
+        request, actor, auth_context, last_pk, lambda: outbox_response(request, outbox, auth_context, activity_types, since)
+    ))
+
+
+def outbox_response(request, outbox, auth_context, activity_types, since):
+    """Build the outbox document, page or full export the request asks for."""
+    if wants_ndjson(request):
+        return streaming_ndjson_response(
+            iter_outbox_activities_json_ld(outbox, auth_context, activity_types=activity_types, since=since)
+        )
+    if request.GET.get(EXPORT_PARAM):
+        return streaming_json_ld_response(
+            build_outbox_export_json_ld(outbox, auth_context, activity_types=activity_types, since=since)
+        )
+
+    page = request.GET.get(PAGE_PARAM)
+    if page is None:
+        # Collection summary only: totalItems plus the link to the first page
+        data = build_outbox_json_ld(outbox, auth_context, activity_types=activity_types, since=since)
+        return snapshot_response(request, data, auth_context)
+
+    # Build the requested page with authentication-based content filtering
+    try:
+        data = build_outbox_page_json_ld(
+            outbox, auth_context, cursor=parse_page_param(page), activity_types=activity_types, since=since
+        )
+    except InvalidCursor as e:
+        return build_invalid_parameter_error(PAGE_PARAM, str(e), request)
+    return snapshot_response(request, data, auth_context)
+
+
+# Sort keys of the paginated collections, newest first. The trailing "id" makes keys unique.
+RELATIONSHIP_ORDERING = ("created_at", "id")
+CONTENT_ORDERING = ("published", "id")
+LIKED_ORDERING = ("timestamp", "id")
+
+
+def snapshot_response(request, data, auth_context):
+    """
+    Response for a collection or page document. Reads bounded by a migration snapshot may be
+    stored by the token holder, which revalidates them with their ETag before each reuse.
+    """
+    response = Response(data)
+    if auth_context.get("snapshot") is not None:
+        patch_snapshot_cache_headers(response)
+    return response
+
+
+def cached_response(request, actor, auth_context, last_pk, build_response):
+    """
+    Serve a rendered JSON document or page of `actor` from the response cache (see
+    response_cache.py), or call `build_response()` and cache its bytes once rendered.
+    `last_pk` is the highest primary key among the rows the response reads (see rows_version).
+    Streamed exports and the browsable API are always built.
+    """
+    renderer = getattr(request, "accepted_renderer", None)
+    if getattr(renderer, "format", None) != "json" or request.GET.get(EXPORT_PARAM):
+        return build_response()
+
+    # Snapshot reads key on the rows they admit, not the token's own marks, so tokens share entries
+    bound = (last_pk or 0) if auth_context.get("snapshot") is not None else None
+    key = response_cache_key(actor.pk, response_variant(request, auth_context), bound)
+    cached = get_cached_response(key)
+    if cached is not None:
+        response = CachedResponse(*cached)
+        if auth_context.get("snapshot") is not None:
+            patch_snapshot_cache_headers(response)
+        return response
+
+    response = build_response()
+    if isinstance(response, Response) and response.status_code == 200:
+        response.add_post_render_callback(lambda rendered: cache_response(key, rendered))
+    return response
+
+
+def wants_ndjson(request):
+    """Whether content negotiation selected NDJSON (always a streamed full export)."""
+    renderer = getattr(request, "accepted_renderer", None)
+    return renderer is not None and renderer.format == NDJSON_FORMAT
+
+
+def full_export_error(request):
+    """
+    Validate the `export` parameter (see streaming.py): an error Response for an unknown value
+    or when a full export (`export=full` or NDJSON) is combined with `page`, otherwise None.
+    """
+    try:
+        export = parse_export_param(request.GET.get(EXPORT_PARAM))
+    except InvalidExport as e:
+        return build_invalid_parameter_error(EXPORT_PARAM, str(e), request)
+    if (export or wants_ndjson(request)) and PAGE_PARAM in request.GET:
+        return build_invalid_parameter_error(
+            PAGE_PARAM, f"{PAGE_PARAM} cannot be combined with a full export", request
+        )
+    return None
+
+
+class CollectionSource(NamedTuple):
+    """The rows of one LOLA collection, their sort key and the renderer of a chunk of rows."""
+    name: str            # the collection's path segment, e.g. "following"
+    queryset: QuerySet
+    ordering: tuple      # see *_ORDERING above
+    build_items: Callable  # rows (a queryset) -> list of JSON-LD items
+    changed_field: str   # when a row joined or last changed, for incremental reads (see changes.py)
+    changed_rows: QuerySet = None  # rows that can also leave the collection (e.g. inactive relationships)
+
+
+def snapshot_source(auth_context, name, queryset, ordering, build_items, changed_field, changed_rows=None):
+    """CollectionSource whose rows are bounded by the migration snapshot in auth_context, if any."""
+    snapshot = auth_context.get("snapshot")
+    if changed_rows is not None:
+        changed_rows = bound_to_snapshot(changed_rows, snapshot)
+    return CollectionSource(
+        name, bound_to_snapshot(queryset, snapshot), ordering, build_items, changed_field, changed_rows
+    )
+
+
+def following_source(actor, auth_context):
+    """Active following relationships, rendered as (local or remote) actors."""
+    # Get all active following relationships for this actor
+    relationships = Following.objects.filter(actor=actor).select_related("target_actor")
+    following_qs = relationships.filter(status=Following.STATUS_ACTIVE)
+
+    # Build the collection items for one page
+    def build_items(relationships):
+        return build_relationship_items(
+            relationships=relationships,
+            local_actor_field="target_actor",
+            remote_url_field="target_actor_url",
+            remote_data_field="target_actor_data",
+            auth_context=auth_context,
+        )
+
+    return snapshot_source(
+        auth_context, "following", following_qs, RELATIONSHIP_ORDERING, build_items, "updated_at", relationships
+    )
+
+
+def followers_source(actor, auth_context):
+    """Active follower relationships, rendered as (local or remote) actors."""
+    # Get all active follower relationships for this actor
+    relationships = Followers.objects.filter(actor=actor).select_related("follower_actor")
+    followers_qs = relationships.filter(status=Followers.STATUS_ACTIVE)
+
+    # Build the collection items for one page
+    def build_items(relationships):
+        return build_relationship_items(
+            relationships=relationships,
+            local_actor_field="follower_actor",
+            remote_url_field="follower_actor_url",
+            remote_data_field="follower_actor_data",
+            auth_context=auth_context,
+        )
+
+    return snapshot_source(
+        auth_context, "followers", followers_qs, RELATIONSHIP_ORDERING, build_items, "updated_at", relationships
+    )
+
+
+def content_source(actor, auth_context):
+    """The actor's Notes (all visibilities with the portability scope, public otherwise)."""
+    # Apply content filtering based on authentication and scope
+    notes_qs = Note.objects.filter(actor=actor)
+
+    # Filter content based on authentication - public only for non-LOLA requests
+    if not auth_context["has_portability_scope"]:
+        notes_qs = notes_qs.filter(visibility="public")
+    # LOLA authenticated requests with portability scope get ALL content (public + private)
+
+    # Build raw Note objects (no Activity wrappers)
+    def build_items(notes):
+        return [build_note_json_ld(note, auth_context) for note in notes]
+
+    return snapshot_source(auth_context, "content", notes_qs, CONTENT_ORDERING, build_items, "published")
+
+
+def liked_source(actor, auth_context):
+    """Likes of public objects, rendered as the liked objects with migration metadata."""
+    # Get all LikeActivity objects for this actor (newest first, see LIKED_ORDERING)
+    likes_qs = LikeActivity.objects.filter(actor=actor).select_related("note")
+
+    # Apply visibility filtering - only include likes of public objects for privacy
+    # TODO: This could be enhanced with trust controls
+    likes_qs = likes_qs.filter(visibility="public")
+
+    # Build liked objects with required metadata fields
+    def build_items(likes):
+        return [build_liked_object_json_ld(like, auth_context) for like in likes]
+
+    return snapshot_source(auth_context, "liked", likes_qs, LIKED_ORDERING, build_items, "timestamp")
+
+
+def blocked_source(actor, auth_context):
+    """Active blocking relationships, rendered as (local or remote) actors."""
+    # Get all active blocking relationships for this actor
+    relationships = Blocked.objects.filter(actor=actor).select_related("blocked_actor")
+    blocked_qs = relationships.filter(status=Blocked.STATUS_ACTIVE)
+
+    # Build the collection items using the same pattern as followers/following
+    def build_items(relationships):
+        return build_relationship_items(
+            relationships=relationships,
+            local_actor_field="blocked_actor",
+            remote_url_field="blocked_actor_url",
+            remote_data_field="blocked_actor_data",
+            auth_context=auth_context,
+        )
+
+    return snapshot_source(
+        auth_context, "blocked", blocked_qs, RELATIONSHIP_ORDERING, build_items, "updated_at", relationships
+    )
+
+
+def collection_response(request, actor, source, auth_context):
+    """
+    Serve a keyset-paginated LOLA collection of `actor` (a CollectionSource).
+
+    Without `page`: the OrderedCollection (totalItems from a COUNT, link to the `first` page).
+    With `?page=true` / `?page=<cursor>`: one OrderedCollectionPage of at most
+    settings.LOLA_COLLECTION_PAGE_SIZE items; `source.build_items` renders the page's rows
+    (a lazy queryset, see pagination.keyset_page) into JSON-LD items.
+    With `?export=full`: the whole OrderedCollection, streamed chunk by chunk
+    (see streaming.iter_collection_items). With NDJSON negotiated: the same items, one per line.
+    `?since=<timestamp>` restricts any of these to the items added or changed after it (see changes.py).
+    Every response carries an ETag and Last-Modified; a matching conditional request gets a 304.
+    """
+    error = full_export_error(request)
+    if error is not None:
+        return error
+    try:
+        since = parse_since_param(request.GET.get(SINCE_PARAM))
+    except InvalidSince as e:
+        return build_invalid_parameter_error(SINCE_PARAM, str(e), request)
+
+    # Version the collection's rows with one aggregate, so a current client gets a 304 before
+    # any item is rendered (see conditional.py)
+    count, last, last_pk = rows_version(
+        changed_since(tracked_rows(source), source.changed_field, since), source.changed_field
+    )
+    validators = build_validators(
+        request,
+        auth_context,
+        (actor.updated_at, count, last, get_actor_generation(actor.pk)),
+        latest(actor.updated_at, last),
+    )
+    return conditional_response(request, validators, lambda: cached_response(
+        request, actor, auth_context, last_pk, lambda: collection_body_response(request, actor, source, auth_context, since)
+    ))
+
+
+def collection_body_response(request, actor, source, auth_context, since):
+    """Build the collection document, page or full export the request asks for (see collection_response)."""
+    queryset = changed_since(source.queryset, source.changed_field, since)
+    ordering, build_items, params = source.ordering, source.build_items, since_params(since)
+    if wants_ndjson(request):
+        return streaming_ndjson_response(
+            iter_collection_items(queryset, ordering, build_items, auth_context)
+        )
+
+    collection_id = get_id_factory(request).actor_collection(actor.pk, source.name)
+    if request.GET.get(EXPORT_PARAM):
+        return streaming_json_ld_response(build_collection_export_json_ld(
+            collection_id,
+            queryset.count(),
+            iter_collection_items(queryset, ordering, build_items, auth_context),
+            auth_context,
+            params,
+        ))
+
+    page = request.GET.get(PAGE_PARAM)
+    if page is None:
+        data = build_ordered_collection_json_ld(collection_id, queryset.count(), auth_context, params)
+        return snapshot_response(request, data, auth_context)
+
+    try:
+        cursor = parse_page_param(page)
+        page_rows = keyset_page(queryset, ordering, cursor)
+    except InvalidCursor as e:
+        return build_invalid_parameter_error(PAGE_PARAM, str(e), request)
+
+    data = build_collection_page_json_ld(
+        collection_id,
+        build_items(page_rows.queryset),
+        cursor=cursor,
+        first_key=page_rows.first_key,
+        last_key=page_rows.last_key,
+        has_more=page_rows.has_more,
+        auth_context=auth_context,
+        params=params,
+    )
+    return snapshot_response(request, data, auth_context)
 
 
 @api_view(["GET"])
 @authentication_classes([OptionalOAuth2Authentication])
+@renderer_classes(COLLECTION_RENDERERS)
 @activitypub_content
 @actor_required
 @lola_scope_optional
+@actor_representation
+@compact_json_ld
 def following_collection(request, pk, actor):
     """
     Returns who an actor is currently following in ActivityPub OrderedCollection format.
@@ -108,93 +544,45 @@ def following_collection(request, pk, actor):
     SHOULD be provided on the Actor object when accessed with the account migration authorization token."
     Also serves the advertised .../migration/following/ route.
     """
-    # Get all active following relationships for this actor
-    following_qs = Following.objects.filter(
-        actor=actor, status=Following.STATUS_ACTIVE
-    ).order_by("-created_at")
-
     # Build standardized authentication context for nested Actor objects
     auth_context = build_auth_context(request)
-
-    # Build the collection items
-    items = build_relationship_items(
-        relationships=following_qs,
-        local_actor_field="target_actor",
-        remote_url_field="target_actor_url",
-        remote_data_field="target_actor_data",
-        auth_context=auth_context,
-    )
-
-    # Build ActivityPub OrderedCollection
-    collection_id = f"{request.scheme}://{request.get_host()}/api/actors/{pk}/following"
-    collection_data = build_collection_json_ld(collection_id, items)
-
-    return Response(collection_data)
+    return collection_response(request, actor, following_source(actor, auth_context), auth_context)
 
 
 @api_view(["GET"])
 @authentication_classes([OptionalOAuth2Authentication])
+@renderer_classes(COLLECTION_RENDERERS)
 @activitypub_content
 @actor_required
 @lola_scope_required
+@actor_representation
+@compact_json_ld
 def followers_collection(request, pk, actor):
-    # Get all active follower relationships for this actor
-    followers_qs = Followers.objects.filter(
-        actor=actor, status=Followers.STATUS_ACTIVE
-    ).order_by("-created_at")
-
     # Build standardized authentication context for nested Actor objects
     auth_context = build_auth_context(request)
-
-    # Build the collection items
-    items = build_relationship_items(
-        relationships=followers_qs,
-        local_actor_field="follower_actor",
-        remote_url_field="follower_actor_url",
-        remote_data_field="follower_actor_data",
-        auth_context=auth_context,
-    )
-
-    # Build ActivityPub OrderedCollection
-    collection_id = f"{request.scheme}://{request.get_host()}/api/actors/{pk}/followers"
-    collection_data = build_collection_json_ld(collection_id, items)
-
-    return Response(collection_data)
+    return collection_response(request, actor, followers_source(actor, auth_context), auth_context)
 
 
 @api_view(["GET"])
 @authentication_classes([OptionalOAuth2Authentication])
+@renderer_classes(COLLECTION_RENDERERS)
 @activitypub_content
 @actor_required
 @lola_scope_required
+@compact_json_ld
 def content_collection(request, pk, actor):
     """
     The actor's raw authored objects (Notes) without Activity wrappers, for migration fidelity.
     Spec: "MUST provide raw authored objects (no wrapper Activities) for fidelity.
     """
-    # Apply content filtering based on authentication and scope
-    notes_qs = Note.objects.filter(actor=actor).order_by("-published")
-
-    # Filter content based on authentication - public only for non-LOLA requests
-    if not getattr(request, "has_portability_scope", False):
-        notes_qs = notes_qs.filter(visibility="public")
-    # LOLA authenticated requests with portability scope get ALL content (public + private)
-
     # Build standardized authentication context for JSON-LD building
     auth_context = build_auth_context(request)
-
-    # Build raw Note objects (no Activity wrappers)
-    items = [build_note_json_ld(note, auth_context) for note in notes_qs]
-
-    # Build ActivityPub OrderedCollection
-    collection_id = f"{request.scheme}://{request.get_host()}/api/actors/{pk}/content"
-    collection_data = build_collection_json_ld(collection_id, items)
-
-    return Response(collection_data)
+    return collection_response(request, actor, content_source(actor, auth_context), auth_context)
 
 
 @api_view(["GET"])
 @authentication_classes([OptionalOAuth2Authentication])
+@renderer_classes(COLLECTION_RENDERERS)
 @activitypub_content
 @actor_required
 @lola_scope_required
@@ -203,79 +591,19 @@ def liked_collection(request, pk, actor):
     Returns objects that an actor has liked with migration-ready metadata per LOLA specification.
     Applies field projection to minimize payload size while retaining sufficient migration context.
     """
-    # Get all LikeActivity objects for this actor in reverse chronological order
-    likes_qs = LikeActivity.objects.filter(actor=actor).order_by("-timestamp")
-
-    # Apply visibility filtering - only include likes of public objects for privacy
-    # TODO: This could be enhanced with trust controls
-    likes_qs = likes_qs.filter(visibility="public")
-
     # Build standardized authentication context for JSON-LD building
     auth_context = build_auth_context(request)
-
-    # Build liked objects with required metadata fields
-    items = []
-    for like in likes_qs:
-        # Build the liked object with field projection for performance
-        if like.note:
-            # Local Note object - extract required metadata
-            liked_object = {
-                "id": build_note_id(like.note.id, auth_context.get("request")),
-                "type": "Note",
-                "attributedTo": build_actor_id(
-                    like.note.actor.id, auth_context.get("request")
-                ),
-                "published": like.note.published.isoformat(),
-                "summary": getattr(like.note, "summary", ""),
-                "content": like.note.content[:280]
-                if len(like.note.content) > 280
-                else like.note.content,  # Small content only
-                "inReplyTo": None,  # TODO: Add reply chain support when implemented
-                "audience": {"public": like.note.visibility == "public"},
-                "attachment": [],  # TODO: Add when attachment support is implemented
-                "canonicalUrl": build_note_id(
-                    like.note.id, auth_context.get("request")
-                ),
-                # Optional objectHash for integrity verification
-                "objectHash": None,  # TODO: Implement content hashing if needed
-            }
-        else:
-            # Remote object - use cached object_data with field projection
-            remote_data = like.object_data or {}
-            liked_object = {
-                "id": like.object_url,
-                "type": remote_data.get("type", "Object"),
-                "attributedTo": remote_data.get("attributedTo", ""),
-                "published": remote_data.get("published", like.timestamp.isoformat()),
-                "summary": remote_data.get("summary", ""),
-                "content": remote_data.get("content", "")[:280]
-                if remote_data.get("content")
-                else "",  # Small content only
-                "inReplyTo": remote_data.get("inReplyTo"),
-                "audience": {
-                    "public": True
-                },  # Assume remote objects in likes are public
-                "attachment": remote_data.get("attachment", [])[:3]
-                if remote_data.get("attachment")
-                else [],  # Limit attachments
-                "canonicalUrl": like.object_url,
-                "objectHash": remote_data.get("objectHash"),
-            }
-
-        items.append(liked_object)
-
-    # Build ActivityPub OrderedCollection
-    collection_id = f"{request.scheme}://{request.get_host()}/api/actors/{pk}/liked"
-    collection_data = build_collection_json_ld(collection_id, items)
-
-    return Response(collection_data)
+    return collection_response(request, actor, liked_source(actor, auth_context), auth_context)
 
 
 @api_view(["GET"])
 @authentication_classes([OptionalOAuth2Authentication])
+@renderer_classes(COLLECTION_RENDERERS)
 @activitypub_content
 @actor_required
 @lola_scope_required
+@actor_representation
+@compact_json_ld
 def blocked_collection(request, pk, actor):
     """
     LOLA Blocked collection endpoint (FEP-c648).
@@ -288,30 +616,256 @@ def blocked_collection(request, pk, actor):
     as block lists reveal who users consider threats, harassers, or sources of harm.
     Unauthorized access could compromise user safety.
     """
-    # Get all active blocking relationships for this actor
-    blocked_qs = Blocked.objects.filter(
-        actor=actor, status=Blocked.STATUS_ACTIVE
-    ).order_by("-created_at")
-
     # Build standardized authentication context for nested Actor objects
     auth_context = build_auth_context(request)
 
-    # Build the collection items using the same pattern as followers/following
-    items = build_relationship_items(
-        relationships=blocked_qs,
-        local_actor_field="blocked_actor",
-        remote_url_field="blocked_actor_url",
-        remote_data_field="blocked_actor_data",
-        auth_context=auth_context,
+    # Build ActivityPub OrderedCollection in FEP-c648 format
+    response = collection_response(request, actor, blocked_source(actor, auth_context), auth_context)
+
+    logger.info(f"Blocked collection accessed: actor_id={pk}, page={request.GET.get(PAGE_PARAM)}")
+
+    return response
+
+
+# Collections of a migration bundle, in archive order after actor.json and outbox.ndjson
+BUNDLE_COLLECTIONS = (following_source, followers_source, content_source, liked_source, blocked_source)
+
+
+@api_view(["GET"])
+@authentication_classes([OptionalOAuth2Authentication])
+@activitypub_content
+@actor_required
+@lola_scope_required
+def migration_bundle(request, pk, actor):
+    """
+    The whole account in one download: a zip of actor.json, one NDJSON member per collection
+    (outbox, following, followers, content, liked, blocked) and a manifest.json written last.
+
+    Replaces seven round trips (each re-running authentication and the binding gate) with one.
+    The archive is written incrementally while the collections are read in chunks, all inside
+    one read_snapshot() transaction so the members are mutually consistent.
+    """
+    # Build standardized authentication context; every NDJSON line is a standalone document
+    auth_context = build_auth_context(request)
+    auth_context["compact"] = False
+
+    def archive():
+        with read_snapshot():
+            yield from iter_zip(migration_bundle_members(request, actor, auth_context))
+
+    logger.info(f"Migration bundle requested: actor_id={pk}")
+    return streaming_zip_response(archive(), f"actor-{pk}-migration.zip")
+
+
+def migration_bundle_members(request, actor, auth_context, on_item=None):
+    """
+    Yield the (name, bytes blocks) members of a migration bundle (see streaming.iter_zip).
+
+    Item counts are taken while the members stream, so the manifest costs no extra query.
+    `on_item`, if given, is called after each collection item is rendered (progress reporting).
+    `request` may be None (background export jobs), in which case ids are built from BASE_URL.
+    """
+    ids = get_id_factory(request)
+    manifest = {
+        "type": "MigrationBundle",
+        "actor": ids.actor(actor.pk),
+        "published": timezone.now().isoformat(),
+        "members": [],
+    }
+
+    def counted(name, collection_id, items):
+        member = {"name": name, "id": collection_id, "totalItems": 0}
+        manifest["members"].append(member)
+        for item in items:
+            member["totalItems"] += 1
+            yield item
+            if on_item is not None:
+                on_item()
+
+    yield "actor.json", iter_json(build_actor_json_ld(actor, auth_context))
+
+    outbox_items = iter_outbox_activities_json_ld(actor.portability_outbox, auth_context)
+    yield "outbox.ndjson", iter_ndjson(counted("outbox.ndjson", ids.outbox(actor.pk), outbox_items))
+
+    for build_source in BUNDLE_COLLECTIONS:
+        source = build_source(actor, auth_context)
+        items = iter_collection_items(source.queryset, source.ordering, source.build_items, auth_context)
+        name = f"{source.name}.ndjson"
+        yield name, iter_ndjson(counted(name, ids.actor_collection(actor.pk, source.name), items))
+
+    yield "manifest.json", iter_json(manifest)
+
+
+def migration_bundle_total_items(actor, auth_context):
+    """Number of collection items a migration bundle of `actor` holds (one COUNT per collection)."""
+    total = actor.portability_outbox.activity_count(
+        public_only=not auth_context["has_portability_scope"], snapshot=auth_context.get("snapshot")
     )
+    for build_source in BUNDLE_COLLECTIONS:
+        total += build_source(actor, auth_context).queryset.count()
+    return total
+
+
+def build_export_job_status(request, job):
+    """Status document of an export job, with the download link once it is complete."""
+    base_url = get_id_factory(request).base_url
+    kwargs = {"pk": job.actor_id, "job_id": job.pk}
+    items_written, total_items = get_export_progress(job)
+    data = {
+        "id": f"{base_url}{reverse('migration-export-detail', kwargs=kwargs)}",
+        "type": "MigrationExport",
+        "actor": get_id_factory(request).actor(job.actor_id),
+        "status": job.status,
+        "itemsWritten": items_written,
+        "totalItems": total_items,
+        "created": job.created_at.isoformat(),
+        "started": job.started_at.isoformat() if job.started_at else None,
+        "completed": job.completed_at.isoformat() if job.completed_at else None,
+    }
+    if job.status == ExportJob.STATUS_COMPLETE:
+        data["download"] = f"{base_url}{reverse('migration-export-download', kwargs=kwargs)}"
+        data["size"] = job.file_size
+    if job.status == ExportJob.STATUS_FAILED:
+        data["error"] = job.error
+    return data
 
-    # Build ActivityPub OrderedCollection in FEP-c648 format
-    collection_id = f"{request.scheme}://{request.get_host()}/api/actors/{pk}/blocked"
-    collection_data = build_collection_json_ld(collection_id, items)
 
-    logger.info(f"Blocked collection accessed: actor_id={pk}, items_count={len(items)}")
+@api_view(["POST"])
+@authentication_classes([OptionalOAuth2Authentication])
+@activitypub_content
+@actor_required
+@lola_scope_required
+def migration_export_create(request, pk, actor):
+    """
+    Start a background export of the actor's migration bundle (see export_jobs.py).
 
-    return Response(collection_data)
+    Answers 202 Accepted with the job status document; `Location` is the status URL to poll,
+    which links the file for download once the job is complete. While the actor has a job in
+    progress, or a complete one whose file is still here, that job is returned instead of a new
+    one (200 OK once complete).
+    """
+    job, created = get_or_create_export_job(actor)
+    if created:
+        enqueue_export_job(job)
+        logger.info(f"Export job requested: actor_id={pk}, job_id={job.pk}")
+
+    data = build_export_job_status(request, job)
+    status_code = 200 if job.status == ExportJob.STATUS_COMPLETE else 202
+    return Response(data, status=status_code, headers={"Location": data["id"]})
+
+
+@api_view(["GET"])
+@authentication_classes([OptionalOAuth2Authentication])
+@activitypub_content
+@actor_required
+@lola_scope_required
+def migration_export_detail(request, pk, actor, job_id):
+    """Progress of an export job: status, items written so far and total items."""
+    job = ExportJob.objects.filter(actor=actor, pk=job_id).first()
+    if job is None:
+        return build_export_job_not_found_error(job_id, request)
+    return Response(build_export_job_status(request, job))
+
+
+@api_view(["GET"])
+@authentication_classes([OptionalOAuth2Authentication])
+@activitypub_content
+@actor_required
+@lola_scope_required
+def migration_export_download(request, pk, actor, job_id):
+    """
+    The zip file of a complete export job. A single-range `Range` header is answered with
+    206 Partial Content so interrupted downloads can resume.
+    """
+    job = ExportJob.objects.filter(actor=actor, pk=job_id).first()
+    if job is None:
+        return build_export_job_not_found_error(job_id, request)
+    if job.status != ExportJob.STATUS_COMPLETE:
+        return build_export_not_ready_error(job.status, request)
+    if not os.path.exists(job.file_path):
+        # Expired, or written by another instance: waiting will not help
+        return build_export_file_gone_error(request)
+
+    try:
+        return file_range_response(request, job.file_path, job.filename)
+    except InvalidRange:
+        return build_range_not_satisfiable_error(job.file_size, request)
+
+
+def outbox_source(actor, auth_context):
+    """Outbox activities visible to the caller, as OutboxEntry index rows (used by the changes feed)."""
+    outbox = actor.portability_outbox
+    entries = outbox.activity_entries(public_only=not auth_context["has_portability_scope"])
+    actor_references = auth_context.get("representation", REPRESENTATION_FULL) != REPRESENTATION_FULL
+
+    def build_items(entries):
+        activities = outbox.load_activities(entries, actor_references)
+        return [build_activity_json_ld(activity, auth_context) for activity in activities]
+
+    return snapshot_source(auth_context, "outbox", entries, OutboxEntry.ORDERING_KEY, build_items, "timestamp")
+
+
+# Collections reported by the changes feed. The position of each breaks ties between equal change
+# times and is part of the feed's page cursors, so entries must only ever be appended.
+CHANGES_COLLECTIONS = (outbox_source, *BUNDLE_COLLECTIONS)
+
+
+@api_view(["GET"])
+@authentication_classes([OptionalOAuth2Authentication])
+@activitypub_content
+@actor_required
+@lola_scope_required
+@actor_representation
+@compact_json_ld
+def migration_changes(request, pk, actor):
+    """
+    Changes feed for catch-up syncs (see changes.py): every item added to, or relationship removed
+    from, the outbox and the collections after `?since=<timestamp>`, oldest first, as `Add` / `Remove`
+    entries targeting the collection. Without `page`: the OrderedCollection (totalItems, `first` link);
+    `?page=true` and the `next` cursors walk it. Never bounded by the token's migration snapshot.
+    """
+    try:
+        since = parse_since_param(request.GET.get(SINCE_PARAM))
+    except InvalidSince as e:
+        return build_invalid_parameter_error(SINCE_PARAM, str(e), request)
+
+    # Build standardized authentication context (unbounded: see build_auth_context)
+    auth_context = build_auth_context(request)
+    sources = [build_source(actor, auth_context) for build_source in CHANGES_COLLECTIONS]
+    ids = get_id_factory(request)
+    feed_id = ids.actor_collection(actor.pk, "migration/changes")
+    params = since_params(since)
+
+    page = request.GET.get(PAGE_PARAM)
+    if page is None:
+        return Response(build_ordered_collection_json_ld(feed_id, count_changes(sources, since), auth_context, params))
+
+    try:
+        cursor = parse_page_param(page)
+        if cursor is not None and cursor.direction != DIRECTION_NEXT:
+            raise InvalidCursor("The changes feed is only read forwards")
+        changes, has_more = changes_page(sources, since, decode_change_key(cursor.key) if cursor else None)
+    except InvalidCursor as e:
+        return build_invalid_parameter_error(PAGE_PARAM, str(e), request)
+
+    items = [
+        build_change_json_ld(
+            change_type,
+            item,
+            ids.actor_collection(actor.pk, source.name),
+            changed_at,
+        )
+        for change_type, source, item, changed_at in load_changes(sources, changes)
+    ]
+    next_token = encode_cursor(DIRECTION_NEXT, encode_change_key(changes[-1])) if has_more else None
+    return Response(build_changes_page_json_ld(
+        feed_id,
+        items,
+        page if cursor is not None else FIRST_PAGE,
+        next_token,
+        auth_context,
+        params,
+    ))
 
 
 def oauth_authorization_server_metadata(request):
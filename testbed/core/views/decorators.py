@@ -8,21 +8,37 @@ Access-control decorators:
 
 Supporting helpers:
 - lola_access_error: the gate logic behind the two decorators (Response | None)
+- resolve_actor: the URL actor with its user and outbox, read together with the token's binding
+- GateMetrics: time and queries spent in actor_required and the LOLA gate (Server-Timing header)
 - build_auth_context: standardized auth context dict passed to JSON-LD builders
 - activitypub_content: sets ActivityPub content-type + CORS headers
+- actor_representation: selects full / stub / IRI rendering of embedded actors
+- compact_json_ld: selects compact rendering (only the top-level document carries @context)
 """
 
 import logging
+import time
+from contextlib import contextmanager
 from functools import wraps
 
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection
+from django.utils.cache import patch_vary_headers
+from oauth2_provider.models import get_access_token_model
 
-from ..models import Actor
+from ..json_ld_utils import REPRESENTATION_FULL, REPRESENTATION_STUB, REPRESENTATIONS
+from ..models import Actor, TokenActorBinding
 from ..oauth.scopes import LOLA_PORTABILITY_SCOPE
+from ..oauth.token_cache import remember_validated_token
+from ..changes import SINCE_PARAM
+from ..snapshots import get_migration_snapshot
+from ..streaming import NDJSON_FORMAT
 from ..utils.errors import (
     build_actor_mismatch_error,
     build_actor_not_found_error,
     build_insufficient_scope_error,
+    build_invalid_parameter_error,
 )
 
 logger = logging.getLogger(__name__)
@@ -127,7 +143,7 @@ def _check_actor_binding(request, token, url_pk):
       than the one being requested. Fail closed: actor_mismatch.
     """
     try:
-        binding = token.actor_binding  # OneToOne reverse accessor
+        binding = token.actor_binding  # OneToOne reverse accessor, usually pre-loaded by resolve_actor
     except ObjectDoesNotExist:
         logger.warning(
             "LOLA access denied: portability token has no actor_binding token_id=%s path=%s",
@@ -155,12 +171,24 @@ def _apply_lola_gate(view_func, required_scope):
     Wrap `view_func` so lola_access_error runs before it, short-circuiting with the error Response on denial.
     Shared implementation behind lola_scope_required (required_scope=True) and lola_scope_optional (required_scope=False).
     The actor pk is read from the view's URL kwargs.
+
+    Once a portability token is granted access, its migration snapshot (taken on the token's first request,
+    see snapshots.py) is stored on request.migration_snapshot for build_auth_context.
     """
     @wraps(view_func)
     def wrapper(request, *args, **kwargs):
-        error = lola_access_error(request, required_scope, kwargs.get("pk"))
-        if error is not None:
-            return error
+        with gate_metrics(request).measure():
+            error = lola_access_error(request, required_scope, kwargs.get("pk"))
+            if error is not None:
+                return error
+            if getattr(request, "has_portability_scope", False):
+                # The binding was loaded (and cached on the token) by the access check
+                binding = request.auth.actor_binding
+                recorded = binding.snapshot is not None
+                request.migration_snapshot = get_migration_snapshot(binding)
+                if not recorded:
+                    # Let later requests of the token read the snapshot from the token cache
+                    remember_validated_token(request.auth)
         return view_func(request, *args, **kwargs)
 
     return wrapper
@@ -191,21 +219,90 @@ def actor_required(view_func):
 
     Stack this ABOVE the LOLA gate decorators (lola_scope_required / lola_scope_optional) so the existence check (404)
     runs before the auth check (403), preserving each endpoint's 404-before-403 precedence.
+    See resolve_actor for how the actor and the token's binding are read in one query.
     """
 
     @wraps(view_func)
     def wrapper(request, *args, **kwargs):
         pk = kwargs.get("pk")
-        try:
-            actor = Actor.objects.get(pk=pk)
-        except Actor.DoesNotExist:
-            return build_actor_not_found_error(pk, request)
+        with gate_metrics(request).measure():
+            try:
+                actor = resolve_actor(request, pk)
+            except Actor.DoesNotExist:
+                return build_actor_not_found_error(pk, request)
         kwargs["actor"] = actor
         return view_func(request, *args, **kwargs)
 
     return wrapper
 
 
+# Relations of an Actor every LOLA view reads (the outbox view, the actor document)
+ACTOR_RELATED = ("user", "portability_outbox")
+
+
+def resolve_actor(request, pk):
+    """
+    The Actor with primary key `pk`, with its user and portability outbox, in one query.
+
+    With a portability token whose binding is not loaded yet (validated-token cache and signed tokens
+    pre-populate it), the binding is read instead, joined with its actor: when the token is bound to
+    the URL actor, that single query resolves both. The binding (or its absence) is cached on the token,
+    so the LOLA gate checks it without another query.
+
+    Raises:
+        Actor.DoesNotExist: no actor has this pk.
+    """
+    token = getattr(request, "auth", None) if getattr(request, "has_portability_scope", False) else None
+    binding_relation = get_access_token_model()._meta.get_field("actor_binding")
+    if token is not None and token.pk is not None and not binding_relation.is_cached(token):
+        binding = (
+            TokenActorBinding.objects
+            .select_related(*(f"actor__{related}" for related in ACTOR_RELATED))
+            .filter(token_id=token.pk)
+            .first()
+        )
+        binding_relation.set_cached_value(token, binding)
+        if binding is not None and binding.actor_id == int(pk):
+            return binding.actor
+    return Actor.objects.select_related(*ACTOR_RELATED).get(pk=pk)
+
+
+class GateMetrics:
+    """
+    Time and database queries spent resolving the actor and checking LOLA access, summed over
+    actor_required and the LOLA gate. With settings.LOLA_SERVER_TIMING, activitypub_content
+    reports them in a `Server-Timing: lola-gate;dur=<ms>;desc="queries=<n>"` response header.
+    """
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.queries = 0
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def measure(self):
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(self._count_query):
+                yield self
+        finally:
+            self.seconds += time.perf_counter() - start
+
+    def server_timing(self):
+        return f'lola-gate;dur={self.seconds * 1000:.2f};desc="queries={self.queries}"'
+
+
+def gate_metrics(request):
+    """The GateMetrics of a request (created on first use)."""
+    metrics = getattr(request, "lola_gate_metrics", None)
+    if metrics is None:
+        metrics = request.lola_gate_metrics = GateMetrics()
+    return metrics
+
+
 def build_auth_context(request):
     """
     Build the standardized authentication context dict passed to all JSON-LD builders.
@@ -218,11 +315,24 @@ def build_auth_context(request):
             - is_authenticated: boolean OAuth authentication status
             - has_portability_scope: boolean LOLA scope presence
             - request: HTTP request object for dynamic URL building
+            - actor_json_ld: request-scoped memo of rendered Actor objects (actor id -> JSON-LD),
+              so an actor embedded many times in one response is rendered once
+            - representation: how embedded actors are rendered (set by actor_representation)
+            - compact: only the top-level document carries @context (set by compact_json_ld)
+            - snapshot: high-water marks bounding the collection reads of a portability token
+              (set by the LOLA gate, see snapshots.py), or None. Incremental reads (`since`, the
+              changes feed) ask for what changed after the snapshot, so they are never bounded by it.
     """
+    url_name = getattr(request.resolver_match, "url_name", None)
+    incremental = SINCE_PARAM in request.GET or url_name == "migration-changes"
     return {
         "is_authenticated": getattr(request, "is_oauth_authenticated", False),
         "has_portability_scope": getattr(request, "has_portability_scope", False),
         "request": request,
+        "actor_json_ld": {},
+        "representation": getattr(request, "actor_representation", REPRESENTATION_FULL),
+        "compact": getattr(request, "compact_json_ld", False),
+        "snapshot": None if incremental else getattr(request, "migration_snapshot", None),
     }
 
 
@@ -236,14 +346,115 @@ def activitypub_content(view_func):
     def wrapper(request, *args, **kwargs):
         response = view_func(request, *args, **kwargs)
 
-        # Add ActivityPub headers for JSON responses (preserves DRF browsable API)
-        if (
-            hasattr(request, "accepted_renderer")
-            and request.accepted_renderer.format == "json"
-        ):
+        # Add ActivityPub headers for JSON responses (preserves DRF browsable API).
+        # Streamed exports (JSON or NDJSON) bypass the renderers and set their own content type.
+        # A 304 Not Modified has no body to describe (see conditional.py).
+        renderer_format = getattr(getattr(request, "accepted_renderer", None), "format", None)
+        if renderer_format == "json" and not response.streaming and response.status_code != 304:
             response["Content-Type"] = "application/activity+json"
+        if response.streaming or renderer_format in ("json", NDJSON_FORMAT):
             response["Access-Control-Allow-Origin"] = "*"
 
+        # The representation is negotiated from Accept (JSON, NDJSON, browsable API), and the
+        # portability token in Authorization decides whether private data is included
+        patch_vary_headers(response, ("Accept", "Authorization"))
+
+        metrics = getattr(request, "lola_gate_metrics", None)
+        if metrics is not None:
+            logger.debug("LOLA gate: %.2f ms, %d queries path=%s", metrics.seconds * 1000, metrics.queries, request.path)
+            if getattr(settings, "LOLA_SERVER_TIMING", False):
+                response["Server-Timing"] = metrics.server_timing()
         return response
 
     return wrapper
+
+
+REPRESENTATION_PARAM = "representation"
+
+
+def actor_representation(view_func):
+    """
+    Select how embedded actors are rendered in the response and store it on
+    request.actor_representation for build_auth_context.
+
+    - `?representation=full|stub|iri` selects explicitly; unknown values return 400 invalid_parameters.
+    - Otherwise `Prefer: return=minimal` (RFC 7240) selects stubs and is acknowledged with
+      `Preference-Applied`. Other preferences are ignored, as the RFC allows.
+    - Default: full Actor documents.
+
+    Destination servers that only need actor IRIs to re-follow can skip the full documents;
+    stub and IRI items are read with a values() projection and never load Actor objects.
+    """
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        representation = request.GET.get(REPRESENTATION_PARAM)
+        preference_applied = False
+        if representation is not None:
+            if representation not in REPRESENTATIONS:
+                return build_invalid_parameter_error(
+                    REPRESENTATION_PARAM,
+                    f"Representation must be one of {list(REPRESENTATIONS)}",
+                    request,
+                )
+        elif "return=minimal" in _prefer_tokens(request):
+            representation = REPRESENTATION_STUB
+            preference_applied = True
+        else:
+            representation = REPRESENTATION_FULL
+
+        request.actor_representation = representation
+        response = view_func(request, *args, **kwargs)
+
+        if preference_applied:
+            response["Preference-Applied"] = "return=minimal"
+        patch_vary_headers(response, ("Prefer",))
+        return response
+
+    return wrapper
+
+
+def _prefer_tokens(request):
+    # Prefer: return=minimal, wait=10  ->  {"return=minimal", "wait=10"} (parameters after ";" dropped)
+    header = request.headers.get("Prefer", "")
+    return {
+        token.split(";")[0].strip().replace(" ", "").lower()
+        for token in header.split(",")
+        if token.strip()
+    }
+
+
+COMPACT_PARAM = "compact"
+COMPACT_VALUES = {"true": True, "1": True, "false": False, "0": False}
+
+
+def compact_json_ld(view_func):
+    """
+    Select compact rendering, where only the top-level document carries "@context" and embedded
+    objects (activities, notes, actors, remote objects) omit theirs. Stored on
+    request.compact_json_ld for build_auth_context.
+
+    - `?compact=true|false` selects explicitly; other values return 400 invalid_parameters.
+    - Default: on for the dedicated migration routes (url names `migration-*`), whose large
+      exports gain the most, and off elsewhere. NDJSON responses default to off: every line is
+      a standalone document that needs its own @context.
+    """
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        value = request.GET.get(COMPACT_PARAM)
+        if value is None:
+            url_name = getattr(request.resolver_match, "url_name", None) or ""
+            renderer_format = getattr(getattr(request, "accepted_renderer", None), "format", None)
+            compact = url_name.startswith("migration-") and renderer_format != NDJSON_FORMAT
+        elif value.lower() in COMPACT_VALUES:
+            compact = COMPACT_VALUES[value.lower()]
+        else:
+            return build_invalid_parameter_error(
+                COMPACT_PARAM, "compact must be 'true' or 'false'", request
+            )
+
+        request.compact_json_ld = compact
+        return view_func(request, *args, **kwargs)
+
+    return wrapper
@@ -28,6 +28,56 @@ SITE_URL = "[localhost]"
 # Override in environment-specific settings (staging.py, production.py)
 BASE_URL = "http://localhost:8000"
 
+# Cache backend (local memory by default), e.g. CACHE_URL=redis://localhost:6379/1
+# The local-memory default is per process: cached Actor documents and outbox/collection responses
+# are invalidated by bumping per-actor generation counters in this cache (see core/response_cache.py),
+# so deployments running several processes or instances (e.g. Cloud Run) must set a shared
+# CACHE_URL, or other instances keep serving stale responses until their cache timeouts expire
+# Compressed response variants get their own cache, so their large entries neither evict nor are
+# evicted by rendered documents and tokens (see core/middleware/compression.py)
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+    "compression": env.cache("COMPRESSION_CACHE_URL", default="locmemcache://lola-compression?max_entries=1000"),
+}
+
+# Seconds a rendered Actor JSON-LD document may be served from the cache
+LOLA_ACTOR_CACHE_TIMEOUT = env.int("LOLA_ACTOR_CACHE_TIMEOUT", default=300)
+
+# Seconds rendered outbox and collection responses may be served from the cache; writes to an
+# actor's data invalidate them earlier (see core/response_cache.py)
+LOLA_RESPONSE_CACHE_TIMEOUT = env.int("LOLA_RESPONSE_CACHE_TIMEOUT", default=300)
+
+# Validated access tokens (with their actor binding) are cached for up to this many seconds in a
+# per-process LRU of LOLA_TOKEN_CACHE_SIZE entries, or in Django's cache when LOLA_TOKEN_CACHE_SHARED
+# is set, so revocation reaches every process at once (see core/oauth/token_cache.py)
+LOLA_TOKEN_CACHE_TTL = env.int("LOLA_TOKEN_CACHE_TTL", default=60)
+LOLA_TOKEN_CACHE_SIZE = env.int("LOLA_TOKEN_CACHE_SIZE", default=1024)
+LOLA_TOKEN_CACHE_SHARED = env.bool("LOLA_TOKEN_CACHE_SHARED", default=False)
+
+# Compressed (gzip/brotli) variants of recurring JSON responses at least this many bytes long are
+# cached by body digest for this many seconds (see core/middleware/compression.py)
+LOLA_COMPRESSION_CACHE_MIN_LENGTH = env.int("LOLA_COMPRESSION_CACHE_MIN_LENGTH", default=2048)
+LOLA_COMPRESSION_CACHE_TIMEOUT = env.int("LOLA_COMPRESSION_CACHE_TIMEOUT", default=300)
+# Cache alias holding the compressed variants
+LOLA_COMPRESSION_CACHE = env.str("LOLA_COMPRESSION_CACHE", default="compression")
+
+# Rate limiting keeps one entry per (client IP, endpoint) in an LRU of at most this many keys
+# (see core/middleware/rate_limiting.py)
+LOLA_RATE_LIMIT_MAX_KEYS = env.int("LOLA_RATE_LIMIT_MAX_KEYS", default=50000)
+
+# Where rate-limit state is kept: "local" (per process), "cache" (Django cache alias
+# LOLA_RATE_LIMIT_CACHE) or "database" (RateLimitCounter rows), shared between workers and
+# instances. Each process syncs its hits to the shared counters at most every
+# LOLA_RATE_LIMIT_SYNC_INTERVAL seconds or LOLA_RATE_LIMIT_SYNC_BATCH hits per client
+LOLA_RATE_LIMIT_STORAGE = env.str("LOLA_RATE_LIMIT_STORAGE", default="local")
+LOLA_RATE_LIMIT_CACHE = env.str("LOLA_RATE_LIMIT_CACHE", default="default")
+LOLA_RATE_LIMIT_SYNC_INTERVAL = env.float("LOLA_RATE_LIMIT_SYNC_INTERVAL", default=1.0)
+LOLA_RATE_LIMIT_SYNC_BATCH = env.int("LOLA_RATE_LIMIT_SYNC_BATCH", default=10)
+
+# Build JSON-LD ids from BASE_URL once per process instead of from each request's host.
+# Only enable where BASE_URL is the authoritative public origin of the deployment.
+LOLA_IDS_FROM_BASE_URL = env.bool("LOLA_IDS_FROM_BASE_URL", default=False)
+
 # SECURITY WARNING: keep the secret key used in production secret
 SECRET_KEY = env.str("DJANGO_SECRET_KEY", default="django-insecure-dev-key-change-in-production")
 
@@ -59,6 +109,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # gzip/brotli for JSON responses - outermost after security, so it sees the final body
+    "testbed.core.middleware.compression.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     # LOLA Rate Limiting - positioned early to protect all endpoints
@@ -253,6 +305,34 @@ OAUTH2_PROVIDER = {
 
 OAUTH2_PROVIDER_ACCESS_TOKEN_MODEL = "oauth2_provider.AccessToken"
 
+# Issue portability tokens as signed self-contained tokens (scope, expiry and actor binding
+# verified in memory) instead of opaque strings (see core/oauth/signed_tokens.py)
+LOLA_SIGNED_ACCESS_TOKENS = env.bool("LOLA_SIGNED_ACCESS_TOKENS", default=False)
+
+# Purge expired tokens, grants and their actor bindings every this many seconds on a background
+# thread of each web process; 0 disables it (see core/oauth/token_purge.py and the
+# purge_expired_tokens management command)
+LOLA_TOKEN_PURGE_INTERVAL = env.int("LOLA_TOKEN_PURGE_INTERVAL", default=0)
+LOLA_TOKEN_PURGE_BATCH_SIZE = env.int("LOLA_TOKEN_PURGE_BATCH_SIZE", default=1000)
+
+# Report the time and queries spent resolving the actor and checking LOLA access in a
+# Server-Timing response header (see core/views/decorators.py)
+LOLA_SERVER_TIMING = env.bool("LOLA_SERVER_TIMING", default=False)
+
+# LOLA collection pagination: items per OrderedCollectionPage
+LOLA_COLLECTION_PAGE_SIZE = env.int("LOLA_COLLECTION_PAGE_SIZE", default=20)
+
+# LOLA full export (?export=full): rows read and rendered per chunk of the streamed response
+LOLA_EXPORT_CHUNK_SIZE = env.int("LOLA_EXPORT_CHUNK_SIZE", default=500)
+
+# Background LOLA export jobs: worker threads per process (0 runs jobs inline) and where files go
+LOLA_EXPORT_WORKERS = env.int("LOLA_EXPORT_WORKERS", default=2)
+LOLA_EXPORT_DIR = env.str("LOLA_EXPORT_DIR", default=str(BASE_DIR / "exports"))
+# Export jobs still pending/running after this many seconds are marked failed, and ended jobs
+# are deleted with their files after LOLA_EXPORT_TTL seconds (see core/export_jobs.py)
+LOLA_EXPORT_JOB_TIMEOUT = env.int("LOLA_EXPORT_JOB_TIMEOUT", default=3600)
+LOLA_EXPORT_TTL = env.int("LOLA_EXPORT_TTL", default=86400)
+
 # Configure REST framework to use OAuth2 authentication
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
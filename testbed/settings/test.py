@@ -30,3 +30,6 @@ LOGGING = {
     "version": 1,
     "disable_existing_loggers": True,
 }
+
+# Run LOLA export jobs inline instead of on the worker pool
+LOLA_EXPORT_WORKERS = 0